@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangoELearning.settings')
 
 application = get_asgi_application()
+
+# Carga los catálogos del formulario de solicitud al iniciar cada worker.
+from tasks.utils.catalogos import precargar_catalogos  # noqa: E402
+
+precargar_catalogos()
@@ -87,6 +87,26 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Reportes Excel generados, compartidos entre procesos y enviados como archivos (ver
+# tasks/utils/export_cache.py). El nombre incluye la versión de los datos; al guardar una
+# versión nueva se borra la anterior del mismo reporte.
+REPORTES_CACHE_DIR = BASE_DIR / 'cache' / 'reportes'
+
+
+# Máximo de solicitudes de la cola de revisión que un analista puede tener reservadas a la
+# vez (ver tasks/utils/cola_revision.py): así uno solo no vacía la cola tomando varias veces.
+COLA_REVISION_MAX_RESERVADAS = 50
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -133,6 +153,37 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # --- FIN DE CONFIGURACIÓN DE MEDIOS ---
 
+# --- LÍMITES DE SUBIDA DE ARCHIVOS ---
+# Archivos de más de FILE_UPLOAD_MAX_MEMORY_SIZE se reciben en un archivo temporal en vez de
+# en memoria; DATA_UPLOAD_MAX_MEMORY_SIZE limita el resto del formulario (sin los archivos).
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
+DATA_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
+# Documentos de la solicitud (ver tasks/utils/subidas.py): tamaño máximo de cada archivo, de
+# toda la petición (los cuatro documentos y el formulario) y píxeles máximos de cada imagen.
+DOCUMENTOS_MAX_BYTES = 5 * 1024 * 1024
+DOCUMENTOS_MAX_BYTES_PETICION = 4 * DOCUMENTOS_MAX_BYTES + DATA_UPLOAD_MAX_MEMORY_SIZE
+DOCUMENTOS_MAX_PIXELES = 50_000_000
+# --- FIN DE LÍMITES DE SUBIDA ---
+
+# --- ENTREGA DE DOCUMENTOS PROTEGIDOS ---
+# Los archivos de MEDIA_ROOT no se publican: los documentos de las solicitudes se piden a
+# tasks/views/documento_views.py, que revisa los permisos. El archivo lo envía:
+#   None               -> Django (con Range, ETag y caché del navegador).
+#   'x-accel-redirect' -> nginx, desde una location interna que apunta a MEDIA_ROOT:
+#                         location /media-protegida/ { internal; alias /ruta/a/media/; }
+#   'x-sendfile'       -> Apache (mod_xsendfile) o lighttpd.
+DOCUMENTOS_ENTREGA = None
+DOCUMENTOS_X_ACCEL_PREFIJO = '/media-protegida/'
+# --- FIN DE ENTREGA DE DOCUMENTOS ---
+
+# Tamaño de página de los listados de revisión de solicitudes (ver tasks/utils/paginacion.py).
+# Se puede cambiar por petición con '?tamano=' (máximo 100).
+SOLICITUDES_POR_PAGINA = 25
+
+# Segundos que los catálogos del formulario de solicitud (estados, municipios, becas...)
+# se mantienen en memoria en cada proceso (ver tasks/utils/catalogos.py).
+CATALOGOS_TTL = 300
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
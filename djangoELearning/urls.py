@@ -4,10 +4,6 @@
 from django.contrib import admin
 # Importa las funciones path (para definir rutas URL) e include (para incluir rutas de otras apps).
 from django.urls import path, include 
-# Importa la configuración de Django (necesaria para manejar archivos de medios en desarrollo).
-from django.conf import settings
-# Importa la función static para servir archivos estáticos/media en desarrollo.
-from django.conf.urls.static import static
 
 # ----------------------------------------------------------------------
 # Definición de patrones de URL (URLconf)
@@ -21,8 +17,5 @@ urlpatterns = [
 
 # ----------------------------------------------------------------------
 # Manejo de Archivos de Medios (Media Files)
-if settings.DEBUG:
-    # Si la aplicación está en modo de depuración (DEBUG=True),
-    # Añade un patrón de URL para servir archivos subidos por los usuarios (MEDIA_URL)
-    # desde la ubicación física donde están almacenados (MEDIA_ROOT).
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# MEDIA_URL no se sirve (ni siquiera con DEBUG): los documentos subidos son datos personales y
+# se piden a la vista protegida 'ver_documento' (tasks/views/documento_views.py).
@@ -1,4 +1,9 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect, render
+from django.urls import path
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
 from .models import Task
 from .models import Certificado
 from .models import Becas
@@ -10,6 +15,12 @@ from .models import Parroquia
 from .models import Banco
 from .models import EstatusBeca
 from .models import Profile
+from .models import TrabajoReporte
+from .models import TrabajoDocumento
+from .models import TransicionSolicitud
+from .forms.importar_planteles_form import ImportarPlantelesForm
+from .utils.importar_planteles import importar_planteles, leer_filas
+from .templatetags.documentos import url_documento
 # Register your models here.
 
 class TaskAdmin(admin.ModelAdmin):
@@ -17,11 +28,104 @@ class TaskAdmin(admin.ModelAdmin):
     
 admin.site.register(Task, TaskAdmin,)
 admin.site.register(Becas)
-admin.site.register(Solicitud)
-admin.site.register(Plantel)
 admin.site.register(Estado)
 admin.site.register(Municipio)
 admin.site.register(Parroquia)
 admin.site.register(Banco)
 admin.site.register(EstatusBeca)
 admin.site.register(Profile)
+
+# Los archivos de media/ no son públicos: los documentos de la solicitud se muestran como
+# enlaces a la vista protegida (ver views/documento_views.py) y no se cambian desde el admin.
+class SolicitudAdmin(admin.ModelAdmin):
+    exclude = Solicitud.CAMPOS_DOCUMENTOS
+    readonly_fields = ("documentos",)
+
+    @admin.display(description="Documentos")
+    def documentos(self, obj):
+        enlaces = [
+            (url_documento(getattr(obj, campo)), Solicitud._meta.get_field(campo).verbose_name)
+            for campo in Solicitud.CAMPOS_DOCUMENTOS if getattr(obj, campo)
+        ]
+        if not enlaces:
+            return "-"
+        return format_html_join(mark_safe("<br>"), '<a href="{}" target="_blank" rel="noopener">{}</a>', enlaces)
+
+admin.site.register(Solicitud, SolicitudAdmin)
+
+class TrabajoReporteAdmin(admin.ModelAdmin):
+    list_display = ("tipo_reporte", "estatus", "filas_procesadas", "total_filas", "fecha_creacion", "fecha_fin")
+    list_filter = ("tipo_reporte", "estatus")
+    readonly_fields = ("fecha_creacion",)
+
+admin.site.register(TrabajoReporte, TrabajoReporteAdmin)
+
+class TrabajoDocumentoAdmin(admin.ModelAdmin):
+    list_display = ("solicitud", "campo", "estatus", "intentos", "fecha_creacion", "fecha_fin")
+    list_filter = ("estatus", "campo")
+    readonly_fields = ("fecha_creacion",)
+    list_select_related = ("solicitud__user", "solicitud__beca")
+
+admin.site.register(TrabajoDocumento, TrabajoDocumentoAdmin)
+
+# El historial de estatus solo se consulta: no se agrega, cambia ni elimina desde el admin.
+class TransicionSolicitudAdmin(admin.ModelAdmin):
+    list_display = ("solicitud", "estatus_anterior", "estatus_nuevo", "actor", "fecha")
+    list_filter = ("estatus_nuevo", "fecha")
+    list_select_related = ("solicitud__user", "solicitud__beca", "estatus_anterior", "estatus_nuevo", "actor")
+    date_hierarchy = "fecha"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+admin.site.register(TransicionSolicitud, TransicionSolicitudAdmin)
+
+# Errores de fila que se muestran como mensaje después de importar planteles.
+MAX_ERRORES_MENSAJE = 10
+
+class PlantelAdmin(admin.ModelAdmin):
+    list_display = ("codigo_plantel", "nombre_plantel", "estado_plantel", "municipio_plantel", "estatus_plantel")
+    list_filter = ("estado_plantel", "tipo_dependencia", "estatus_plantel")
+    search_fields = ("codigo_plantel", "nombre_plantel")
+    change_list_template = "admin/tasks/plantel/change_list.html"
+
+    def get_urls(self):
+        return [
+            path("importar/", self.admin_site.admin_view(self.importar_view), name="tasks_plantel_importar"),
+        ] + super().get_urls()
+
+    # Carga masiva del registro de planteles (ver utils/importar_planteles.py).
+    def importar_view(self, request):
+        if not (self.has_add_permission(request) and self.has_change_permission(request)):
+            raise PermissionDenied
+
+        form = ImportarPlantelesForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            archivo = form.cleaned_data["archivo"]
+            try:
+                resultado = importar_planteles(leer_filas(archivo, archivo.name))
+            except ValueError as error:
+                form.add_error("archivo", str(error))
+            else:
+                messages.success(request, f"Importación terminada: {resultado}.")
+                for fila, mensaje in resultado.errores[:MAX_ERRORES_MENSAJE]:
+                    messages.warning(request, f"Fila {fila}: {mensaje}")
+                if resultado.total_errores > MAX_ERRORES_MENSAJE:
+                    messages.warning(request, f"... y {resultado.total_errores - MAX_ERRORES_MENSAJE} errores más.")
+                return redirect("admin:tasks_plantel_changelist")
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Importar planteles",
+            "form": form,
+        }
+        return render(request, "admin/tasks/plantel/importar.html", context)
+
+admin.site.register(Plantel, PlantelAdmin)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        # Registra las señales que vacían los catálogos en memoria (utils/catalogos.py).
+        from .utils import catalogos  # noqa: F401
+        # Registra las señales que encolan el procesamiento de los documentos subidos (utils/document_jobs.py).
+        from .utils import document_jobs  # noqa: F401
@@ -0,0 +1,62 @@
+# tasks/forms/catalogo_field.py
+from django import forms
+from django.core.exceptions import ValidationError
+from django.forms.models import ModelChoiceIterator, ModelChoiceIteratorValue
+
+from ..utils.catalogos import obtener_catalogo, opciones_de
+
+
+# Iterador de opciones que lee el catálogo en memoria en lugar de consultar el queryset.
+class CatalogoChoiceIterator(ModelChoiceIterator):
+
+    def _opciones(self):
+        if self.field.dependiente:
+            return opciones_de(self.queryset.model, self.field.id_padre)
+        return obtener_catalogo(self.queryset.model).opciones
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        catalogo = obtener_catalogo(self.queryset.model)
+        for pk, etiqueta in self._opciones():
+            yield (ModelChoiceIteratorValue(pk, catalogo.por_pk[pk]), etiqueta)
+
+    def __len__(self):
+        return len(self._opciones()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self._opciones())
+
+
+# Clase CatalogoChoiceField: ModelChoiceField para tablas de referencia (ver utils/catalogos.py).
+# Tanto las opciones como la validación salen del catálogo en memoria: mostrar y validar
+# el formulario no consulta la tabla.
+class CatalogoChoiceField(forms.ModelChoiceField):
+    iterator = CatalogoChoiceIterator
+    # Catálogo dependiente (ver filtrar_por): solo muestra las opciones del padre elegido.
+    dependiente = False
+    id_padre = None
+
+    def filtrar_por(self, id_padre):
+        """
+        Muestra solo las opciones que pertenecen a 'id_padre' (ninguna si es None); el resto
+        se cargan en el navegador desde los endpoints de catálogos. No cambia la validación.
+        """
+        self.dependiente = True
+        self.id_padre = id_padre
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, self.queryset.model):
+            return value
+        if isinstance(value, ModelChoiceIteratorValue):
+            value = value.value
+        try:
+            return obtener_catalogo(self.queryset.model).por_pk[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
@@ -0,0 +1,20 @@
+# tasks/forms/importar_planteles_form.py
+import os
+
+from django import forms
+
+from ..utils.importar_planteles import LECTORES
+
+
+# Clase ImportarPlantelesForm: Archivo con el registro de planteles a importar desde el admin.
+class ImportarPlantelesForm(forms.Form):
+    archivo = forms.FileField(
+        label="Archivo (.csv o .xlsx)",
+        help_text="Primera fila: encabezado con los campos del plantel (código, nombre, estado, municipio, dependencia, modalidad y, opcional, estatus).",
+    )
+
+    def clean_archivo(self):
+        archivo = self.cleaned_data['archivo']
+        if os.path.splitext(archivo.name)[1].lower() not in LECTORES:
+            raise forms.ValidationError("Use un archivo .csv o .xlsx.")
+        return archivo
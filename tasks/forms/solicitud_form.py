@@ -1,7 +1,12 @@
 # tasks/forms/solicitud_form.py
 from django import forms
 from django.core.exceptions import ValidationError 
-from ..models import Solicitud 
+from django.core.files.uploadedfile import UploadedFile
+from django.urls import reverse
+from ..models import Solicitud, Municipio, Parroquia, Plantel
+from ..utils.catalogos import pertenece_a, huella_dependientes
+from ..utils.subidas import MAX_CABECERA, error_tamano, error_cabecera
+from .catalogo_field import CatalogoChoiceField
 import os 
 import re 
 
@@ -43,8 +48,16 @@ class SolicitudForm(forms.ModelForm):
             'estatus_beca': forms.HiddenInput(),
         }
 
-    def __init__(self, *args, **kwargs):
+        # Las listas de catálogos salen de la memoria (ver utils/catalogos.py), no de una consulta por campo.
+        field_classes = {
+            campo: CatalogoChoiceField
+            for campo in ('estado', 'municipio', 'parroquia', 'plantel', 'beca', 'banco', 'estatus_beca')
+        }
+
+    def __init__(self, *args, errores_subida=None, **kwargs):
         super().__init__(*args, **kwargs)
+        # Documentos rechazados mientras se subían (request.errores_subida, ver utils/subidas.py).
+        self.errores_subida = errores_subida or {}
         self.fields['nombre_becario'].label = "Nombre del Becario"
         self.fields['apellido_becario'].label = "Apellido del Becario"
         self.fields['cedula_becario'].label = "Cédula de Identidad del Becario (Máx. 8 dígitos)"
@@ -63,6 +76,41 @@ class SolicitudForm(forms.ModelForm):
         self.fields['banco'].label = "Banco"
         self.fields['numero_de_cuenta'].label = "Número de Cuenta Bancaria (20 dígitos)"
 
+        # Municipio, parroquia y plantel solo traen las opciones del estado/municipio elegido;
+        # el navegador carga las demás desde los endpoints de catálogos al cambiar la selección.
+        huella = huella_dependientes()
+        for field_name, padre, nombre_url in (
+            ('municipio', 'estado', 'municipios_de_estado'),
+            ('parroquia', 'municipio', 'parroquias_de_municipio'),
+            ('plantel', 'municipio', 'planteles_de_municipio'),
+        ):
+            self.fields[field_name].filtrar_por(self._id_elegido(padre))
+            # Datos para el script de create_tasks.html: select del que depende y URL del
+            # endpoint ('0' se reemplaza por el id elegido).
+            self.fields[field_name].widget.attrs.update({
+                'data-catalogo-padre': self[padre].auto_id,
+                'data-catalogo-url': f"{reverse(nombre_url, args=[0])}?v={huella}",
+            })
+        # Endpoint de autocompletado del plantel (por nombre o código).
+        self.fields['plantel'].widget.attrs['data-busqueda-url'] = reverse('buscar_planteles')
+
+    def _id_elegido(self, field_name):
+        """Id elegido en un select: el enviado (si el formulario tiene datos) o el inicial."""
+        valor = self.data.get(self.add_prefix(field_name)) if self.is_bound else self.initial.get(field_name)
+        try:
+            return int(valor)
+        except (TypeError, ValueError):
+            return None
+
+    def _get_validation_exclusions(self):
+        # Los campos de catálogo ya se validaron contra el catálogo en memoria: se excluyen
+        # de la validación del modelo, que volvería a consultar si cada clave foránea existe.
+        # Si la opción se borró mientras tanto, la restricción de la BD la rechaza al guardar
+        # y la vista la muestra como error del formulario (ver _create_tasks).
+        exclusiones = super()._get_validation_exclusions()
+        exclusiones.update(nombre for nombre, campo in self.fields.items() if isinstance(campo, CatalogoChoiceField))
+        return exclusiones
+
     def _validate_only_letters(self, field_name):
         value = self.cleaned_data.get(field_name)
         label = self.fields[field_name].label
@@ -115,7 +163,17 @@ class SolicitudForm(forms.ModelForm):
             raise ValidationError(
                 f"El archivo para '{self.fields[field_name].label}' debe ser en formato JPG. No se permiten archivos {ext.upper()}."
             )
-            
+
+        # El contenido se revisa por sus primeros bytes (firma JPEG y dimensiones), sin leer
+        # el archivo completo: la extensión sola no dice qué se subió.
+        if isinstance(file, UploadedFile):
+            file.seek(0)
+            cabecera = file.read(MAX_CABECERA)
+            file.seek(0)
+            error = error_tamano(file.size) or error_cabecera(cabecera, completa=True)
+            if error:
+                raise ValidationError(f"El archivo para '{self.fields[field_name].label}' {error}.")
+
         return file
     
     def clean_constancia_estudios(self):
@@ -140,6 +198,15 @@ class SolicitudForm(forms.ModelForm):
             'cedula'
         ]
         
+        # Los documentos descartados al subirse no llegan al formulario: su error reemplaza
+        # al de 'campo obligatorio'.
+        for field_name, error in self.errores_subida.items():
+            if field_name is None:
+                self.add_error(None, error)
+            elif field_name in self.fields:
+                self._errors.pop(field_name, None)
+                self.add_error(field_name, f"El archivo para '{self.fields[field_name].label}' {error}.")
+
         uploaded_file_names = set()
         
         for field_name in file_fields:
@@ -158,5 +225,29 @@ class SolicitudForm(forms.ModelForm):
                     
                 else:
                     uploaded_file_names.add(file_name)
-                    
+
+        # El municipio debe ser del estado elegido, y la parroquia y el plantel, del municipio.
+        # Los cuatro campos son opcionales en el modelo: si se elige un hijo sin su padre no
+        # habría con qué comparar, así que el padre se vuelve obligatorio.
+        estado = cleaned_data.get('estado')
+        municipio = cleaned_data.get('municipio')
+        if municipio and not estado and 'estado' not in self.errors:
+            self.add_error('estado', "Seleccione el estado.")
+        elif estado and municipio and not pertenece_a(Municipio, municipio.pk, estado.pk):
+            self.add_error('municipio', "El municipio seleccionado no pertenece al estado seleccionado.")
+            municipio = None
+        hijos = (
+            ('parroquia', Parroquia, "La parroquia seleccionada no pertenece al municipio seleccionado."),
+            ('plantel', Plantel, "La institución educativa seleccionada no pertenece al municipio seleccionado."),
+        )
+        for campo, modelo, error in hijos:
+            hijo = cleaned_data.get(campo)
+            if not hijo:
+                continue
+            if municipio:
+                if not pertenece_a(modelo, hijo.pk, municipio.pk):
+                    self.add_error(campo, error)
+            elif 'municipio' not in self.errors:
+                self.add_error('municipio', "Seleccione el municipio.")
+
         return cleaned_data
\ No newline at end of file
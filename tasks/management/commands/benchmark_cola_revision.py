@@ -0,0 +1,112 @@
+# tasks/management/commands/benchmark_cola_revision.py
+
+import threading
+import time
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+
+from ...models import Solicitud, EstatusBeca, TransicionSolicitud
+from ...utils.cola_revision import tomar_solicitudes
+from ...views.admin_solicitud_views import gestionar_solicitud
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el rendimiento de la cola de revisión con distinto número de analistas "
+        "simultáneos (--analistas, p. ej. 1,2,4,8): cada uno toma --lote solicitudes, las "
+        "revisa (--revision-ms de espera por solicitud, el tiempo de leerla) y las aprueba con "
+        "gestionar_solicitud, hasta vaciar la cola de --solicitudes. Falla si alguna solicitud "
+        "se revisó dos veces o quedó sin revisar, o si con el máximo de analistas el "
+        "rendimiento no es al menos --min-aceleracion veces el de uno solo. Los datos "
+        "sintéticos se confirman (los hilos usan sus propias conexiones) y se borran al terminar. "
+        "Todos los analistas corren en este proceso: con --revision-ms muy bajo la medición queda "
+        "limitada por el GIL de Python, no por la cola."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solicitudes', type=int, default=100, help="Solicitudes pendientes en la cola.")
+        parser.add_argument('--analistas', default='1,2,4,8', help="Analistas simultáneos de cada medición, separados por comas.")
+        parser.add_argument('--lote', type=int, default=5, help="Solicitudes que toma cada analista por vez.")
+        parser.add_argument('--revision-ms', type=float, default=100.0, help="Tiempo de revisión de cada solicitud (ms).")
+        parser.add_argument('--min-aceleracion', type=float, default=3.0, help="Aceleración mínima con el máximo de analistas.")
+
+    def handle(self, *args, **options):
+        try:
+            analistas = sorted({int(valor) for valor in options['analistas'].split(',')})
+        except ValueError:
+            raise CommandError("--analistas debe ser una lista de números separados por comas.")
+        for codigo in (EstatusBeca.EN_PROCESO, EstatusBeca.APROBADA):
+            EstatusBeca.obtener(codigo, crear=True)
+
+        rendimientos = {}
+        for cantidad in analistas:
+            rendimientos[cantidad] = self.medir(cantidad, options)
+            self.stdout.write(
+                f"{cantidad} analista(s): {rendimientos[cantidad]:.1f} solicitudes/s "
+                f"({rendimientos[cantidad] / rendimientos[analistas[0]]:.2f}x)"
+            )
+
+        aceleracion = rendimientos[analistas[-1]] / rendimientos[analistas[0]]
+        if len(analistas) > 1 and aceleracion < options['min_aceleracion']:
+            raise CommandError(f"Con {analistas[-1]} analistas el rendimiento es {aceleracion:.2f}x, menos de {options['min_aceleracion']}x.")
+        self.stdout.write(self.style.SUCCESS("Ninguna solicitud se revisó dos veces."))
+
+    def medir(self, cantidad, options):
+        """Vacía una cola nueva con 'cantidad' analistas y retorna las solicitudes revisadas por segundo."""
+        en_proceso = EstatusBeca.obtener(EstatusBeca.EN_PROCESO)
+        usuarios = [
+            User.objects.create_superuser(f'benchmark_cola_{i}', 'benchmark@example.com', None)
+            for i in range(cantidad)
+        ]
+        solicitante = User.objects.create_user('benchmark_cola_solicitante', 'benchmark@example.com', None)
+        try:
+            Solicitud.objects.bulk_create([Solicitud(user=solicitante, estatus_beca=en_proceso) for _ in range(options['solicitudes'])])
+            ids = set(Solicitud.objects.filter(user=solicitante).values_list('id_solicitud', flat=True))
+
+            revisiones = Counter()
+            candado = threading.Lock()
+            factory = RequestFactory()
+
+            def analista(usuario):
+                try:
+                    while True:
+                        tomadas = tomar_solicitudes(usuario, options['lote'])
+                        if not tomadas:
+                            break
+                        for solicitud_id in tomadas:
+                            time.sleep(options['revision_ms'] / 1000)
+                            request = factory.get('/')
+                            request.user = usuario
+                            request._messages = CookieStorage(request)
+                            gestionar_solicitud(request, solicitud_id, 'aprobar')
+                            with candado:
+                                revisiones[solicitud_id] += 1
+                finally:
+                    connection.close()
+
+            hilos = [threading.Thread(target=analista, args=(usuario,)) for usuario in usuarios]
+            inicio = time.perf_counter()
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+            duracion = time.perf_counter() - inicio
+
+            repetidas = [pk for pk, veces in revisiones.items() if veces > 1]
+            if repetidas:
+                raise CommandError(f"{len(repetidas)} solicitudes se revisaron más de una vez (p. ej. #{repetidas[0]}).")
+            if set(revisiones) != ids:
+                raise CommandError(f"{len(ids - set(revisiones))} solicitudes quedaron sin revisar.")
+            aprobadas = TransicionSolicitud.objects.filter(solicitud_id__in=ids).count()
+            if aprobadas != len(ids) or Solicitud.objects.filter(pk__in=ids, estatus_beca=en_proceso).exists():
+                raise CommandError(f"Se revisaron {len(ids)} solicitudes, pero el historial tiene {aprobadas} cambios.")
+            return len(ids) / duracion
+        finally:
+            # Borra los datos sintéticos (el historial se borra con sus solicitudes).
+            Solicitud.objects.filter(user=solicitante).delete()
+            User.objects.filter(pk__in=[solicitante.pk, *(usuario.pk for usuario in usuarios)]).delete()
@@ -0,0 +1,175 @@
+# tasks/management/commands/benchmark_dashboard.py
+
+import random
+import statistics
+import time
+from datetime import timedelta, date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from ...models import Solicitud, Profile, Becas, EstatusBeca, Estado, Municipio, Parroquia, EstadisticaSolicitud
+from ...utils.estadisticas import GRAFICOS, FILTROS_SOLICITUDES
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia del dashboard de estadísticas con filtros (rango de fechas, estado, "
+        "beca y municipio) leyendo la tabla de resumen EstadisticaSolicitud, comparada con los "
+        "Count directos sobre Solicitud. La latencia es la de calcular todos los gráficos de "
+        "solicitudes uno tras otro y sin cache. Los datos sintéticos se crean dentro de una "
+        "transacción que se deshace al final. Falla si alguna combinación supera --target-ms."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500000, help="Cantidad de solicitudes sintéticas.")
+        parser.add_argument('--days', type=int, default=365, help="Días sobre los que se reparten las solicitudes.")
+        parser.add_argument('--repeticiones', type=int, default=5, help="Mediciones por combinación de filtros.")
+        parser.add_argument('--target-ms', type=float, default=250.0, help="Latencia máxima (mediana) del dashboard completo.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            catalogos = self._crear_datos(options['rows'], options['days'])
+            combinaciones = self._combinaciones(catalogos)
+
+            excedidas = []
+            for etiqueta, filtros in combinaciones:
+                resumen = self._medir(lambda: self._dashboard_resumen(filtros), options['repeticiones'])
+                directo = self._medir(lambda: self._dashboard_directo(filtros), 1)
+                grafico, lento = self._grafico_mas_lento(filtros)
+                self.stdout.write(
+                    f"{etiqueta:<28} resumen: {resumen:7.1f} ms (más lento: {grafico} {lento:.1f} ms)"
+                    f" | Count directo: {directo:9.1f} ms"
+                )
+                if resumen > options['target_ms']:
+                    excedidas.append(etiqueta)
+            # Deshace los datos sintéticos.
+            transaction.set_rollback(True)
+
+        if excedidas:
+            raise CommandError(
+                f"Latencia por encima de {options['target_ms']} ms en: {', '.join(excedidas)}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Todas las combinaciones por debajo de {options['target_ms']} ms."
+        ))
+
+    def _crear_datos(self, rows, days):
+        self.stdout.write(f"Creando {rows} solicitudes sintéticas en {days} días...")
+        rng = random.Random(2024)
+
+        estatus = [EstatusBeca.obtener(codigo, crear=True) for codigo in EstatusBeca.NOMBRES]
+        becas = Becas.objects.bulk_create([
+            Becas(nombre=f"Beca benchmark {i}", descripcion="Beca sintética") for i in range(8)
+        ])
+        estados = Estado.objects.bulk_create([Estado(nombre=f"Estado benchmark {i}") for i in range(3)])
+        municipios = Municipio.objects.bulk_create([
+            Municipio(nombre=f"Municipio benchmark {i}", estado=estados[i % len(estados)]) for i in range(21)
+        ])
+        parroquias = Parroquia.objects.bulk_create([
+            Parroquia(nombre=f"Parroquia benchmark {i}", municipio=municipios[i % len(municipios)]) for i in range(63)
+        ])
+
+        # bulk_create no dispara la señal post_save, así que los perfiles se crean aparte.
+        # Se reutilizan pocos usuarios: el dashboard agrupa por género/edad del solicitante.
+        User.objects.bulk_create(
+            [User(username=f"benchmark_dash_{i}", password='!') for i in range(2000)],
+            batch_size=5000,
+        )
+        users = list(User.objects.filter(username__startswith='benchmark_dash_').only('id'))
+        Profile.objects.bulk_create(
+            [
+                Profile(
+                    user=user,
+                    nombre_completo="Nombre",
+                    apellido_completo="Apellido",
+                    cedula_identidad=f"BD{user.id}",
+                    genero=rng.choice('MF'),
+                    fecha_nacimiento=date(rng.randint(1985, 2008), rng.randint(1, 12), 1),
+                )
+                for user in users
+            ],
+            batch_size=5000,
+        )
+
+        def solicitud(i):
+            parroquia = rng.choice(parroquias)
+            municipio = municipios[(parroquia.pk - parroquias[0].pk) % len(municipios)]
+            return Solicitud(
+                user=rng.choice(users),
+                beca=rng.choice(becas),
+                estatus_beca=rng.choice(estatus),
+                estado=estados[(municipio.pk - municipios[0].pk) % len(estados)],
+                municipio=municipio,
+                parroquia=parroquia,
+            )
+        Solicitud.objects.bulk_create((solicitud(i) for i in range(rows)), batch_size=5000)
+
+        # fecha_creacion es auto_now_add: se reparte después por bloques de IDs, un día por bloque.
+        ids = Solicitud.objects.order_by('id_solicitud').values_list('id_solicitud', flat=True)
+        primero, ultimo = ids.first(), ids.last()
+        por_dia = max(1, (ultimo - primero + 1) // days)
+        ahora = timezone.now()
+        for dia in range(days):
+            inicio = primero + dia * por_dia
+            fin = ultimo if dia == days - 1 else inicio + por_dia - 1
+            Solicitud.objects.filter(id_solicitud__range=(inicio, fin)).update(fecha_creacion=ahora - timedelta(days=dia))
+
+        filas = EstadisticaSolicitud.reconstruir()
+        self.stdout.write(f"Tabla de resumen: {filas} filas.")
+        return {'estado': estados[0].pk, 'beca': becas[0].pk, 'municipio': municipios[0].pk}
+
+    def _combinaciones(self, catalogos):
+        hoy = timezone.localdate()
+        periodo = {'desde': hoy - timedelta(days=89), 'hasta': hoy}
+        return [
+            ("Sin filtros", {}),
+            ("Período (90 días)", periodo),
+            ("Estado", {'estado': catalogos['estado']}),
+            ("Beca", {'beca': catalogos['beca']}),
+            ("Municipio", {'municipio': catalogos['municipio']}),
+            ("Período + estado + beca", dict(periodo, estado=catalogos['estado'], beca=catalogos['beca'])),
+            ("Período + municipio + beca", dict(periodo, municipio=catalogos['municipio'], beca=catalogos['beca'])),
+        ]
+
+    def _medir(self, funcion, repeticiones):
+        """Mediana en milisegundos de 'repeticiones' ejecuciones."""
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        return statistics.median(tiempos)
+
+    def _dashboard_resumen(self, filtros):
+        """Calcula (sin cache) todos los gráficos de solicitudes del dashboard."""
+        for grafico in GRAFICOS.values():
+            if grafico.filtros == FILTROS_SOLICITUDES:
+                grafico.calcular(filtros)
+
+    def _grafico_mas_lento(self, filtros):
+        """Gráfico de solicitudes que más tarda con estos filtros (el dashboard los pide en paralelo)."""
+        tiempos = {
+            nombre: self._medir(lambda: grafico.calcular(filtros), 1)
+            for nombre, grafico in GRAFICOS.items()
+            if grafico.filtros == FILTROS_SOLICITUDES
+        }
+        nombre = max(tiempos, key=tiempos.get)
+        return nombre, tiempos[nombre]
+
+    def _dashboard_directo(self, filtros):
+        """Los mismos agregados con Count directos sobre Solicitud (lo que se evita)."""
+        qs = Solicitud.objects.all()
+        if 'desde' in filtros:
+            qs = qs.filter(fecha_creacion__date__gte=filtros['desde'])
+        if 'hasta' in filtros:
+            qs = qs.filter(fecha_creacion__date__lte=filtros['hasta'])
+        for nombre in ('estado', 'beca', 'municipio'):
+            if nombre in filtros:
+                qs = qs.filter(**{f'{nombre}_id': filtros[nombre]})
+        for campo in ('estatus_beca__nombre', 'fecha_creacion__date', 'beca__nombre', 'municipio__nombre',
+                      'parroquia__nombre', 'user__profile__genero', 'user__profile__fecha_nacimiento__year'):
+            list(qs.values(campo).annotate(count=Count('id_solicitud')).order_by('-count'))
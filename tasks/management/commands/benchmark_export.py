@@ -0,0 +1,112 @@
+# tasks/management/commands/benchmark_export.py
+
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...models import Solicitud, Profile, Becas, EstatusBeca
+from ...utils.export_excel import SolicitudesExportStrategy, STREAM_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide filas/segundo del reporte de solicitudes con la consulta anterior "
+        "(una consulta por estatus e instancias de modelo) y con la actual "
+        "(una sola consulta con values_list). Los datos sintéticos se crean dentro "
+        "de una transacción que se deshace al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help="Cantidad de solicitudes sintéticas.")
+        parser.add_argument('--chunk-size', type=int, default=STREAM_CHUNK_SIZE, help="Tamaño de lote para iterator().")
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        chunk_size = options['chunk_size']
+
+        with transaction.atomic():
+            self._crear_datos(rows)
+            antes = self._medir("Antes (consulta por estatus + modelos)", self._filas_anteriores)
+            despues = self._medir(
+                "Después (values_list + CASE/WHEN)",
+                lambda: SolicitudesExportStrategy().iter_rows(chunk_size=chunk_size),
+            )
+            self.stdout.write(self.style.SUCCESS(f"Mejora: x{despues / antes:.2f}"))
+            # Deshace los datos sintéticos.
+            transaction.set_rollback(True)
+
+    def _crear_datos(self, rows):
+        self.stdout.write(f"Creando {rows} solicitudes sintéticas...")
+        estatus = [
+            EstatusBeca.objects.get_or_create(nombre=nombre)[0]
+            for nombre in SolicitudesExportStrategy.estatus_orden
+        ]
+        becas = Becas.objects.bulk_create([
+            Becas(nombre=f"Beca benchmark {i}", descripcion="Beca sintética") for i in range(5)
+        ])
+
+        # bulk_create no dispara la señal post_save, así que los perfiles se crean aparte.
+        User.objects.bulk_create(
+            [User(username=f"benchmark_{i}", password='!') for i in range(rows)],
+            batch_size=5000,
+        )
+        users = list(User.objects.filter(username__startswith='benchmark_').only('id'))
+        Profile.objects.bulk_create(
+            [
+                Profile(
+                    user=user,
+                    nombre_completo="Nombre",
+                    apellido_completo="Apellido",
+                    cedula_identidad=f"B{user.id}",
+                    numero_telefono="04120000000",
+                )
+                for user in users
+            ],
+            batch_size=5000,
+        )
+        Solicitud.objects.bulk_create(
+            [
+                Solicitud(
+                    user=user,
+                    beca=becas[i % len(becas)],
+                    estatus_beca=estatus[i % len(estatus)],
+                    nombre_becario="Estudiante",
+                    apellido_becario="Sintético",
+                )
+                for i, user in enumerate(users)
+            ],
+            batch_size=5000,
+        )
+
+    def _medir(self, etiqueta, generar_filas):
+        inicio = time.perf_counter()
+        total = sum(1 for _ in generar_filas())
+        duracion = time.perf_counter() - inicio
+        velocidad = total / duracion if duracion else 0
+        self.stdout.write(f"{etiqueta}: {total} filas en {duracion:.2f}s ({velocidad:,.0f} filas/s)")
+        return velocidad
+
+    def _filas_anteriores(self):
+        """Reproduce la obtención de datos que usaba el reporte antes del cambio."""
+        solicitudes_ordenadas = []
+        for estatus_nombre in SolicitudesExportStrategy.estatus_orden:
+            solicitudes = Solicitud.objects.filter(
+                estatus_beca__nombre=estatus_nombre,
+                user__isnull=False
+            ).select_related('user__profile', 'beca', 'estatus_beca')
+            solicitudes_ordenadas.extend(list(solicitudes))
+
+        for solicitud in solicitudes_ordenadas:
+            profile = solicitud.user.profile if hasattr(solicitud.user, 'profile') else None
+            yield [
+                getattr(profile, 'nombre_completo', ""),
+                getattr(profile, 'apellido_completo', ""),
+                solicitud.nombre_becario,
+                solicitud.apellido_becario,
+                getattr(profile, 'cedula_identidad', ""),
+                getattr(profile, 'numero_telefono', ""),
+                solicitud.beca.nombre if solicitud.beca else "",
+                solicitud.estatus_beca.nombre if solicitud.estatus_beca else "",
+            ]
@@ -0,0 +1,96 @@
+# tasks/management/commands/benchmark_planteles.py
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+
+from ...models import Plantel, PlantelTermino
+from ...utils.catalogos import precargar_catalogos
+from ...utils.texto import palabras
+from ...views.catalogo_views import buscar_planteles
+
+# Palabras con las que se arman los nombres sintéticos de los planteles.
+TIPOS = ["U.E.", "U.E.N.", "U.E.P.", "Liceo", "Escuela Básica", "Colegio", "E.T.I.", "Complejo Educativo"]
+NOMBRES = [
+    "Simón", "Bolívar", "Andrés", "Bello", "José", "Antonio", "Páez", "Francisco", "Miranda", "Sucre",
+    "Rafael", "Urdaneta", "Cecilio", "Acosta", "Luisa", "Cáceres", "Arismendi", "Juan", "Vicente",
+    "González", "Sagrado", "Corazón", "Jesús", "Nuestra", "Señora", "Coromoto", "Rómulo", "Gallegos",
+    "Fermín", "Toro", "Teresa", "Carreño", "Manuel", "Palacio", "Fajardo", "Guaicaipuro", "Caricuao",
+    "Libertador", "Ezequiel", "Zamora", "Gran", "Mariscal", "Ayacucho", "Independencia", "Santa", "Rosa",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia del autocompletado de planteles (endpoint buscar_planteles, índice "
+        "PlantelTermino) con un registro sintético de planteles. Los datos se crean dentro de "
+        "una transacción que se deshace al final. Falla si el percentil 99 supera --target-ms."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000, help="Cantidad de planteles sintéticos.")
+        parser.add_argument('--consultas', type=int, default=1000, help="Búsquedas a medir.")
+        parser.add_argument('--target-ms', type=float, default=10.0, help="Latencia máxima del percentil 99.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(2024)
+        with transaction.atomic():
+            self.stdout.write(f"Creando {options['rows']} planteles sintéticos...")
+            Plantel.objects.bulk_create(
+                (
+                    Plantel(
+                        nombre_plantel=f"{rng.choice(TIPOS)} {' '.join(rng.sample(NOMBRES, rng.randint(2, 4)))}",
+                        estado_plantel='Miranda',
+                        municipio_plantel='Sucre',
+                        codigo_plantel=f"BP{i:08d}",
+                        tipo_dependencia='estadal',
+                        modalidad_principal='regular',
+                    )
+                    for i in range(options['rows'])
+                ),
+                batch_size=5000,
+            )
+            # bulk_create no dispara post_save: el índice de búsqueda se reconstruye completo.
+            terminos = PlantelTermino.reconstruir()
+            self.stdout.write(f"Índice de búsqueda: {terminos} términos.")
+            # Como al iniciar un worker: el catálogo de planteles ya está en memoria.
+            precargar_catalogos()
+
+            textos = self._textos(rng, options['consultas'])
+            factory = RequestFactory()
+            tiempos = []
+            resultados = 0
+            for texto in textos:
+                request = factory.get('/', {'q': texto})
+                inicio = time.perf_counter()
+                response = buscar_planteles(request)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+                resultados += response.content.count(b'"id"')
+            # Deshace los datos sintéticos.
+            transaction.set_rollback(True)
+
+        tiempos.sort()
+        p99 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.99))]
+        self.stdout.write(
+            f"{len(tiempos)} búsquedas: mediana {statistics.median(tiempos):.2f} ms | "
+            f"p99 {p99:.2f} ms | máx {tiempos[-1]:.2f} ms | {resultados / len(tiempos):.1f} resultados en promedio"
+        )
+        if p99 > options['target_ms']:
+            raise CommandError(f"p99 de {p99:.2f} ms por encima de {options['target_ms']} ms.")
+        self.stdout.write(self.style.SUCCESS(f"p99 por debajo de {options['target_ms']} ms."))
+
+    def _textos(self, rng, cantidad):
+        """Búsquedas como las escribe un usuario: prefijos de 2 a 6 letras, una o dos palabras, o un código."""
+        textos = []
+        for _ in range(cantidad):
+            tipo = rng.random()
+            if tipo < 0.1:
+                textos.append(f"bp{rng.randint(0, 9999):04d}")
+            else:
+                elegidas = rng.sample(NOMBRES, 2 if tipo < 0.5 else 1)
+                textos.append(' '.join(palabras(nombre)[0][:rng.randint(2, 6)] for nombre in elegidas))
+        return textos
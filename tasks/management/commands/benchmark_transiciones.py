@@ -0,0 +1,96 @@
+# tasks/management/commands/benchmark_transiciones.py
+
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from django.utils import timezone
+
+from ...models import Solicitud, EstatusBeca, TransicionSolicitud
+from ...views.admin_solicitud_views import gestionar_solicitud
+from ...views.commands import COMMAND_MAP
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide cuánto agrega el historial de estatus (TransicionSolicitud) a la latencia de "
+        "gestionar_solicitud: se aprueban solicitudes una a una y, por separado, se mide solo "
+        "la escritura de su transición, con un historial sintético previo de --historial filas. "
+        "Los datos se crean dentro de una transacción que se deshace al final. Falla si la "
+        "escritura del historial supera --max-porcentaje de la mediana de la vista."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solicitudes', type=int, default=500, help="Solicitudes a aprobar (una petición cada una).")
+        parser.add_argument('--historial', type=int, default=100000, help="Transiciones sintéticas previas.")
+        parser.add_argument('--max-porcentaje', type=float, default=10.0, help="Costo máximo del historial (%% de la mediana).")
+
+    def handle(self, *args, **options):
+        cantidad = options['solicitudes']
+        with transaction.atomic():
+            en_proceso = EstatusBeca.obtener(EstatusBeca.EN_PROCESO, crear=True)
+            aprobada = EstatusBeca.obtener(EstatusBeca.APROBADA, crear=True)
+            analista = User.objects.create_superuser('benchmark_transiciones', 'benchmark@example.com', None)
+            solicitante = User.objects.create_user('benchmark_transiciones_solicitante', 'benchmark@example.com', None)
+
+            self.stdout.write(f"Creando {cantidad * 2} solicitudes y {options['historial']} transiciones sintéticas...")
+            Solicitud.objects.bulk_create(
+                [Solicitud(user=solicitante, estatus_beca=en_proceso) for _ in range(cantidad * 2)],
+                batch_size=1000,
+            )
+            ids = list(Solicitud.objects.filter(user=solicitante).order_by('id_solicitud').values_list('id_solicitud', flat=True))
+            inicio_historial = timezone.now() - timedelta(days=365)
+            TransicionSolicitud.objects.bulk_create(
+                (
+                    TransicionSolicitud(
+                        solicitud_id=ids[i % len(ids)], estatus_anterior=en_proceso, estatus_nuevo=aprobada,
+                        actor=analista, fecha=inicio_historial + timedelta(minutes=i % (365 * 24 * 60)),
+                    )
+                    for i in range(options['historial'])
+                ),
+                batch_size=5000,
+            )
+
+            factory = RequestFactory()
+            comando = COMMAND_MAP['aprobar']
+            vista = []
+            historial = []
+            inicio_medicion = timezone.now()
+            # Intercaladas: una solicitud por la vista completa y otra solo con la escritura del
+            # historial, para que ambas mediciones vean la misma base de datos.
+            for id_vista, id_historial in zip(ids[:cantidad], ids[cantidad:]):
+                request = factory.get('/')
+                request.user = analista
+                request._messages = CookieStorage(request)
+                inicio = time.perf_counter()
+                response = gestionar_solicitud(request, id_vista, 'aprobar')
+                vista.append((time.perf_counter() - inicio) * 1000)
+                if response.status_code != 302:
+                    raise CommandError(f"gestionar_solicitud respondió {response.status_code}.")
+
+                solicitud = Solicitud(id_solicitud=id_historial, estatus_beca=aprobada)
+                inicio = time.perf_counter()
+                comando.registrar_transicion(request, solicitud, en_proceso.pk)
+                historial.append((time.perf_counter() - inicio) * 1000)
+
+            registradas = TransicionSolicitud.objects.filter(solicitud_id__in=ids[:cantidad], fecha__gte=inicio_medicion).count()
+            # Deshace los datos sintéticos.
+            transaction.set_rollback(True)
+
+        if registradas < cantidad:
+            raise CommandError(f"Solo {registradas} de {cantidad} aprobaciones quedaron en el historial.")
+        mediana_vista = statistics.median(vista)
+        mediana_historial = statistics.median(historial)
+        porcentaje = mediana_historial / mediana_vista * 100
+        self.stdout.write(
+            f"gestionar_solicitud: mediana {mediana_vista:.2f} ms | "
+            f"escritura del historial: mediana {mediana_historial:.3f} ms ({porcentaje:.1f} %)"
+        )
+        if porcentaje > options['max_porcentaje']:
+            raise CommandError(f"El historial agrega {porcentaje:.1f} %, por encima de {options['max_porcentaje']} %.")
+        self.stdout.write(self.style.SUCCESS(f"El historial agrega menos de {options['max_porcentaje']} %."))
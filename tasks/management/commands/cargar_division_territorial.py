@@ -0,0 +1,30 @@
+# tasks/management/commands/cargar_division_territorial.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import Estado, Municipio, Parroquia
+from ...utils.division_territorial import cargar_division_territorial, leer_division_territorial, ARCHIVO_DIVISION_TERRITORIAL
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga los estados, municipios y parroquias (necesarios para el formulario de solicitud) "
+        "desde un archivo JSON {estado: {municipio: [parroquias]}}; por defecto, el incluido en "
+        "tasks/data. Solo crea los que faltan, así que se puede ejecutar varias veces."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', nargs='?', default=ARCHIVO_DIVISION_TERRITORIAL, help="Ruta del archivo JSON.")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        try:
+            creados = cargar_division_territorial(leer_division_territorial(options['archivo']))
+        except (OSError, ValueError) as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS(
+            f"División territorial cargada en {time.perf_counter() - inicio:.2f}s: "
+            f"{creados[Estado]} estados, {creados[Municipio]} municipios y {creados[Parroquia]} parroquias nuevos."
+        ))
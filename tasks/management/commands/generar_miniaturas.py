@@ -0,0 +1,37 @@
+# tasks/management/commands/generar_miniaturas.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...models import Solicitud
+from ...utils.miniaturas import CAMPOS_DOCUMENTOS, generar_rendiciones
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera las versiones reducidas (miniatura y vista previa) de los documentos ya subidos "
+        "de las solicitudes. Las de las nuevas subidas las genera el proceso procesar_documentos; "
+        "este comando completa las que falten (archivos anteriores a ese proceso o trabajos "
+        "fallidos) y puede correr a la vez que él. Con --forzar las vuelve a generar todas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forzar', action='store_true', help="Vuelve a generar también las que ya existen.")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        procesados = set()
+        generadas = 0
+        for solicitud in Solicitud.objects.only('id_solicitud', *CAMPOS_DOCUMENTOS).iterator(chunk_size=500):
+            for campo in CAMPOS_DOCUMENTOS:
+                archivo = getattr(solicitud, campo)
+                # Varios registros pueden apuntar al mismo archivo.
+                if not archivo or archivo.name in procesados:
+                    continue
+                procesados.add(archivo.name)
+                generadas += generar_rendiciones(archivo, forzar=options['forzar'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(procesados)} documentos revisados, {generadas} versiones reducidas generadas "
+            f"en {time.perf_counter() - inicio:.2f}s."
+        ))
@@ -0,0 +1,43 @@
+# tasks/management/commands/import_planteles.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...utils.importar_planteles import importar_planteles, leer_filas, TAMANO_LOTE
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa planteles desde un archivo .csv o .xlsx (primera fila: encabezado con los "
+        "nombres de los campos). Crea o actualiza por 'codigo_plantel', en lotes, leyendo el "
+        "archivo fila a fila. Las filas inválidas se omiten y se reportan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del archivo .csv o .xlsx.")
+        parser.add_argument('--batch-size', type=int, default=TAMANO_LOTE, help="Filas por transacción.")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+
+        def progreso(resultado):
+            self.stdout.write(f"  {resultado} ({time.perf_counter() - inicio:.1f}s)")
+
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resultado = importar_planteles(
+                    leer_filas(archivo, options['archivo']),
+                    tamano_lote=options['batch_size'],
+                    progreso=progreso,
+                )
+        except (OSError, ValueError) as error:
+            raise CommandError(str(error))
+
+        for fila, mensaje in resultado.errores:
+            self.stderr.write(f"Fila {fila}: {mensaje}")
+        if resultado.total_errores > len(resultado.errores):
+            self.stderr.write(f"... y {resultado.total_errores - len(resultado.errores)} errores más.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Importación terminada: {resultado} en {time.perf_counter() - inicio:.2f}s."
+        ))
@@ -0,0 +1,72 @@
+# tasks/management/commands/migrar_documentos.py
+
+import time
+from collections import Counter
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...models import Solicitud, DocumentoAlmacenado
+from ...utils.almacenamiento import almacenamiento_documentos, es_por_contenido
+from ...utils.miniaturas import RENDICIONES, generar_rendiciones, ruta_rendicion
+
+
+class Command(BaseCommand):
+    help = (
+        "Pasa los documentos subidos antes del almacenamiento por contenido (constancias/, "
+        "boletines/, cedulas/) a 'documentos/ab/cd/<sha256>.jpg': los archivos repetidos quedan "
+        "guardados una sola vez. Con --eliminar-originales borra los archivos anteriores."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--eliminar-originales', action='store_true', help="Borra los archivos anteriores ya migrados.")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        migrados = {}
+        # Referencias que tomó el storage al guardar cada archivo migrado y que aún no usa
+        # ninguna solicitud (la primera que lo usa se queda con ella).
+        sin_usar = Counter()
+        faltantes = set()
+        actualizadas = 0
+        solicitudes = Solicitud.objects.only('id_solicitud', *Solicitud.CAMPOS_DOCUMENTOS)
+        for solicitud in solicitudes.iterator(chunk_size=500):
+            cambios = {}
+            for campo in Solicitud.CAMPOS_DOCUMENTOS:
+                nombre = getattr(solicitud, campo).name
+                if not nombre or es_por_contenido(nombre) or nombre in faltantes:
+                    continue
+                if nombre not in migrados:
+                    if not almacenamiento_documentos.exists(nombre):
+                        self.stderr.write(f"Solicitud {solicitud.pk}: no existe el archivo {nombre}.")
+                        faltantes.add(nombre)
+                        continue
+                    with almacenamiento_documentos.open(nombre, 'rb') as original:
+                        migrados[nombre] = almacenamiento_documentos.save(nombre, File(original))
+                    sin_usar[migrados[nombre]] += 1
+                cambios[campo] = migrados[nombre]
+            if not cambios:
+                continue
+            # update() no dispara las señales de Solicitud: las referencias se suman aquí.
+            with transaction.atomic():
+                Solicitud.objects.filter(pk=solicitud.pk).update(**cambios)
+                for nombre in cambios.values():
+                    if sin_usar[nombre]:
+                        sin_usar[nombre] -= 1
+                    else:
+                        DocumentoAlmacenado.incrementar(nombre)
+            actualizadas += 1
+            for campo, nombre in cambios.items():
+                setattr(solicitud, campo, nombre)
+                generar_rendiciones(getattr(solicitud, campo))
+
+        if options['eliminar_originales']:
+            for nombre in migrados:
+                for ruta in [nombre] + [ruta_rendicion(nombre, rendicion) for rendicion in RENDICIONES]:
+                    almacenamiento_documentos.delete(ruta)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(migrados)} archivos migrados a {len(set(migrados.values()))} documentos únicos "
+            f"({actualizadas} solicitudes actualizadas) en {time.perf_counter() - inicio:.2f}s."
+        ))
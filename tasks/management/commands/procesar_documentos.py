@@ -0,0 +1,58 @@
+# tasks/management/commands/procesar_documentos.py
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from ...models import TrabajoDocumento
+from ...utils.document_jobs import ejecutar_trabajo, tomar_trabajos
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker que procesa en segundo plano los documentos subidos (TrabajoDocumento): quita "
+        "los metadatos, corrige la orientación, reduce las fotos muy grandes y genera las "
+        "miniaturas, en varios procesos. Los trabajos que fallan se reintentan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Procesa los trabajos disponibles y termina.")
+        parser.add_argument('--intervalo', type=float, default=2.0, help="Segundos de espera cuando la cola está vacía.")
+        parser.add_argument(
+            '--procesos', type=int, default=os.cpu_count() or 1,
+            help="Procesos que procesan imágenes en paralelo (0: en este mismo proceso).",
+        )
+
+    def handle(self, *args, **options):
+        procesos = options['procesos']
+        pool = None
+        if procesos > 0:
+            # Los procesos hijos abren sus propias conexiones: no deben heredar las de este.
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=procesos, initializer=django.setup)
+
+        self.stdout.write("Worker de documentos iniciado.")
+        try:
+            while True:
+                trabajos = tomar_trabajos(max(procesos, 1))
+                if not trabajos:
+                    if options['once']:
+                        break
+                    time.sleep(options['intervalo'])
+                    continue
+
+                estatus = pool.map(ejecutar_trabajo, trabajos) if pool else map(ejecutar_trabajo, trabajos)
+                for trabajo_id, estatus_final in zip(trabajos, estatus):
+                    if estatus_final == TrabajoDocumento.ESTATUS_COMPLETADO:
+                        self.stdout.write(self.style.SUCCESS(f"Trabajo {trabajo_id}: completado"))
+                    else:
+                        self.stderr.write(f"Trabajo {trabajo_id}: {estatus_final}")
+        except KeyboardInterrupt:
+            self.stdout.write("Worker de documentos detenido.")
+        finally:
+            if pool:
+                pool.shutdown()
@@ -0,0 +1,38 @@
+# tasks/management/commands/procesar_reportes.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...utils.report_jobs import procesar_siguiente_trabajo
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker que genera en segundo plano los reportes Excel encolados "
+        "(TrabajoReporte) usando las estrategias de get_exporter()."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Procesa los trabajos pendientes y termina.")
+        parser.add_argument('--intervalo', type=float, default=2.0, help="Segundos de espera cuando la cola está vacía.")
+
+    def handle(self, *args, **options):
+        self.stdout.write("Worker de reportes iniciado.")
+        try:
+            while True:
+                trabajo = procesar_siguiente_trabajo()
+                if trabajo is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['intervalo'])
+                    continue
+
+                if trabajo.estatus == trabajo.ESTATUS_COMPLETADO:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"{trabajo}: {trabajo.filas_procesadas} filas -> {trabajo.archivo.name}"
+                    ))
+                else:
+                    self.stderr.write(f"{trabajo}: {trabajo.error}")
+        except KeyboardInterrupt:
+            self.stdout.write("Worker de reportes detenido.")
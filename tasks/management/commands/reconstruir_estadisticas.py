@@ -0,0 +1,22 @@
+# tasks/management/commands/reconstruir_estadisticas.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...models import EstadisticaSolicitud
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye (o carga por primera vez) la tabla de resumen EstadisticaSolicitud "
+        "a partir de todas las solicitudes existentes."
+    )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        filas = EstadisticaSolicitud.reconstruir()
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"Estadísticas reconstruidas: {filas} filas de resumen en {duracion:.2f}s."
+        ))
@@ -0,0 +1,22 @@
+# tasks/management/commands/reconstruir_indice_planteles.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...models import PlantelTermino
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye el índice de búsqueda de planteles (PlantelTermino). Necesario después "
+        "de cargar planteles en lote (bulk_create o importaciones), que no disparan post_save."
+    )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        terminos = PlantelTermino.reconstruir()
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"Índice de planteles reconstruido: {terminos} términos en {duracion:.2f}s."
+        ))
@@ -0,0 +1,133 @@
+# tasks/management/commands/stress_revision.py
+
+import random
+import threading
+import time
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.contrib.messages import constants
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, OperationalError
+from django.test import RequestFactory
+
+from ...models import Solicitud, EstatusBeca, TransicionSolicitud
+from ...views.admin_solicitud_views import gestionar_solicitud
+
+# Acciones que eligen los analistas simulados (rechazar con los datos del formulario).
+ACCIONES = ('aprobar', 'rechazar', 'asignar')
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga de la revisión concurrente: --hilos analistas gestionan al azar las "
+        "mismas --solicitudes con gestionar_solicitud, cada uno con la versión que vio al abrir "
+        "la solicitud. Al final revisa que no se perdió ningún cambio: cada cambio aceptado "
+        "quedó en el historial, encadenado con el anterior, y el estatus y la versión de cada "
+        "solicitud coinciden con él. Los datos sintéticos se confirman (los hilos usan sus "
+        "propias conexiones) y se borran al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solicitudes', type=int, default=10, help="Solicitudes que se revisan.")
+        parser.add_argument('--hilos', type=int, default=8, help="Analistas simultáneos.")
+        parser.add_argument('--acciones', type=int, default=50, help="Acciones de cada analista.")
+
+    def handle(self, *args, **options):
+        for codigo in (EstatusBeca.EN_PROCESO, EstatusBeca.APROBADA, EstatusBeca.RECHAZADA, EstatusBeca.ASIGNADA):
+            EstatusBeca.obtener(codigo, crear=True)
+        en_proceso = EstatusBeca.obtener(EstatusBeca.EN_PROCESO)
+        analistas = [
+            User.objects.create_superuser(f'stress_revision_{i}', 'stress@example.com', None)
+            for i in range(options['hilos'])
+        ]
+        solicitante = User.objects.create_user('stress_revision_solicitante', 'stress@example.com', None)
+        try:
+            ids = [Solicitud.objects.create(user=solicitante, estatus_beca=en_proceso).pk for _ in range(options['solicitudes'])]
+            resultados, aceptadas = self.revisar(ids, analistas, options['acciones'])
+            self.verificar(ids, en_proceso, aceptadas)
+        finally:
+            # Borra los datos sintéticos (el historial se borra con sus solicitudes).
+            Solicitud.objects.filter(user=solicitante).delete()
+            User.objects.filter(pk__in=[solicitante.pk, *(analista.pk for analista in analistas)]).delete()
+
+        self.stdout.write(
+            f"{sum(resultados.values())} acciones: {resultados['aceptada']} aceptadas, "
+            f"{resultados['conflicto']} rechazadas por conflicto de versión, {resultados['error']} con error."
+        )
+        if not resultados['aceptada'] or not resultados['conflicto']:
+            raise CommandError("La prueba no produjo cambios aceptados y conflictos a la vez; aumente --hilos o --acciones.")
+        self.stdout.write(self.style.SUCCESS("Ningún cambio se perdió."))
+
+    def revisar(self, ids, analistas, acciones):
+        """
+        Lanza un hilo por analista. Cada uno repite: abre una solicitud al azar (lee su
+        versión), espera un momento y envía una acción con esa versión. Retorna un Counter con
+        el resultado de las acciones y otro con las aceptadas por solicitud.
+        """
+        resultados = Counter()
+        aceptadas = Counter()
+        candado = threading.Lock()
+        factory = RequestFactory()
+
+        def analista(usuario):
+            try:
+                for _ in range(acciones):
+                    solicitud_id = random.choice(ids)
+                    accion = random.choice(ACCIONES)
+                    try:
+                        version = Solicitud.objects.filter(pk=solicitud_id).values_list('version', flat=True).get()
+                        time.sleep(random.uniform(0, 0.005))
+                        request = factory.post('/', {'version': version, 'motivo_select': 'Prueba de carga'})
+                        request.user = usuario
+                        request._messages = CookieStorage(request)
+                        gestionar_solicitud(request, solicitud_id, accion)
+                        niveles = {mensaje.level for mensaje in request._messages}
+                    except OperationalError:
+                        # SQLite: la base de datos estaba bloqueada por otro hilo.
+                        niveles = {constants.ERROR}
+                    if constants.ERROR in niveles:
+                        resultado = 'error'
+                    elif constants.WARNING in niveles:
+                        resultado = 'conflicto'
+                    else:
+                        resultado = 'aceptada'
+                    with candado:
+                        resultados[resultado] += 1
+                        if resultado == 'aceptada':
+                            aceptadas[solicitud_id] += 1
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=analista, args=(usuario,)) for usuario in analistas]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        return resultados, aceptadas
+
+    def verificar(self, ids, en_proceso, aceptadas):
+        """CommandError si el historial, el estatus o la versión de alguna solicitud no cuadra."""
+        transiciones = {}
+        for transicion in TransicionSolicitud.objects.filter(solicitud_id__in=ids).order_by('id'):
+            transiciones.setdefault(transicion.solicitud_id, []).append(transicion)
+        for solicitud in Solicitud.objects.filter(pk__in=ids):
+            historial = transiciones.get(solicitud.pk, [])
+            estatus = en_proceso.pk
+            for transicion in historial:
+                if transicion.estatus_anterior_id != estatus:
+                    raise CommandError(
+                        f"Solicitud #{solicitud.pk}: la transición #{transicion.pk} parte de un estatus que ya "
+                        "había cambiado (se perdió un cambio)."
+                    )
+                estatus = transicion.estatus_nuevo_id
+            if len(historial) != aceptadas[solicitud.pk]:
+                raise CommandError(
+                    f"Solicitud #{solicitud.pk}: {aceptadas[solicitud.pk]} cambios aceptados y {len(historial)} en el historial."
+                )
+            if solicitud.estatus_beca_id != estatus or solicitud.version != len(historial):
+                raise CommandError(
+                    f"Solicitud #{solicitud.pk}: estatus {solicitud.estatus_beca_id} y versión {solicitud.version}, "
+                    f"pero el historial termina en {estatus} tras {len(historial)} cambios."
+                )
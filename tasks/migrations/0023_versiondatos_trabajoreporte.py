@@ -0,0 +1,57 @@
+# Generated by Django 4.2.20 on 2026-10-17 18:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0022_solicitud_motivo_rechazo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionDatos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, unique=True, verbose_name='Modelo')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Versión')),
+                ('fecha_modificacion', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Última Modificación')),
+            ],
+            options={
+                'verbose_name': 'Versión de Datos',
+                'verbose_name_plural': 'Versiones de Datos',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrabajoReporte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_reporte', models.CharField(max_length=30, verbose_name='Tipo de Reporte')),
+                ('version_datos', models.CharField(max_length=255, verbose_name='Versión de los Datos')),
+                ('estatus', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completado', 'Completado'), ('fallido', 'Fallido')], default='pendiente', max_length=20, verbose_name='Estatus')),
+                ('filas_procesadas', models.PositiveIntegerField(default=0, verbose_name='Filas Procesadas')),
+                ('total_filas', models.PositiveIntegerField(blank=True, null=True, verbose_name='Total de Filas')),
+                ('archivo', models.FileField(blank=True, null=True, upload_to='reportes/', verbose_name='Archivo')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Inicio')),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Finalización')),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trabajos_reporte', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de Reporte',
+                'verbose_name_plural': 'Trabajos de Reportes',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estatus', 'fecha_creacion'], name='trabajo_reporte_cola_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='trabajoreporte',
+            constraint=models.UniqueConstraint(condition=models.Q(('estatus', 'fallido'), _negated=True), fields=('tipo_reporte', 'version_datos'), name='trabajo_reporte_unico_por_version'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.20 on 2026-10-17 18:55
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractYear, TruncDate
+
+
+def cargar_estadisticas(apps, schema_editor):
+    """Carga inicial de la tabla de resumen con las solicitudes existentes."""
+    Solicitud = apps.get_model('tasks', 'Solicitud')
+    EstadisticaSolicitud = apps.get_model('tasks', 'EstadisticaSolicitud')
+
+    agregados = Solicitud.objects.annotate(
+        dia=TruncDate('fecha_creacion'),
+        anio=ExtractYear('user__profile__fecha_nacimiento'),
+    ).values(
+        'dia', 'estatus_beca', 'beca', 'municipio', 'parroquia', 'user__profile__genero', 'anio'
+    ).annotate(cantidad=Count('id_solicitud')).order_by()
+
+    EstadisticaSolicitud.objects.bulk_create([
+        EstadisticaSolicitud(
+            fecha=item['dia'],
+            id_estatus=item['estatus_beca'] or 0,
+            id_beca=item['beca'] or 0,
+            id_municipio=item['municipio'] or 0,
+            id_parroquia=item['parroquia'] or 0,
+            genero=item['user__profile__genero'] or '',
+            anio_nacimiento=item['anio'] or 0,
+            total=item['cantidad'],
+        )
+        for item in agregados
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0023_versiondatos_trabajoreporte'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaSolicitud',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('id_estatus', models.IntegerField(default=0, verbose_name='ID Estatus')),
+                ('id_beca', models.IntegerField(default=0, verbose_name='ID Beca')),
+                ('id_municipio', models.IntegerField(default=0, verbose_name='ID Municipio')),
+                ('id_parroquia', models.IntegerField(default=0, verbose_name='ID Parroquia')),
+                ('genero', models.CharField(blank=True, default='', max_length=1, verbose_name='Género')),
+                ('anio_nacimiento', models.PositiveSmallIntegerField(default=0, verbose_name='Año de Nacimiento')),
+                ('total', models.IntegerField(default=0, verbose_name='Total de Solicitudes')),
+            ],
+            options={
+                'verbose_name': 'Estadística de Solicitudes',
+                'verbose_name_plural': 'Estadísticas de Solicitudes',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='estadisticasolicitud',
+            constraint=models.UniqueConstraint(fields=('fecha', 'id_estatus', 'id_beca', 'id_municipio', 'id_parroquia', 'genero', 'anio_nacimiento'), name='estadistica_solicitud_unica'),
+        ),
+        migrations.RunPython(cargar_estadisticas, migrations.RunPython.noop),
+    ]
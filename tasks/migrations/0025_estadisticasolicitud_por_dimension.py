@@ -0,0 +1,88 @@
+# Generated by Django 4.2.20 on 2026-10-17 19:40
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractYear, TruncDate
+
+
+def cargar_estadisticas(apps, schema_editor):
+    """Carga la tabla de resumen (una fila por período, filtros y dimensión) con las solicitudes existentes."""
+    Solicitud = apps.get_model('tasks', 'Solicitud')
+    EstadisticaSolicitud = apps.get_model('tasks', 'EstadisticaSolicitud')
+
+    agregados = Solicitud.objects.annotate(
+        dia=TruncDate('fecha_creacion'),
+        anio=ExtractYear('user__profile__fecha_nacimiento'),
+    ).values(
+        'dia', 'estatus_beca', 'beca', 'estado', 'municipio', 'parroquia', 'user__profile__genero', 'anio'
+    ).annotate(cantidad=Count('id_solicitud')).order_by()
+
+    totales = {}
+    for item in agregados.iterator():
+        # Valor de cada dimensión de gráfico (0 o '' = sin dato).
+        valores = {
+            'total': '',
+            'estatus': str(item['estatus_beca'] or 0),
+            'parroquia': str(item['parroquia'] or 0),
+            'genero': item['user__profile__genero'] or '',
+            'anio': str(item['anio'] or 0),
+        }
+        for periodo, fecha in (('D', item['dia']), ('M', item['dia'].replace(day=1))):
+            for dimension, valor in valores.items():
+                clave = (periodo, fecha, item['estado'] or 0, item['municipio'] or 0, item['beca'] or 0, dimension, valor)
+                totales[clave] = totales.get(clave, 0) + item['cantidad']
+
+    EstadisticaSolicitud.objects.bulk_create([
+        EstadisticaSolicitud(
+            periodo=periodo,
+            fecha=fecha,
+            id_estado=id_estado,
+            id_municipio=id_municipio,
+            id_beca=id_beca,
+            dimension=dimension,
+            valor=valor,
+            total=total,
+        )
+        for (periodo, fecha, id_estado, id_municipio, id_beca, dimension, valor), total in totales.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0024_estadisticasolicitud'),
+    ]
+
+    # La tabla solo contiene datos derivados: se vuelve a crear con la nueva forma y se recarga.
+    operations = [
+        migrations.DeleteModel(
+            name='EstadisticaSolicitud',
+        ),
+        migrations.CreateModel(
+            name='EstadisticaSolicitud',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.CharField(choices=[('D', 'Día'), ('M', 'Mes')], max_length=1, verbose_name='Período')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('id_estado', models.IntegerField(default=0, verbose_name='ID Estado')),
+                ('id_municipio', models.IntegerField(default=0, verbose_name='ID Municipio')),
+                ('id_beca', models.IntegerField(default=0, verbose_name='ID Beca')),
+                ('dimension', models.CharField(max_length=10, verbose_name='Dimensión')),
+                ('valor', models.CharField(blank=True, default='', max_length=20, verbose_name='Valor')),
+                ('total', models.IntegerField(default=0, verbose_name='Total de Solicitudes')),
+            ],
+            options={
+                'verbose_name': 'Estadística de Solicitudes',
+                'verbose_name_plural': 'Estadísticas de Solicitudes',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='estadisticasolicitud',
+            constraint=models.UniqueConstraint(fields=('dimension', 'periodo', 'fecha', 'id_estado', 'id_municipio', 'id_beca', 'valor'), name='estadistica_solicitud_unica'),
+        ),
+        migrations.AddIndex(
+            model_name='estadisticasolicitud',
+            index=models.Index(fields=['dimension', 'periodo', 'fecha', 'id_estado', 'id_municipio', 'id_beca', 'valor', 'total'], name='est_sol_dashboard_idx'),
+        ),
+        migrations.RunPython(cargar_estadisticas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.20 on 2026-10-17 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0025_estadisticasolicitud_por_dimension'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(fields=['estatus_beca', 'fecha_creacion', 'id_solicitud'], name='sol_estatus_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(fields=['user', 'fecha_creacion', 'id_solicitud'], name='sol_user_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=models.Index(fields=['fecha_creacion', 'id_solicitud'], name='sol_fecha_idx'),
+        ),
+    ]
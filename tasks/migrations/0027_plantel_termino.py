@@ -0,0 +1,44 @@
+# Generated by Django 4.2.20 on 2026-10-17 19:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from tasks.utils.texto import normalizar, palabras
+
+
+def indexar_planteles(apps, schema_editor):
+    """Genera los términos de búsqueda de los planteles existentes (ver PlantelTermino.terminos_de)."""
+    Plantel = apps.get_model('tasks', 'Plantel')
+    PlantelTermino = apps.get_model('tasks', 'PlantelTermino')
+
+    filas = []
+    for plantel in Plantel.objects.only('id', 'nombre_plantel', 'codigo_plantel').iterator():
+        terminos = palabras(plantel.nombre_plantel) + palabras(plantel.codigo_plantel)
+        if normalizar(plantel.codigo_plantel):
+            terminos.append(normalizar(plantel.codigo_plantel))
+        filas.extend(PlantelTermino(plantel_id=plantel.pk, termino=termino[:100]) for termino in set(terminos))
+    PlantelTermino.objects.bulk_create(filas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0026_solicitud_indices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlantelTermino',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(max_length=100, verbose_name='Término')),
+                ('plantel', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='terminos', to='tasks.plantel', verbose_name='Plantel')),
+            ],
+            options={
+                'verbose_name': 'Término de Plantel',
+                'verbose_name_plural': 'Términos de Planteles',
+                'indexes': [models.Index(fields=['termino', 'plantel'], name='plantel_termino_idx'), models.Index(fields=['plantel', 'termino'], name='plantel_termino_plantel_idx')],
+            },
+        ),
+        migrations.RunPython(indexar_planteles, migrations.RunPython.noop),
+    ]
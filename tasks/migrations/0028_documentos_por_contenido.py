@@ -0,0 +1,46 @@
+# Generated by Django 4.2.20 on 2026-10-17 20:03
+
+from django.db import migrations, models
+import tasks.utils.almacenamiento
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0027_plantel_termino'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoAlmacenado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=255, unique=True, verbose_name='Archivo')),
+                ('referencias', models.PositiveIntegerField(default=0, verbose_name='Referencias')),
+            ],
+            options={
+                'verbose_name': 'Documento Almacenado',
+                'verbose_name_plural': 'Documentos Almacenados',
+            },
+        ),
+        migrations.AlterField(
+            model_name='solicitud',
+            name='boletin',
+            field=models.ImageField(blank=True, null=True, storage=tasks.utils.almacenamiento.AlmacenamientoPorContenido(), upload_to='boletines/', verbose_name='Boletín (JPG)'),
+        ),
+        migrations.AlterField(
+            model_name='solicitud',
+            name='cedula',
+            field=models.ImageField(blank=True, null=True, storage=tasks.utils.almacenamiento.AlmacenamientoPorContenido(), upload_to='cedulas/', verbose_name='Cédula de Identidad (JPG)'),
+        ),
+        migrations.AlterField(
+            model_name='solicitud',
+            name='constancia_estudios',
+            field=models.ImageField(blank=True, null=True, storage=tasks.utils.almacenamiento.AlmacenamientoPorContenido(), upload_to='constancias/', verbose_name='Constancia de Estudios (JPG)'),
+        ),
+        migrations.AlterField(
+            model_name='solicitud',
+            name='constancia_numero_cuenta',
+            field=models.ImageField(blank=True, null=True, storage=tasks.utils.almacenamiento.AlmacenamientoPorContenido(), upload_to='constancias/', verbose_name='Constancia de Número de Cuenta (JPG)'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.20 on 2026-10-17 20:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0028_documentos_por_contenido'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoDocumento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('campo', models.CharField(max_length=30, verbose_name='Documento')),
+                ('estatus', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completado', 'Completado'), ('fallido', 'Fallido')], default='pendiente', max_length=20, verbose_name='Estatus')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_disponible', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Disponible desde')),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Inicio')),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Finalización')),
+                ('solicitud', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trabajos_documento', to='tasks.solicitud', verbose_name='Solicitud')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de Documento',
+                'verbose_name_plural': 'Trabajos de Documentos',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estatus', 'fecha_disponible'], name='trabajo_documento_cola_idx')],
+            },
+        ),
+    ]
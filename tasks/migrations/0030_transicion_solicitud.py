@@ -0,0 +1,35 @@
+# Generated by Django 4.2.20 on 2026-10-17 20:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0029_trabajo_documento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransicionSolicitud',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('motivo', models.TextField(blank=True, verbose_name='Motivo')),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transiciones_solicitud', to=settings.AUTH_USER_MODEL, verbose_name='Realizado por')),
+                ('estatus_anterior', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='tasks.estatusbeca', verbose_name='Estatus Anterior')),
+                ('estatus_nuevo', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='tasks.estatusbeca', verbose_name='Estatus Nuevo')),
+                ('solicitud', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='transiciones', to='tasks.solicitud', verbose_name='Solicitud')),
+            ],
+            options={
+                'verbose_name': 'Transición de Solicitud',
+                'verbose_name_plural': 'Transiciones de Solicitudes',
+                'ordering': ['fecha'],
+                'indexes': [models.Index(fields=['solicitud', 'fecha'], name='transicion_solicitud_idx'), models.Index(fields=['fecha', 'actor'], name='transicion_fecha_actor_idx')],
+            },
+        ),
+    ]
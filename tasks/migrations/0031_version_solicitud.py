@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-17 20:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0030_transicion_solicitud'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solicitud',
+            name='version',
+            field=models.PositiveIntegerField(default=0, verbose_name='Versión'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.20 on 2026-10-17 20:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0031_version_solicitud'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solicitud',
+            name='reservada_hasta',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Reservada hasta'),
+        ),
+        migrations.AddField(
+            model_name='solicitud',
+            name='revisor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='solicitudes_en_revision', to=settings.AUTH_USER_MODEL, verbose_name='Revisor'),
+        ),
+    ]
@@ -1,13 +1,20 @@
 # Importa la funcionalidad de modelos de Django.
-from django.db import models
+from django.db import models, transaction, IntegrityError, connection
 # Importa el modelo de usuario por defecto de Django para relaciones.
 from django.contrib.auth.models import User
+# Importa funciones de agregación y de fechas para las tablas de resumen.
+from django.db.models import Count, Exists, OuterRef
+from django.db.models.functions import TruncDate, ExtractYear
 # Importa utilidades de tiempo de Django.
 from django.utils import timezone
-# Importa la señal post_save, que se dispara después de guardar un objeto.
-from django.db.models.signals import post_save
+# Importa las señales pre/post_save y pre/post_delete, que se disparan antes/después de guardar o eliminar un objeto.
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
 # Importa el decorador receiver para conectar funciones a señales.
 from django.dispatch import receiver
+# Importa la normalización de textos (sin acentos, en minúsculas) usada por la búsqueda de planteles.
+from .utils.texto import normalizar, palabras
+# Importa el storage por contenido de los documentos subidos de las solicitudes.
+from .utils.almacenamiento import almacenamiento_documentos, es_por_contenido
 # Create your models here.
 
 # ----------------------------------------------------------------------
@@ -126,6 +133,125 @@ class Plantel(models.Model):
         verbose_name = "Plantel"
         verbose_name_plural = "Planteles"
 
+# ----------------------------------------------------------------------
+# Modelo PlantelTermino: Índice de búsqueda (autocompletado) de planteles.
+# Una fila por cada palabra normalizada (sin acentos, en minúsculas) del nombre del plantel
+# y por su código. Buscar un prefijo es un rango sobre el índice de 'termino', así que la
+# búsqueda no recorre la tabla de planteles.
+class PlantelTermino(models.Model):
+
+    # Máximo de filas del índice que se revisan por búsqueda (ver buscar()).
+    MAX_CANDIDATOS = 500
+
+    # Plantel al que pertenece el término (indexado junto al término, ver Meta.indexes).
+    plantel = models.ForeignKey(Plantel, on_delete=models.CASCADE, related_name='terminos', verbose_name="Plantel", db_index=False)
+    # Palabra normalizada del nombre, o el código del plantel normalizado.
+    termino = models.CharField(max_length=100, verbose_name="Término")
+
+    # Clase Meta: Configuración interna del modelo.
+    class Meta:
+        verbose_name = "Término de Plantel"
+        verbose_name_plural = "Términos de Planteles"
+        indexes = [
+            # Búsqueda por prefijo: rango sobre 'termino', ya ordenado, sin leer la tabla.
+            models.Index(fields=['termino', 'plantel'], name='plantel_termino_idx'),
+            # Comprobar las demás palabras de un plantel (y borrar sus términos) sin leer la tabla.
+            models.Index(fields=['plantel', 'termino'], name='plantel_termino_plantel_idx'),
+        ]
+
+    # Función __str__: Retorna el término y el plantel al que pertenece.
+    def __str__(self):
+        return f"{self.termino} -> {self.plantel_id}"
+
+    # Términos de un plantel: las palabras de su nombre, su código completo y las partes del código.
+    @staticmethod
+    def terminos_de(plantel):
+        terminos = palabras(plantel.nombre_plantel) + palabras(plantel.codigo_plantel)
+        codigo = normalizar(plantel.codigo_plantel)
+        if codigo:
+            terminos.append(codigo)
+        field = PlantelTermino._meta.get_field('termino')
+        return {termino[:field.max_length] for termino in terminos}
+
+    # Vuelve a generar los términos de un plantel (al crearlo o modificarlo).
+    @classmethod
+    def indexar(cls, plantel):
+        with transaction.atomic():
+            cls.objects.filter(plantel=plantel).delete()
+            cls.objects.bulk_create([cls(plantel=plantel, termino=termino) for termino in cls.terminos_de(plantel)])
+
+    # Como indexar(), para un lote de planteles ya guardados (importaciones con bulk_create /
+    # bulk_update, que no disparan post_save). Usar dentro de la transacción del lote.
+    @classmethod
+    def indexar_lote(cls, planteles):
+        cls.objects.filter(plantel_id__in=[plantel.pk for plantel in planteles]).delete()
+        cls._insertar((plantel.pk, termino) for plantel in planteles for termino in cls.terminos_de(plantel))
+
+    # Inserta filas (plantel_id, termino) con un INSERT por lote (executemany). Son cientos de
+    # miles de filas de dos columnas en una carga masiva: crear una instancia del modelo por
+    # fila (bulk_create) sería la mayor parte del tiempo de la importación.
+    @classmethod
+    def _insertar(cls, filas):
+        sql = 'INSERT INTO {} ({}, {}) VALUES (%s, %s)'.format(
+            connection.ops.quote_name(cls._meta.db_table),
+            connection.ops.quote_name(cls._meta.get_field('plantel').column),
+            connection.ops.quote_name(cls._meta.get_field('termino').column),
+        )
+        filas = list(filas)
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, filas)
+        return len(filas)
+
+    # Reconstruye el índice completo (p. ej. después de una carga masiva con bulk_create,
+    # que no dispara la señal post_save). Retorna la cantidad de términos.
+    @classmethod
+    def reconstruir(cls, batch_size=5000):
+        with transaction.atomic():
+            cls.objects.all().delete()
+            filas = 0
+            lote = []
+            for plantel in Plantel.objects.only('id', 'nombre_plantel', 'codigo_plantel').iterator(chunk_size=batch_size):
+                lote.extend((plantel.pk, termino) for termino in cls.terminos_de(plantel))
+                if len(lote) >= batch_size:
+                    filas += cls._insertar(lote)
+                    lote = []
+            filas += cls._insertar(lote)
+        return filas
+
+    # Rango del índice con los términos que empiezan por 'prefijo'.
+    @staticmethod
+    def _rango(prefijo):
+        return {'termino__gte': prefijo, 'termino__lt': prefijo + '\U0010ffff'}
+
+    # IDs de los planteles cuyo nombre o código tiene una palabra que empieza por cada palabra
+    # de 'texto' (sin importar acentos ni mayúsculas), en orden alfabético del término.
+    # 'permitidos' (conjunto de IDs, opcional) limita el resultado, p. ej. a un municipio.
+    @classmethod
+    def buscar(cls, texto, limite=20, permitidos=None):
+        buscadas = sorted(palabras(texto), key=len, reverse=True)
+        if not buscadas:
+            return []
+        # La palabra más larga recorre el índice en orden; las demás se comprueban por plantel.
+        principal, *resto = buscadas
+        consulta = cls.objects.filter(**cls._rango(principal))
+        if permitidos is not None:
+            consulta = consulta.filter(plantel_id__in=sorted(permitidos))
+        for palabra in resto:
+            consulta = consulta.filter(Exists(
+                cls.objects.filter(plantel_id=OuterRef('plantel_id'), **cls._rango(palabra))
+            ))
+        candidatos = consulta.order_by('termino', 'plantel').values_list('plantel_id', flat=True)
+
+        # Se leen los candidatos por tandas y se deja de leer (la BD deja de recorrer el
+        # índice) al completar el límite. Un plantel puede aparecer con varios términos.
+        encontrados = []
+        for plantel_id in candidatos[:cls.MAX_CANDIDATOS].iterator(chunk_size=limite * 2):
+            if plantel_id not in encontrados:
+                encontrados.append(plantel_id)
+                if len(encontrados) == limite:
+                    break
+        return encontrados
+
 # ----------------------------------------------------------------------
 # Modelo Estado: Catálogo de estados geográficos.
 class Estado(models.Model):
@@ -204,9 +330,27 @@ class Banco(models.Model):
     def __str__(self):
         return self.nombre
 
+# ----------------------------------------------------------------------
+# Registro en memoria de los estatus ({nombre: EstatusBeca}), cargado la primera vez
+# que se necesita y vaciado por las señales de EstatusBeca. None = sin cargar.
+_registro_estatus = None
+
 # ----------------------------------------------------------------------
 # Modelo EstatusBeca: Catálogo de posibles estatus para una solicitud de beca.
 class EstatusBeca(models.Model):
+
+    # Códigos estables de los estatus que usa la aplicación y su nombre en la BD.
+    EN_PROCESO = 'en_proceso'
+    APROBADA = 'aprobada'
+    RECHAZADA = 'rechazada'
+    ASIGNADA = 'asignada'
+    NOMBRES = {
+        EN_PROCESO: 'En proceso',
+        APROBADA: 'Aprobada',
+        RECHAZADA: 'Rechazada',
+        ASIGNADA: 'Asignada',
+    }
+
     # Nombre del estatus (ej. 'En proceso', 'Aprobada', 'Rechazada'), debe ser único.
     nombre = models.CharField(max_length=50, unique=True, verbose_name="Nombre del Estatus")
     # Descripción detallada del estatus, es opcional.
@@ -223,13 +367,87 @@ class EstatusBeca(models.Model):
     def __str__(self):
         return self.nombre
 
+    @classmethod
+    def _registro(cls):
+        """Estatus por nombre. Solo consulta la BD la primera vez después de cada cambio."""
+        global _registro_estatus
+        registro = _registro_estatus
+        if registro is None:
+            registro = {estatus.nombre: estatus for estatus in cls.objects.all()}
+            _registro_estatus = registro
+        return registro
+
+    @classmethod
+    def obtener(cls, codigo, crear=False):
+        """
+        Estatus con el código dado (EN_PROCESO, APROBADA, ...), sin consultar la BD si el
+        registro ya está cargado. Si no existe lo crea cuando 'crear' es True; si no,
+        lanza EstatusBeca.DoesNotExist.
+        """
+        nombre = cls.NOMBRES[codigo]
+        estatus = cls._registro().get(nombre)
+        if estatus is None:
+            if not crear:
+                raise cls.DoesNotExist(f'El EstatusBeca "{nombre}" no está definido en la BD.')
+            # La señal post_save vacía el registro, que se recarga en la próxima consulta.
+            estatus, created = cls.objects.get_or_create(nombre=nombre)
+        return estatus
+
+    @classmethod
+    def todos(cls):
+        """Todos los estatus de la BD, desde el registro en memoria."""
+        return list(cls._registro().values())
+
+    @staticmethod
+    def invalidar_registro():
+        """Vacía el registro en memoria; se vuelve a cargar en la próxima consulta."""
+        global _registro_estatus
+        _registro_estatus = None
+
+# ----------------------------------------------------------------------
+# Cuando cambia un EstatusBeca se vacía el registro, ahora y al confirmar la transacción
+# (para descartar lo que otro hilo haya cargado antes del commit).
+@receiver(post_save, sender=EstatusBeca)
+@receiver(post_delete, sender=EstatusBeca)
+def invalidar_registro_estatus(sender, **kwargs):
+    EstatusBeca.invalidar_registro()
+    transaction.on_commit(EstatusBeca.invalidar_registro)
+
 # ----------------------------------------------------------------------
 # Función auxiliar para obtener o crear el estatus 'En proceso' por defecto.
 def get_default_estatus_beca():
-    # Busca el estatus 'En proceso', si no existe, lo crea.
-    estatus_beca, created = EstatusBeca.objects.get_or_create(nombre='En proceso')
-    # Retorna la instancia del estatus.
-    return estatus_beca
+    # Toma el estatus 'En proceso' del registro en memoria (lo crea si no existe),
+    # así construir una Solicitud o un SolicitudForm no consulta la BD.
+    return EstatusBeca.obtener(EstatusBeca.EN_PROCESO, crear=True)
+
+# ----------------------------------------------------------------------
+# QuerySet de Solicitud: proyecciones con nombre para cada tipo de pantalla.
+# Cada una trae en la misma consulta (select_related) las relaciones que usa su plantilla,
+# así la cantidad de consultas no crece con la cantidad de solicitudes mostradas.
+class SolicitudQuerySet(models.QuerySet):
+    # Tarjetas de los listados de revisión (pendientes, aprobadas, rechazadas, asignación).
+    def for_review_list(self):
+        return self.select_related('user', 'beca', 'estatus_beca').only(
+            'id_solicitud', 'fecha_creacion',
+            'user__username', 'user__email',
+            'beca__nombre',
+            'estatus_beca__nombre',
+        )
+
+    # Detalle completo de una solicitud (administrador, analista o el propio solicitante).
+    def for_detail(self):
+        return self.select_related(
+            'user', 'beca', 'estatus_beca', 'banco', 'plantel',
+            'estado', 'municipio__estado', 'parroquia__municipio__estado',
+        )
+
+    # Solicitudes propias del usuario (panel "Tus Solicitudes" y actividad del usuario).
+    def for_user_dashboard(self):
+        return self.select_related('beca', 'estatus_beca').only(
+            'id_solicitud', 'fecha_creacion', 'user_id',
+            'beca__nombre',
+            'estatus_beca__nombre',
+        )
 
 # ----------------------------------------------------------------------
 # Modelo Solicitud: Almacena la información principal de la solicitud de beca.
@@ -251,11 +469,12 @@ class Solicitud(models.Model):
     # Fecha de creación de la solicitud, se establece automáticamente al crearse.
     fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
 
-    # Campos de tipo ImageField para subir los documentos requeridos.
-    constancia_estudios = models.ImageField(upload_to='constancias/', verbose_name="Constancia de Estudios (JPG)", null=True, blank=True)
-    constancia_numero_cuenta = models.ImageField(upload_to='constancias/', verbose_name="Constancia de Número de Cuenta (JPG)", null=True, blank=True)
-    boletin = models.ImageField(upload_to='boletines/', verbose_name="Boletín (JPG)", null=True, blank=True)
-    cedula = models.ImageField(upload_to='cedulas/', verbose_name="Cédula de Identidad (JPG)", null=True, blank=True)
+    # Campos de tipo ImageField para subir los documentos requeridos. Se guardan por contenido
+    # (ver utils/almacenamiento.py y DocumentoAlmacenado); upload_to queda para los archivos anteriores.
+    constancia_estudios = models.ImageField(upload_to='constancias/', storage=almacenamiento_documentos, verbose_name="Constancia de Estudios (JPG)", null=True, blank=True)
+    constancia_numero_cuenta = models.ImageField(upload_to='constancias/', storage=almacenamiento_documentos, verbose_name="Constancia de Número de Cuenta (JPG)", null=True, blank=True)
+    boletin = models.ImageField(upload_to='boletines/', storage=almacenamiento_documentos, verbose_name="Boletín (JPG)", null=True, blank=True)
+    cedula = models.ImageField(upload_to='cedulas/', storage=almacenamiento_documentos, verbose_name="Cédula de Identidad (JPG)", null=True, blank=True)
     # Número de cuenta bancaria del becario.
     numero_de_cuenta = models.CharField(max_length=50, verbose_name="Número de Cuenta Bancaria", null=True, blank=True)
 
@@ -284,6 +503,27 @@ class Solicitud(models.Model):
     telefono_becario = models.CharField(max_length=15, verbose_name="Teléfono del Becario", null=True, blank=True)
     direccion_residencial_becario = models.CharField(max_length=255, verbose_name="Dirección Residencial del Becario", null=True, blank=True)
     motivo_rechazo = models.TextField(verbose_name="Motivo de Rechazo", null=True, blank=True)
+    # Versión de la fila: aumenta con cada save() y con cada comando de revisión. Los comandos
+    # (views/commands.py) solo cambian la solicitud si sigue en la versión que vio el analista.
+    version = models.PositiveIntegerField(default=0, verbose_name="Versión")
+    # Reserva de la cola de revisión (ver utils/cola_revision.py): analista que tiene la
+    # solicitud para revisarla y hasta cuándo. Vencida la reserva, otro analista puede tomarla.
+    revisor = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='solicitudes_en_revision', verbose_name="Revisor", null=True, blank=True)
+    reservada_hasta = models.DateTimeField(verbose_name="Reservada hasta", null=True, blank=True)
+
+    # Documentos subidos (ImageField) de la solicitud.
+    CAMPOS_DOCUMENTOS = ('constancia_estudios', 'constancia_numero_cuenta', 'boletin', 'cedula')
+
+    # Manager con las proyecciones de SolicitudQuerySet.
+    objects = SolicitudQuerySet.as_manager()
+
+    # Función save: Al guardar cambios de una solicitud existente aumenta su versión.
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
 
     # Función __str__: Retorna una descripción de la solicitud (usuario y beca solicitada).
     def __str__(self):
@@ -295,6 +535,126 @@ class Solicitud(models.Model):
     class Meta:
         verbose_name = "Solicitud"
         verbose_name_plural = "Solicitudes"
+        # Índices de las consultas más frecuentes (ver QueryPlanTests en tests.py):
+        # - listados de revisión por estatus, de la más reciente a la más antigua;
+        # - solicitudes de un usuario (tasks, get_user_activity), también por fecha;
+        # - rangos de fecha de creación (usar límites datetime: __date no usa índices en SQLite).
+        # id_solicitud desempata las fechas iguales, así el orden no necesita un ordenamiento extra.
+        indexes = [
+            models.Index(fields=['estatus_beca', 'fecha_creacion', 'id_solicitud'], name='sol_estatus_fecha_idx'),
+            models.Index(fields=['user', 'fecha_creacion', 'id_solicitud'], name='sol_user_fecha_idx'),
+            models.Index(fields=['fecha_creacion', 'id_solicitud'], name='sol_fecha_idx'),
+        ]
+
+# ----------------------------------------------------------------------
+# Modelo DocumentoAlmacenado: Cuántas referencias (campos de solicitudes) tiene cada archivo
+# guardado por contenido (ver utils/almacenamiento.py). Varias solicitudes pueden compartir
+# el mismo archivo; se elimina del disco cuando ya ninguna lo usa. El storage toma la
+# referencia de cada archivo que guarda antes de buscar si ya existía, así el borrado de la
+# última referencia anterior (eliminar_si_no_se_usa) no puede quitárselo a una subida en curso.
+class DocumentoAlmacenado(models.Model):
+    # Ruta del archivo en el storage ('documentos/ab/cd/<sha256>.jpg').
+    nombre = models.CharField(max_length=255, unique=True, verbose_name="Archivo")
+    # Cantidad de campos de solicitudes que apuntan al archivo.
+    referencias = models.PositiveIntegerField(default=0, verbose_name="Referencias")
+
+    # Clase Meta: Configuración interna del modelo.
+    class Meta:
+        verbose_name = "Documento Almacenado"
+        verbose_name_plural = "Documentos Almacenados"
+
+    # Función __str__: Retorna el archivo y sus referencias.
+    def __str__(self):
+        return f"{self.nombre} ({self.referencias})"
+
+    # Suma una referencia al archivo con un UPDATE atómico (crea el registro si no existe).
+    @classmethod
+    def incrementar(cls, nombre):
+        if not cls.objects.filter(nombre=nombre).update(referencias=models.F('referencias') + 1):
+            documento, created = cls.objects.get_or_create(nombre=nombre, defaults={'referencias': 1})
+            if not created:
+                cls.objects.filter(nombre=nombre).update(referencias=models.F('referencias') + 1)
+
+    # Resta una referencia al archivo; si queda sin referencias, lo elimina del storage
+    # (junto con sus miniaturas) al confirmar la transacción.
+    @classmethod
+    def decrementar(cls, nombre):
+        cls.objects.filter(nombre=nombre, referencias__gt=0).update(referencias=models.F('referencias') - 1)
+        if cls.objects.filter(nombre=nombre, referencias=0).delete()[0]:
+            transaction.on_commit(lambda: cls.eliminar_si_no_se_usa(nombre))
+
+    # Elimina del storage el archivo (y sus miniaturas) si ninguna solicitud lo referencia.
+    # Se decide con el registro del archivo bloqueado (o recién creado con 0 referencias): una
+    # subida del mismo contenido que tomó su referencia sin confirmarla aún hace esperar este
+    # borrado hasta que confirme, y una que llegue después espera a que termine el borrado
+    # (y vuelve a escribir el archivo).
+    @classmethod
+    def eliminar_si_no_se_usa(cls, nombre):
+        from .utils.miniaturas import RENDICIONES, ruta_rendicion
+        with transaction.atomic():
+            # Primero una escritura: toma el bloqueo (la fila en PostgreSQL, la base en SQLite).
+            if not cls.objects.filter(nombre=nombre).update(referencias=models.F('referencias')):
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(nombre=nombre, referencias=0)
+                except IntegrityError:
+                    # Otra subida del mismo contenido acaba de registrarlo.
+                    return
+            if cls.objects.get(nombre=nombre).referencias:
+                return
+            for ruta in [nombre] + [ruta_rendicion(nombre, rendicion) for rendicion in RENDICIONES]:
+                almacenamiento_documentos.delete(ruta)
+            cls.objects.filter(nombre=nombre, referencias=0).delete()
+
+    # Ajusta las referencias de un cambio de documentos {campo: nombre} (vacío = sin archivo).
+    # Solo se cuentan los archivos guardados por contenido; los anteriores no se tocan. Los
+    # campos de 'referenciados' traen un archivo recién guardado por el storage, que ya tomó
+    # su referencia: no se vuelve a sumar (y se suelta si el campo no cambió).
+    @classmethod
+    def actualizar_referencias(cls, anteriores, nuevos, referenciados=()):
+        for campo in Solicitud.CAMPOS_DOCUMENTOS:
+            anterior, nuevo = anteriores.get(campo) or '', nuevos.get(campo) or ''
+            if anterior == nuevo:
+                if campo in referenciados and es_por_contenido(nuevo):
+                    cls.decrementar(nuevo)
+                continue
+            if es_por_contenido(nuevo) and campo not in referenciados:
+                cls.incrementar(nuevo)
+            if es_por_contenido(anterior):
+                cls.decrementar(anterior)
+
+# Documentos {campo: nombre} de una solicitud.
+def documentos_de(solicitud):
+    return {campo: getattr(solicitud, campo).name for campo in Solicitud.CAMPOS_DOCUMENTOS}
+
+# ----------------------------------------------------------------------
+# Receptores de señal que mantienen las referencias de DocumentoAlmacenado.
+
+# Antes de guardar una Solicitud: recuerda sus documentos actuales en la BD y los campos con
+# un archivo recién subido (el storage toma su referencia al guardarlo).
+@receiver(pre_save, sender=Solicitud)
+def documentos_solicitud_pre_save(sender, instance, **kwargs):
+    instance._documentos_subidos = {
+        campo for campo in Solicitud.CAMPOS_DOCUMENTOS
+        if getattr(instance, campo) and not getattr(instance, campo)._committed
+    }
+    instance._documentos_anteriores = {}
+    if instance.pk:
+        anteriores = Solicitud.objects.filter(pk=instance.pk).values(*Solicitud.CAMPOS_DOCUMENTOS).first()
+        instance._documentos_anteriores = anteriores or {}
+
+# Después de guardar una Solicitud (los archivos nuevos ya tienen su nombre definitivo).
+@receiver(post_save, sender=Solicitud)
+def documentos_solicitud_post_save(sender, instance, **kwargs):
+    DocumentoAlmacenado.actualizar_referencias(
+        getattr(instance, '_documentos_anteriores', {}), documentos_de(instance), getattr(instance, '_documentos_subidos', ()),
+    )
+    instance._documentos_subidos = set()
+
+# Después de eliminar una Solicitud (también en cascada): suelta sus documentos.
+@receiver(post_delete, sender=Solicitud)
+def documentos_solicitud_post_delete(sender, instance, **kwargs):
+    DocumentoAlmacenado.actualizar_referencias(documentos_de(instance), {})
 
 # ----------------------------------------------------------------------
 # Modelo Profile: Extensión del modelo User de Django para almacenar datos adicionales del usuario.
@@ -351,8 +711,518 @@ def create_user_profile(sender, instance, created, **kwargs):
 # Se conecta a la señal post_save del modelo User.
 @receiver(post_save, sender=User)
 # Se ejecuta CADA VEZ que se guarda un objeto User.
-def save_user_profile(sender, instance, **kwargs):
+def save_user_profile(sender, instance, update_fields=None, **kwargs):
+    # Al iniciar sesión solo se guarda last_login, que no está en el perfil ni en los reportes:
+    # no se vuelve a guardar el Profile (así iniciar sesión no cambia VersionDatos['profile']).
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
     # Condición: Verifica si la instancia de User tiene un objeto Profile asociado.
     if hasattr(instance, 'profile'):
         # Si tiene un Profile, lo guarda (actualizando los datos del perfil).
-        instance.profile.save()
\ No newline at end of file
+        instance.profile.save()
+# ----------------------------------------------------------------------
+# Modelo VersionDatos: Contador de cambios por modelo.
+# Sirve como "huella" barata de los datos: cada vez que se guarda o elimina un registro
+# de un modelo monitoreado, su contador aumenta en uno.
+class VersionDatos(models.Model):
+    # Nombre del modelo monitoreado (ej. 'solicitud', 'profile').
+    nombre = models.CharField(max_length=50, unique=True, verbose_name="Modelo")
+    # Contador de cambios.
+    version = models.PositiveBigIntegerField(default=0, verbose_name="Versión")
+    # Fecha del último cambio registrado.
+    fecha_modificacion = models.DateTimeField(default=timezone.now, verbose_name="Última Modificación")
+
+    # Clase Meta: Configuración interna del modelo.
+    class Meta:
+        verbose_name = "Versión de Datos"
+        verbose_name_plural = "Versiones de Datos"
+
+    # Función __str__: Retorna el modelo y su versión actual.
+    def __str__(self):
+        return f"{self.nombre} (v{self.version})"
+
+    # Incrementa el contador del modelo indicado con un UPDATE atómico (crea el registro si no existe).
+    @classmethod
+    def incrementar(cls, nombre):
+        actualizados = cls.objects.filter(nombre=nombre).update(
+            version=models.F('version') + 1,
+            fecha_modificacion=timezone.now()
+        )
+        if not actualizados:
+            version_datos, created = cls.objects.get_or_create(nombre=nombre, defaults={'version': 1})
+            if not created:
+                cls.objects.filter(nombre=nombre).update(version=models.F('version') + 1, fecha_modificacion=timezone.now())
+
+    # Retorna un diccionario {nombre: (version, fecha_modificacion)} para los modelos indicados.
+    @classmethod
+    def obtener(cls, nombres):
+        versiones = {nombre: (0, None) for nombre in nombres}
+        for nombre, version, fecha in cls.objects.filter(nombre__in=nombres).values_list('nombre', 'version', 'fecha_modificacion'):
+            versiones[nombre] = (version, fecha)
+        return versiones
+
+# ----------------------------------------------------------------------
+# Función registrar_cambio_datos: Receptor de señal (Signal Receiver).
+# Se conecta a post_save y post_delete de los modelos usados en los reportes
+# e incrementa su contador en VersionDatos.
+@receiver(post_save, sender=Solicitud)
+@receiver(post_delete, sender=Solicitud)
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+@receiver(post_save, sender=Becas)
+@receiver(post_delete, sender=Becas)
+@receiver(post_save, sender=Plantel)
+@receiver(post_delete, sender=Plantel)
+@receiver(post_save, sender=EstatusBeca)
+@receiver(post_delete, sender=EstatusBeca)
+def registrar_cambio_datos(sender, **kwargs):
+    VersionDatos.incrementar(sender._meta.model_name)
+
+# ----------------------------------------------------------------------
+# Al guardar un Plantel se regeneran sus términos de búsqueda (al eliminarlo se borran en cascada).
+@receiver(post_save, sender=Plantel)
+def indexar_plantel(sender, instance, **kwargs):
+    PlantelTermino.indexar(instance)
+
+# ----------------------------------------------------------------------
+# Modelo TrabajoReporte: Cola persistente de reportes Excel generados en segundo plano.
+class TrabajoReporte(models.Model):
+
+    # Estatus posibles del trabajo.
+    ESTATUS_PENDIENTE = 'pendiente'
+    ESTATUS_EN_PROCESO = 'en_proceso'
+    ESTATUS_COMPLETADO = 'completado'
+    ESTATUS_FALLIDO = 'fallido'
+    ESTATUS_CHOICES = [
+        (ESTATUS_PENDIENTE, 'Pendiente'),
+        (ESTATUS_EN_PROCESO, 'En proceso'),
+        (ESTATUS_COMPLETADO, 'Completado'),
+        (ESTATUS_FALLIDO, 'Fallido'),
+    ]
+
+    # Tipo de reporte (clave de STRATEGY_MAP: 'profiles', 'becas', 'planteles', 'solicitudes').
+    tipo_reporte = models.CharField(max_length=30, verbose_name="Tipo de Reporte")
+    # Versión de los datos con la que se solicitó el reporte (ver VersionDatos).
+    version_datos = models.CharField(max_length=255, verbose_name="Versión de los Datos")
+    # Estatus actual del trabajo.
+    estatus = models.CharField(max_length=20, choices=ESTATUS_CHOICES, default=ESTATUS_PENDIENTE, verbose_name="Estatus")
+    # Avance del trabajo.
+    filas_procesadas = models.PositiveIntegerField(default=0, verbose_name="Filas Procesadas")
+    total_filas = models.PositiveIntegerField(null=True, blank=True, verbose_name="Total de Filas")
+    # Archivo generado, guardado dentro de MEDIA_ROOT.
+    archivo = models.FileField(upload_to='reportes/', null=True, blank=True, verbose_name="Archivo")
+    # Mensaje de error si el trabajo falló.
+    error = models.TextField(blank=True, verbose_name="Error")
+    # Usuario que solicitó el reporte.
+    solicitado_por = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='trabajos_reporte', verbose_name="Solicitado por", null=True, blank=True)
+    # Fechas del ciclo de vida del trabajo.
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    fecha_inicio = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Inicio")
+    fecha_fin = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Finalización")
+
+    # Clase Meta: Configuración interna del modelo.
+    class Meta:
+        verbose_name = "Trabajo de Reporte"
+        verbose_name_plural = "Trabajos de Reportes"
+        ordering = ['-fecha_creacion']
+        constraints = [
+            # Un solo trabajo vigente (no fallido) por tipo de reporte y versión de datos:
+            # las solicitudes duplicadas se unen al trabajo existente.
+            models.UniqueConstraint(
+                fields=['tipo_reporte', 'version_datos'],
+                condition=~models.Q(estatus='fallido'),
+                name='trabajo_reporte_unico_por_version',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['estatus', 'fecha_creacion'], name='trabajo_reporte_cola_idx'),
+        ]
+
+    # Función __str__: Retorna el tipo de reporte y su estatus.
+    def __str__(self):
+        return f"Reporte {self.tipo_reporte} #{self.pk} ({self.get_estatus_display()})"
+
+    # Porcentaje de avance (0-100).
+    @property
+    def progreso(self):
+        if self.estatus == self.ESTATUS_COMPLETADO:
+            return 100
+        if not self.total_filas:
+            return 0
+        return min(99, int(self.filas_procesadas * 100 / self.total_filas))
+
+# ----------------------------------------------------------------------
+# Modelo TrabajoDocumento: Cola persistente del procesamiento de los documentos subidos
+# (quitar metadatos EXIF, corregir la orientación, reducir fotos muy grandes y generar las
+# miniaturas), que un worker hace en segundo plano (ver utils/document_jobs.py).
+class TrabajoDocumento(models.Model):
+
+    # Estatus posibles del trabajo.
+    ESTATUS_PENDIENTE = 'pendiente'
+    ESTATUS_EN_PROCESO = 'en_proceso'
+    ESTATUS_COMPLETADO = 'completado'
+    ESTATUS_FALLIDO = 'fallido'
+    ESTATUS_CHOICES = [
+        (ESTATUS_PENDIENTE, 'Pendiente'),
+        (ESTATUS_EN_PROCESO, 'En proceso'),
+        (ESTATUS_COMPLETADO, 'Completado'),
+        (ESTATUS_FALLIDO, 'Fallido'),
+    ]
+
+    # Intentos antes de marcar el trabajo como fallido.
+    MAX_INTENTOS = 3
+
+    # Solicitud y campo (ImageField) del documento a procesar.
+    solicitud = models.ForeignKey(Solicitud, on_delete=models.CASCADE, related_name='trabajos_documento', verbose_name="Solicitud")
+    campo = models.CharField(max_length=30, verbose_name="Documento")
+    # Estatus actual del trabajo.
+    estatus = models.CharField(max_length=20, choices=ESTATUS_CHOICES, default=ESTATUS_PENDIENTE, verbose_name="Estatus")
+    # Veces que un worker tomó el trabajo.
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    # Mensaje del último error.
+    error = models.TextField(blank=True, verbose_name="Error")
+    # Fechas del ciclo de vida del trabajo. Un trabajo pendiente no se toma antes de
+    # 'fecha_disponible' (los reintentos esperan cada vez más).
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    fecha_disponible = models.DateTimeField(default=timezone.now, verbose_name="Disponible desde")
+    fecha_inicio = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Inicio")
+    fecha_fin = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Finalización")
+
+    # Clase Meta: Configuración interna del modelo.
+    class Meta:
+        verbose_name = "Trabajo de Documento"
+        verbose_name_plural = "Trabajos de Documentos"
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estatus', 'fecha_disponible'], name='trabajo_documento_cola_idx'),
+        ]
+
+    # Función __str__: Retorna el documento y su estatus.
+    def __str__(self):
+        return f"Documento {self.campo} de la solicitud {self.solicitud_id} #{self.pk} ({self.get_estatus_display()})"
+
+# ----------------------------------------------------------------------
+# Modelo TransicionSolicitud: Historial de cambios de estatus de las solicitudes.
+# Cada comando de views/commands.py (uno a uno o por lote) agrega una fila por solicitud que
+# cambia: de qué estatus a cuál, quién lo hizo, cuándo y con qué motivo. Las filas no se
+# modifican ni se eliminan (solo al eliminar la solicitud); sirven para medir, por ejemplo,
+# el tiempo hasta la decisión o las solicitudes gestionadas por analista y día.
+class TransicionSolicitud(models.Model):
+    # Solicitud que cambió de estatus (sin índice propio: transicion_solicitud_idx empieza por ella).
+    solicitud = models.ForeignKey(Solicitud, on_delete=models.CASCADE, db_index=False, related_name='transiciones', verbose_name="Solicitud")
+    # Estatus antes y después del cambio.
+    estatus_anterior = models.ForeignKey(EstatusBeca, on_delete=models.PROTECT, null=True, blank=True, related_name='+', verbose_name="Estatus Anterior")
+    estatus_nuevo = models.ForeignKey(EstatusBeca, on_delete=models.PROTECT, related_name='+', verbose_name="Estatus Nuevo")
+    # Usuario (administrador o analista) que hizo el cambio.
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='transiciones_solicitud', verbose_name="Realizado por")
+    # Fecha y hora del cambio.
+    fecha = models.DateTimeField(default=timezone.now, verbose_name="Fecha")
+    # Motivo del cambio (ej. el motivo de rechazo).
+    motivo = models.TextField(blank=True, verbose_name="Motivo")
+
+    # Clase Meta: Configuración interna del modelo.
+    class Meta:
+        verbose_name = "Transición de Solicitud"
+        verbose_name_plural = "Transiciones de Solicitudes"
+        ordering = ['fecha']
+        # Historial de una solicitud (en orden), y transiciones por analista en un rango de
+        # fechas (ver por_analista_y_dia), que se leen del índice sin visitar la tabla.
+        indexes = [
+            models.Index(fields=['solicitud', 'fecha'], name='transicion_solicitud_idx'),
+            models.Index(fields=['fecha', 'actor'], name='transicion_fecha_actor_idx'),
+        ]
+
+    # Función __str__: Retorna la solicitud y el cambio de estatus.
+    def __str__(self):
+        return f"Solicitud {self.solicitud_id}: {self.estatus_anterior_id} -> {self.estatus_nuevo_id} ({self.fecha:%Y-%m-%d %H:%M})"
+
+    # El historial solo se agrega: una transición guardada no se vuelve a modificar.
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Las transiciones de solicitud no se pueden modificar.")
+        super().save(*args, **kwargs)
+
+    # Retorna [{'dia', 'actor_id', 'total'}, ...]: transiciones por día y analista entre las
+    # fechas 'desde' (incluida) y 'hasta' (excluida).
+    @classmethod
+    def por_analista_y_dia(cls, desde, hasta):
+        return list(
+            cls.objects.filter(fecha__gte=desde, fecha__lt=hasta)
+            .annotate(dia=TruncDate('fecha'))
+            .values('dia', 'actor_id')
+            .annotate(total=Count('id'))
+            .order_by('dia', 'actor_id')
+        )
+
+# ----------------------------------------------------------------------
+# Modelo EstadisticaSolicitud: Tabla de resumen (rollup) de solicitudes para el dashboard.
+# Cada fila acumula cuántas solicitudes existen para un período (día o mes), los filtros
+# del dashboard (estado, municipio, beca) y el valor de UNA dimensión de gráfico:
+#   - 'total':     sin dimensión (gráficos por fecha, becas y municipios).
+#   - 'estatus':   ID del estatus.
+#   - 'parroquia': ID de la parroquia.
+#   - 'genero':    género del solicitante.
+#   - 'anio':      año de nacimiento del solicitante.
+# Guardar una dimensión por fila (y no todas las combinaciones) mantiene la tabla pequeña
+# aunque haya cientos de miles de solicitudes; las filas por mes permiten que un rango de
+# fechas largo lea los meses completos y solo los días sueltos de los extremos.
+# Se mantiene incrementalmente con las señales de Solicitud/Profile y se puede
+# reconstruir con el comando 'reconstruir_estadisticas'.
+# Los valores se guardan sin NULL (0 o '' = sin dato) para que la restricción única
+# funcione y cada combinación tenga una sola fila.
+# Se guarda el año de nacimiento (no el rango de edad) porque la edad cambia con el
+# tiempo; el rango se calcula al leer (año actual - año de nacimiento).
+class EstadisticaSolicitud(models.Model):
+    PERIODO_DIA = 'D'
+    PERIODO_MES = 'M'
+    PERIODO_CHOICES = [
+        (PERIODO_DIA, 'Día'),
+        (PERIODO_MES, 'Mes'),
+    ]
+    # Dimensiones de gráfico y la clave de dimensiones() de donde sale su valor.
+    DIMENSIONES = {
+        'total': None,
+        'estatus': 'id_estatus',
+        'parroquia': 'id_parroquia',
+        'genero': 'genero',
+        'anio': 'anio_nacimiento',
+    }
+
+    # Granularidad de la fila: día o mes.
+    periodo = models.CharField(max_length=1, choices=PERIODO_CHOICES, verbose_name="Período")
+    # Fecha (local) de creación de las solicitudes; para los meses, el primer día del mes.
+    fecha = models.DateField(verbose_name="Fecha")
+    # Filtros del dashboard (IDs de catálogos, 0 = sin dato).
+    id_estado = models.IntegerField(default=0, verbose_name="ID Estado")
+    id_municipio = models.IntegerField(default=0, verbose_name="ID Municipio")
+    id_beca = models.IntegerField(default=0, verbose_name="ID Beca")
+    # Dimensión de gráfico y su valor (ID de catálogo, género o año como texto).
+    dimension = models.CharField(max_length=10, verbose_name="Dimensión")
+    valor = models.CharField(max_length=20, default='', blank=True, verbose_name="Valor")
+    # Cantidad de solicitudes en esta combinación.
+    total = models.IntegerField(default=0, verbose_name="Total de Solicitudes")
+
+    # Clase Meta: Configuración interna del modelo.
+    class Meta:
+        verbose_name = "Estadística de Solicitudes"
+        verbose_name_plural = "Estadísticas de Solicitudes"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dimension', 'periodo', 'fecha', 'id_estado', 'id_municipio', 'id_beca', 'valor'],
+                name='estadistica_solicitud_unica',
+            ),
+        ]
+        # Índice de cobertura para las lecturas del dashboard: cada gráfico filtra por su
+        # dimensión, el período y el rango de fechas; estado, municipio, beca, valor y total
+        # se leen del mismo índice, sin visitar la tabla.
+        indexes = [
+            models.Index(
+                fields=['dimension', 'periodo', 'fecha', 'id_estado', 'id_municipio', 'id_beca', 'valor', 'total'],
+                name='est_sol_dashboard_idx',
+            ),
+        ]
+
+    # Función __str__: Retorna la fecha, la dimensión y el total acumulado.
+    def __str__(self):
+        return f"{self.fecha} ({self.dimension}={self.valor}): {self.total} solicitudes"
+
+    # Columnas de Solicitud de las que salen las dimensiones (ver _dimensiones_de_fila).
+    CAMPOS_DIMENSIONES = (
+        'fecha_creacion', 'estatus_beca_id', 'beca_id', 'estado_id', 'municipio_id', 'parroquia_id',
+        'user__profile__genero', 'user__profile__fecha_nacimiento',
+    )
+
+    # Retorna las dimensiones actuales (en la BD) de una solicitud, o None si no existe.
+    @classmethod
+    def dimensiones(cls, id_solicitud):
+        fila = Solicitud.objects.filter(id_solicitud=id_solicitud).values_list(*cls.CAMPOS_DIMENSIONES).first()
+        if fila is None:
+            return None
+        return cls._dimensiones_de_fila(fila)
+
+    # Retorna {id_solicitud: dimensiones} de varias solicitudes, con una sola consulta
+    # (las que no existen no aparecen).
+    @classmethod
+    def dimensiones_lote(cls, ids):
+        filas = Solicitud.objects.filter(id_solicitud__in=ids).order_by().values_list('id_solicitud', *cls.CAMPOS_DIMENSIONES)
+        return {fila[0]: cls._dimensiones_de_fila(fila[1:]) for fila in filas}
+
+    # Dimensiones de una fila con los valores de CAMPOS_DIMENSIONES.
+    @staticmethod
+    def _dimensiones_de_fila(fila):
+        fecha_creacion, id_estatus, id_beca, id_estado, id_municipio, id_parroquia, genero, fecha_nacimiento = fila
+        return {
+            'fecha': timezone.localdate(fecha_creacion),
+            'id_estatus': id_estatus or 0,
+            'id_beca': id_beca or 0,
+            'id_estado': id_estado or 0,
+            'id_municipio': id_municipio or 0,
+            'id_parroquia': id_parroquia or 0,
+            'genero': genero or '',
+            'anio_nacimiento': fecha_nacimiento.year if fecha_nacimiento else 0,
+        }
+
+    # Retorna las claves de las filas de resumen a las que suma una solicitud con esas
+    # dimensiones: una por período y dimensión de gráfico.
+    @classmethod
+    def claves(cls, dimensiones):
+        if not dimensiones:
+            return []
+        fecha = dimensiones['fecha']
+        filtros = {
+            'id_estado': dimensiones['id_estado'],
+            'id_municipio': dimensiones['id_municipio'],
+            'id_beca': dimensiones['id_beca'],
+        }
+        return [
+            dict(
+                filtros,
+                periodo=periodo,
+                fecha=fecha if periodo == cls.PERIODO_DIA else fecha.replace(day=1),
+                dimension=dimension,
+                valor=str(dimensiones[campo]) if campo else '',
+            )
+            for periodo in (cls.PERIODO_DIA, cls.PERIODO_MES)
+            for dimension, campo in cls.DIMENSIONES.items()
+        ]
+
+    # Suma 'delta' (+1 / -1) al total de una fila de resumen, creándola si hace falta.
+    @classmethod
+    def _sumar(cls, clave, delta):
+        actualizados = cls.objects.filter(**clave).update(total=models.F('total') + delta)
+        if actualizados or delta < 0:
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(total=delta, **clave)
+        except IntegrityError:
+            # Otra transacción creó la fila al mismo tiempo.
+            cls.objects.filter(**clave).update(total=models.F('total') + delta)
+
+    # Suma 'delta' (+1 / -1) a todas las filas de resumen de esas dimensiones.
+    @classmethod
+    def aplicar(cls, dimensiones, delta):
+        if not dimensiones or not delta:
+            return
+        for clave in cls.claves(dimensiones):
+            cls._sumar(clave, delta)
+
+    # Reconstruye toda la tabla a partir de las solicitudes (una sola consulta agregada,
+    # repartida en Python entre las filas de resumen). Retorna la cantidad de filas creadas.
+    @classmethod
+    def reconstruir(cls):
+        agregados = Solicitud.objects.annotate(
+            dia=TruncDate('fecha_creacion'),
+            anio=ExtractYear('user__profile__fecha_nacimiento'),
+        ).values(
+            'dia', 'estatus_beca', 'beca', 'estado', 'municipio', 'parroquia', 'user__profile__genero', 'anio'
+        ).annotate(cantidad=Count('id_solicitud')).order_by()
+
+        totales = {}
+        for item in agregados.iterator():
+            dimensiones = {
+                'fecha': item['dia'],
+                'id_estatus': item['estatus_beca'] or 0,
+                'id_beca': item['beca'] or 0,
+                'id_estado': item['estado'] or 0,
+                'id_municipio': item['municipio'] or 0,
+                'id_parroquia': item['parroquia'] or 0,
+                'genero': item['user__profile__genero'] or '',
+                'anio_nacimiento': item['anio'] or 0,
+            }
+            for clave in cls.claves(dimensiones):
+                clave = tuple(sorted(clave.items()))
+                totales[clave] = totales.get(clave, 0) + item['cantidad']
+
+        filas = [cls(total=total, **dict(clave)) for clave, total in totales.items()]
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(filas, batch_size=1000)
+        return len(filas)
+
+    # Mueve una solicitud de unas dimensiones a otras. Solo toca las filas de resumen
+    # que realmente cambian (ej. un cambio de estatus no toca las filas de género).
+    @classmethod
+    def mover(cls, anteriores, nuevas):
+        if anteriores == nuevas:
+            return
+        claves_anteriores = cls.claves(anteriores)
+        claves_nuevas = cls.claves(nuevas)
+        for clave in claves_anteriores:
+            if clave not in claves_nuevas:
+                cls._sumar(clave, -1)
+        for clave in claves_nuevas:
+            if clave not in claves_anteriores:
+                cls._sumar(clave, 1)
+
+    # Como mover(), para un lote de cambios [(anteriores, nuevas), ...] hechos con un UPDATE
+    # masivo (que no dispara las señales): los cambios se acumulan por fila de resumen y cada
+    # fila se actualiza una sola vez. Usar dentro de la transacción del lote.
+    @classmethod
+    def mover_lote(cls, cambios):
+        deltas = {}
+        for anteriores, nuevas in cambios:
+            if anteriores == nuevas:
+                continue
+            claves_anteriores = cls.claves(anteriores)
+            claves_nuevas = cls.claves(nuevas)
+            for clave in claves_anteriores:
+                if clave not in claves_nuevas:
+                    clave = tuple(sorted(clave.items()))
+                    deltas[clave] = deltas.get(clave, 0) - 1
+            for clave in claves_nuevas:
+                if clave not in claves_anteriores:
+                    clave = tuple(sorted(clave.items()))
+                    deltas[clave] = deltas.get(clave, 0) + 1
+        for clave, delta in deltas.items():
+            if delta:
+                cls._sumar(dict(clave), delta)
+
+# ----------------------------------------------------------------------
+# Receptores de señal que mantienen EstadisticaSolicitud al día.
+# Los comandos de cambio de estatus (views/commands.py) guardan con save(), así que
+# también pasan por aquí; sus versiones por lote usan mover_lote().
+
+# Antes de guardar una Solicitud: recuerda sus dimensiones actuales en la BD.
+@receiver(pre_save, sender=Solicitud)
+def estadistica_solicitud_pre_save(sender, instance, **kwargs):
+    instance._dimensiones_anteriores = EstadisticaSolicitud.dimensiones(instance.pk) if instance.pk else None
+
+# Después de guardar una Solicitud: mueve su conteo a las nuevas dimensiones.
+@receiver(post_save, sender=Solicitud)
+def estadistica_solicitud_post_save(sender, instance, **kwargs):
+    anteriores = getattr(instance, '_dimensiones_anteriores', None)
+    EstadisticaSolicitud.mover(anteriores, EstadisticaSolicitud.dimensiones(instance.pk))
+
+# Antes de eliminar una Solicitud (también en cascada): recuerda sus dimensiones,
+# ya que después el perfil del usuario podría no existir.
+@receiver(pre_delete, sender=Solicitud)
+def estadistica_solicitud_pre_delete(sender, instance, **kwargs):
+    instance._dimensiones_anteriores = EstadisticaSolicitud.dimensiones(instance.pk)
+
+# Después de eliminar una Solicitud: descuenta su conteo.
+@receiver(post_delete, sender=Solicitud)
+def estadistica_solicitud_post_delete(sender, instance, **kwargs):
+    EstadisticaSolicitud.aplicar(getattr(instance, '_dimensiones_anteriores', None), -1)
+
+# Antes de guardar un Profile: recuerda el género y la fecha de nacimiento actuales.
+@receiver(pre_save, sender=Profile)
+def estadistica_profile_pre_save(sender, instance, **kwargs):
+    instance._datos_anteriores = None
+    if instance.pk:
+        instance._datos_anteriores = Profile.objects.filter(pk=instance.pk).values_list('genero', 'fecha_nacimiento').first()
+
+# Después de guardar un Profile: si cambió el género o la fecha de nacimiento,
+# mueve los conteos de las solicitudes del usuario.
+@receiver(post_save, sender=Profile)
+def estadistica_profile_post_save(sender, instance, **kwargs):
+    anteriores = getattr(instance, '_datos_anteriores', None)
+    if anteriores is None or anteriores == (instance.genero, instance.fecha_nacimiento):
+        return
+    genero_anterior, fecha_anterior = anteriores
+    for id_solicitud in Solicitud.objects.filter(user_id=instance.user_id).values_list('id_solicitud', flat=True):
+        nuevas = EstadisticaSolicitud.dimensiones(id_solicitud)
+        if nuevas is None:
+            continue
+        previas = dict(nuevas, genero=genero_anterior or '', anio_nacimiento=fecha_anterior.year if fecha_anterior else 0)
+        EstadisticaSolicitud.mover(previas, nuevas)
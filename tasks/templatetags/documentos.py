@@ -0,0 +1,44 @@
+# tasks/templatetags/documentos.py
+
+from django import template
+from django.urls import reverse
+from django.utils.html import format_html
+
+from ..utils.almacenamiento import hash_de_contenido
+from ..utils.miniaturas import rendiciones_existentes
+
+register = template.Library()
+
+
+# Etiqueta url_documento: URL protegida de un documento subido (ImageField de una solicitud)
+# o de una de sus versiones reducidas; los archivos de media/ no son públicos (ver
+# views/documento_views.py). Los documentos guardados por contenido llevan su hash en '?v=':
+# la URL cambia cuando cambia el documento, así el navegador puede guardarla en caché.
+# Uso: {% url_documento solicitud.cedula %} o {% url_documento solicitud.cedula "miniatura" %}
+@register.simple_tag
+def url_documento(archivo, rendicion=None):
+    if rendicion:
+        url = reverse('ver_documento_rendicion', args=[archivo.instance.pk, archivo.field.name, rendicion])
+    else:
+        url = reverse('ver_documento', args=[archivo.instance.pk, archivo.field.name])
+    digest = hash_de_contenido(archivo.name)
+    return f"{url}?v={digest}" if digest else url
+
+
+# Etiqueta vista_documento: <img> de la vista previa de un documento subido (ImageField),
+# usando sus versiones reducidas (ver utils/miniaturas.py) en lugar del original.
+# Uso: {% vista_documento solicitud.cedula "Cédula" %}
+@register.simple_tag
+def vista_documento(archivo, alt):
+    rendiciones = rendiciones_existentes(archivo)
+    if len(rendiciones) < 2:
+        # Aún sin versiones reducidas (p. ej. antes de ejecutar generar_miniaturas): el original.
+        return format_html(
+            '<img src="{}" alt="{}" class="img-fluid rounded" style="max-height: 80px; object-fit: contain;" loading="lazy">',
+            url_documento(archivo), alt,
+        )
+    miniatura = url_documento(archivo, 'miniatura')
+    return format_html(
+        '<img src="{}" srcset="{} 1x, {} 2x" alt="{}" class="img-fluid rounded" style="max-height: 80px; object-fit: contain;" loading="lazy">',
+        miniatura, miniatura, url_documento(archivo, 'vista_previa'), alt,
+    )
@@ -1,3 +1,1752 @@
-from django.test import TestCase
+import hashlib
+import io
+import os
+import re
+import shutil
+import tempfile
+from datetime import date, datetime, time, timedelta
+from unittest import mock, skipUnless
+
+import openpyxl
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.messages import constants as message_constants
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Solicitud, EstatusBeca, Becas, Estado, Municipio, Parroquia, Plantel, PlantelTermino, Banco, EstadisticaSolicitud, VersionDatos, DocumentoAlmacenado, TrabajoDocumento, TransicionSolicitud, TrabajoReporte
+from .forms.solicitud_form import SolicitudForm
+from .utils.cola_revision import tomar_solicitudes, reservadas, liberar_solicitudes
+from .utils.almacenamiento import almacenamiento_documentos
+from .utils.catalogos import CARGADORES, CATALOGOS_TTL, ids_de, invalidar_catalogo, pertenece_a, precargar_catalogos, huella_dependientes, obtener_catalogo
+from .utils.importar_planteles import importar_planteles, leer_filas
+from .utils.export_excel import ExportColumn, BecasExportStrategy, PlantelesExportStrategy, ProfilesExportStrategy, SolicitudesExportStrategy, get_exporter
+from .utils.report_jobs import TRABAJO_TIMEOUT, encolar_reporte, ejecutar_trabajo, procesar_siguiente_trabajo, tomar_siguiente_trabajo
+from .utils.estadisticas import API_VERSION, GRAFICOS, _rangos_periodo, parsear_filtros
+from .utils.division_territorial import cargar_division_territorial, leer_division_territorial
+from .utils.miniaturas import RENDICIONES, ruta_rendicion
+from .utils.subidas import dimensiones_jpeg, error_cabecera
+from .templatetags.documentos import url_documento
+from PIL import Image
+from .views.catalogo_views import CATALOGOS_MAX_AGE
 
 # Create your tests here.
+
+
+# ----------------------------------------------------------------------
+# Pruebas de planes de consulta (EXPLAIN QUERY PLAN de SQLite).
+# Cada prueba ejecuta una consulta frecuente tal como la hace la aplicación y falla si
+# alguna consulta sobre las tablas grandes se resuelve recorriendo toda la tabla.
+@skipUnless(connection.vendor == 'sqlite', "Los planes de consulta se verifican con EXPLAIN QUERY PLAN de SQLite.")
+class QueryPlanTests(TestCase):
+    TABLAS = (Solicitud._meta.db_table, EstadisticaSolicitud._meta.db_table, PlantelTermino._meta.db_table, TransicionSolicitud._meta.db_table)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estatus = {
+            nombre: EstatusBeca.objects.get_or_create(nombre=nombre)[0]
+            for nombre in ('En proceso', 'Aprobada', 'Rechazada', 'Asignada')
+        }
+        cls.beca = Becas.objects.create(nombre="Beca de prueba", descripcion="Beca de prueba")
+        cls.estado = Estado.objects.create(nombre="Miranda")
+        cls.municipio = Municipio.objects.create(nombre="Sucre", estado=cls.estado)
+        cls.parroquia = Parroquia.objects.create(nombre="Petare", municipio=cls.municipio)
+
+        cls.admin = User.objects.create_superuser('admin_planes', 'admin@example.com', 'clave')
+        cls.solicitante = User.objects.create_user('solicitante_planes', 'user@example.com', 'clave')
+        for i, estatus in enumerate(list(cls.estatus.values()) * 3):
+            Solicitud.objects.create(
+                user=cls.solicitante if i % 2 else cls.admin,
+                beca=cls.beca,
+                estatus_beca=estatus,
+                estado=cls.estado,
+                municipio=cls.municipio,
+                parroquia=cls.parroquia,
+                nombre_becario=f"Becario {i}",
+            )
+        for i, nombre in enumerate(("U.E. José Antonio Páez", "Liceo Andrés Bello", "U.E.P. Sagrado Corazón")):
+            Plantel.objects.create(
+                nombre_plantel=nombre, estado_plantel="Miranda", municipio_plantel="Sucre",
+                codigo_plantel=f"OD{i:05d}", tipo_dependencia='estadal', modalidad_principal='regular',
+            )
+
+    # Retorna las líneas de EXPLAIN QUERY PLAN de una sentencia SQL.
+    def _plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            return [fila[-1] for fila in cursor.fetchall()]
+
+    # Verifica que ninguna consulta capturada sobre las tablas grandes recorra toda la tabla
+    # (y, si 'ordenadas', que el orden salga del índice sin un ordenamiento temporal).
+    def assertSinEscaneoCompleto(self, consultas, ordenadas=False):
+        revisadas = 0
+        for consulta in consultas:
+            sql = consulta['sql']
+            if not sql.startswith('SELECT') or not any(f'"{tabla}"' in sql for tabla in self.TABLAS):
+                continue
+            plan = self._plan(sql)
+            revisadas += 1
+            for linea in plan:
+                for tabla in self.TABLAS:
+                    if re.match(rf'SCAN (TABLE )?{tabla}\b', linea) and 'USING' not in linea:
+                        self.fail(f"Escaneo completo de {tabla}:\n{sql}\n" + "\n".join(plan))
+            if ordenadas and 'ORDER BY' in sql:
+                self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan, f"Ordenamiento sin índice:\n{sql}")
+        self.assertGreater(revisadas, 0, "No se capturó ninguna consulta sobre las tablas verificadas.")
+
+    def test_listados_por_estatus(self):
+        self.client.force_login(self.admin)
+        for nombre_url in ('solic_pendiente', 'solic_aprobadas', 'solic_rechazadas', 'asig_beca', 'ver_asig_beca'):
+            with self.subTest(vista=nombre_url), CaptureQueriesContext(connection) as consultas:
+                self.assertEqual(self.client.get(reverse(nombre_url)).status_code, 200)
+            self.assertSinEscaneoCompleto(consultas, ordenadas=True)
+
+    def test_pagina_siguiente_por_cursor(self):
+        # La página N debe resolverse como un rango del índice a partir del cursor (sin OFFSET).
+        self.client.force_login(self.admin)
+        primera = self.client.get(reverse('solic_pendiente'), {'tamano': 1})
+        cursor = primera.context['pagina'].siguiente_cursor
+        self.assertIsNotNone(cursor)
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(
+                reverse('solic_pendiente'), {'tamano': 1, 'cursor': cursor}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+            )
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertSinEscaneoCompleto(consultas, ordenadas=True)
+        planes = [linea for consulta in consultas if 'LIMIT' in consulta['sql'] for linea in self._plan(consulta['sql'])]
+        self.assertTrue(any('fecha_creacion<' in linea for linea in planes), planes)
+
+    def test_solicitudes_del_usuario(self):
+        self.client.force_login(self.solicitante)
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get(reverse('tasks')).status_code, 200)
+        self.assertSinEscaneoCompleto(consultas, ordenadas=True)
+
+    def test_actividad_del_usuario(self):
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse('get_user_activity', args=[self.solicitante.id]))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertSinEscaneoCompleto(consultas, ordenadas=True)
+
+    def test_rango_de_fechas(self):
+        hasta = timezone.now()
+        with CaptureQueriesContext(connection) as consultas:
+            list(Solicitud.objects.filter(
+                fecha_creacion__gte=hasta - timedelta(days=30), fecha_creacion__lt=hasta
+            ).order_by('fecha_creacion'))
+        self.assertSinEscaneoCompleto(consultas, ordenadas=True)
+
+    def test_busqueda_de_planteles(self):
+        for texto in ('pae', 'jose antonio', 'od0000', 'sagrado u'):
+            with self.subTest(texto=texto), CaptureQueriesContext(connection) as consultas:
+                respuesta = self.client.get(reverse('buscar_planteles'), {'q': texto})
+            self.assertEqual(len(respuesta.json()['opciones']), 1 if texto != 'od0000' else 3)
+            self.assertSinEscaneoCompleto(consultas, ordenadas=True)
+
+    def test_historial_de_transiciones(self):
+        solicitud = Solicitud.objects.filter(user=self.solicitante).first()
+        hasta = timezone.now()
+        with CaptureQueriesContext(connection) as consultas:
+            list(solicitud.transiciones.order_by('fecha'))
+            TransicionSolicitud.por_analista_y_dia(hasta - timedelta(days=30), hasta)
+        self.assertSinEscaneoCompleto(consultas)
+        planes = [linea for consulta in consultas for linea in self._plan(consulta['sql'])]
+        self.assertTrue(any('COVERING INDEX transicion_fecha_actor_idx' in linea for linea in planes), planes)
+
+    def test_graficos_del_dashboard(self):
+        # Sin cache, para que cada petición consulte la tabla de resumen.
+        cache.clear()
+        self.client.force_login(self.admin)
+        hoy = timezone.localdate()
+        filtros = [
+            {},
+            {'desde': (hoy - timedelta(days=90)).isoformat(), 'hasta': hoy.isoformat()},
+            {'estado': self.estado.id, 'beca': self.beca.id_beca, 'municipio': self.municipio.id},
+        ]
+        for grafico in ('estatus', 'fecha', 'becas', 'municipio', 'parroquia', 'genero', 'edad'):
+            for parametros in filtros:
+                url = reverse('estadistica_api', kwargs={'version': 'v1', 'grafico': grafico})
+                with self.subTest(grafico=grafico, filtros=parametros), CaptureQueriesContext(connection) as consultas:
+                    self.assertEqual(self.client.get(url, parametros).status_code, 200)
+                self.assertSinEscaneoCompleto(consultas)
+
+
+# ----------------------------------------------------------------------
+# Pruebas de cantidad de consultas: los listados y detalles usan las proyecciones de
+# SolicitudQuerySet, así que mostrar más solicitudes (o solicitudes con más relaciones)
+# no agrega consultas por fila en las plantillas.
+class ConsultasConstantesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estatus = {
+            nombre: EstatusBeca.objects.get_or_create(nombre=nombre)[0]
+            for nombre in ('En proceso', 'Aprobada', 'Rechazada', 'Asignada')
+        }
+        cls.admin = User.objects.create_superuser('admin_consultas', 'admin@example.com', 'clave')
+        cls.solicitante = User.objects.create_user('solicitante_consultas', 'user@example.com', 'clave')
+        cls.estado = Estado.objects.create(nombre="Miranda")
+        cls.municipio = Municipio.objects.create(nombre="Sucre", estado=cls.estado)
+        cls.parroquia = Parroquia.objects.create(nombre="Petare", municipio=cls.municipio)
+        cls.banco = Banco.objects.create(nombre="Banco de prueba")
+        cls.creadas = 0
+
+    # Crea 'cantidad' solicitudes del solicitante en cada estatus, cada una con su propia beca
+    # (para que una consulta por fila no quede oculta por la cache de relaciones de Django).
+    def _crear_solicitudes(self, cantidad):
+        for estatus in self.estatus.values():
+            for _ in range(cantidad):
+                type(self).creadas += 1
+                Solicitud.objects.create(
+                    user=self.solicitante,
+                    beca=Becas.objects.create(nombre=f"Beca {self.creadas}", descripcion="Beca de prueba"),
+                    estatus_beca=estatus,
+                    estado=self.estado,
+                    municipio=self.municipio,
+                    parroquia=self.parroquia,
+                    banco=self.banco,
+                )
+
+    # Cantidad de consultas de una petición GET.
+    def _consultas(self, usuario, url):
+        self.client.force_login(usuario)
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(consultas)
+
+    def _consultas_de_listados(self):
+        urls = [(self.admin, reverse(nombre)) for nombre in
+                ('solic_pendiente', 'solic_aprobadas', 'solic_rechazadas', 'asig_beca', 'ver_asig_beca')]
+        urls += [
+            (self.solicitante, reverse('tasks')),
+            (self.admin, reverse('get_user_activity', args=[self.solicitante.id])),
+        ]
+        return {url: self._consultas(usuario, url) for usuario, url in urls}
+
+    def test_listados_no_dependen_de_la_cantidad_de_filas(self):
+        self._crear_solicitudes(1)
+        con_una = self._consultas_de_listados()
+        self._crear_solicitudes(6)
+        con_varias = self._consultas_de_listados()
+        self.assertEqual(con_una, con_varias)
+
+    def test_detalles_no_dependen_de_las_relaciones(self):
+        # Una solicitud sin relaciones y otra con todas: el detalle cuesta lo mismo.
+        vacia = Solicitud.objects.create(user=self.solicitante)
+        self._crear_solicitudes(1)
+        completa = Solicitud.objects.filter(banco=self.banco).latest('id_solicitud')
+        for usuario, nombre_url in ((self.admin, 'solic_details'), (self.admin, 'asig_beca_estado'),
+                                    (self.solicitante, 'solic_details_user')):
+            with self.subTest(vista=nombre_url):
+                self.assertEqual(
+                    self._consultas(usuario, reverse(nombre_url, args=[vacia.id_solicitud])),
+                    self._consultas(usuario, reverse(nombre_url, args=[completa.id_solicitud])),
+                )
+
+
+# ----------------------------------------------------------------------
+# Pruebas del registro en memoria de EstatusBeca.
+class RegistroEstatusTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for nombre in EstatusBeca.NOMBRES.values():
+            EstatusBeca.objects.get_or_create(nombre=nombre)
+
+    def setUp(self):
+        EstatusBeca.invalidar_registro()
+        invalidar_catalogo()
+
+    def test_estatus_sin_consultas_una_vez_cargado(self):
+        precargar_catalogos()
+        with self.assertNumQueries(0):
+            for codigo in EstatusBeca.NOMBRES:
+                self.assertEqual(EstatusBeca.obtener(codigo).nombre, EstatusBeca.NOMBRES[codigo])
+            SolicitudForm()
+            self.assertEqual(Solicitud().estatus_beca_id, EstatusBeca.obtener(EstatusBeca.EN_PROCESO).pk)
+
+    def test_cambios_de_estatus_vacian_el_registro(self):
+        asignada = EstatusBeca.obtener(EstatusBeca.ASIGNADA)
+        asignada.delete()
+        with self.assertRaises(EstatusBeca.DoesNotExist):
+            EstatusBeca.obtener(EstatusBeca.ASIGNADA)
+        EstatusBeca.objects.create(nombre='Asignada', descripcion="Nueva")
+        self.assertEqual(EstatusBeca.obtener(EstatusBeca.ASIGNADA).descripcion, "Nueva")
+
+    def test_estatus_por_defecto_se_crea_si_falta(self):
+        EstatusBeca.objects.filter(nombre='En proceso').delete()
+        EstatusBeca.invalidar_registro()
+        self.assertEqual(Solicitud().estatus_beca.nombre, 'En proceso')
+        self.assertTrue(EstatusBeca.objects.filter(nombre='En proceso').exists())
+
+
+# ----------------------------------------------------------------------
+# Pruebas de los catálogos en memoria del formulario de solicitud.
+class CatalogosFormularioTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for nombre in EstatusBeca.NOMBRES.values():
+            EstatusBeca.objects.get_or_create(nombre=nombre)
+        cls.estado = Estado.objects.create(nombre="Miranda")
+        cls.municipio = Municipio.objects.create(nombre="Sucre", estado=cls.estado)
+        cls.parroquia = Parroquia.objects.create(nombre="Petare", municipio=cls.municipio)
+        cls.otro_municipio = Municipio.objects.create(nombre="Baruta", estado=cls.estado)
+        cls.otra_parroquia = Parroquia.objects.create(nombre="El Cafetal", municipio=cls.otro_municipio)
+        cls.plantel = Plantel.objects.create(
+            nombre_plantel="U.E. de prueba", estado_plantel="Miranda", municipio_plantel="SUCRE",
+            codigo_plantel="P-1", tipo_dependencia='estadal', modalidad_principal='regular',
+        )
+        cls.beca = Becas.objects.create(nombre="Beca de prueba", descripcion="Beca de prueba")
+        cls.banco = Banco.objects.create(nombre="Banco de prueba")
+        cls.usuario = User.objects.create_user('solicitante_catalogos', 'user@example.com', 'clave')
+
+    def setUp(self):
+        EstatusBeca.invalidar_registro()
+        invalidar_catalogo()
+
+    # Consultas capturadas sobre alguna tabla de catálogo.
+    def _consultas_de_catalogos(self, consultas):
+        tablas = [modelo._meta.db_table for modelo in CARGADORES]
+        return [c['sql'] for c in consultas if any(f'"{tabla}"' in c['sql'] for tabla in tablas)]
+
+    def test_formulario_sin_consultas_de_catalogos(self):
+        precargar_catalogos()
+        self.client.force_login(self.usuario)
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse('create_tasks'))
+        self.assertContains(respuesta, f'<option value="{self.estado.pk}">Miranda</option>', html=True)
+        self.assertNotContains(respuesta, "Petare")
+        self.assertEqual(self._consultas_de_catalogos(consultas), [])
+
+        datos = {
+            'estado': self.estado.pk, 'municipio': self.municipio.pk, 'parroquia': self.parroquia.pk,
+            'plantel': self.plantel.pk, 'beca': self.beca.pk, 'banco': self.banco.pk,
+            'estatus_beca': EstatusBeca.obtener(EstatusBeca.EN_PROCESO).pk,
+        }
+        with CaptureQueriesContext(connection) as consultas:
+            form = SolicitudForm(datos)
+            form.is_valid()
+        self.assertEqual(self._consultas_de_catalogos(consultas), [])
+        self.assertEqual(form.cleaned_data['parroquia'], self.parroquia)
+        for campo in datos:
+            self.assertNotIn(campo, form.errors)
+
+        # Con datos enviados, los selects dependientes muestran las opciones del padre elegido.
+        self.assertEqual([etiqueta for _, etiqueta in form.fields['parroquia'].choices][1:], ["Petare (Sucre, Miranda)"])
+
+        form = SolicitudForm(dict(datos, parroquia=0))
+        self.assertFalse(form.is_valid())
+        self.assertIn('parroquia', form.errors)
+
+    def test_parroquia_y_plantel_deben_ser_del_municipio(self):
+        datos = {'estado': self.estado.pk, 'municipio': self.otro_municipio.pk,
+                 'parroquia': self.parroquia.pk, 'plantel': self.plantel.pk}
+        form = SolicitudForm(datos)
+        self.assertFalse(form.is_valid())
+        self.assertIn('parroquia', form.errors)
+        self.assertIn('plantel', form.errors)
+
+        otro_estado = Estado.objects.create(nombre="Zulia")
+        form = SolicitudForm(dict(datos, estado=otro_estado.pk))
+        self.assertFalse(form.is_valid())
+        self.assertIn('municipio', form.errors)
+
+    def test_hijos_sin_padre_no_se_aceptan(self):
+        # Una parroquia y un plantel de otro estado, sin municipio: no hay con qué compararlos.
+        zulia = Estado.objects.create(nombre="Zulia")
+        for campo, valor in (('parroquia', self.parroquia.pk), ('plantel', self.plantel.pk)):
+            with self.subTest(campo=campo):
+                form = SolicitudForm({'estado': zulia.pk, campo: valor})
+                self.assertFalse(form.is_valid())
+                self.assertEqual(form.errors['municipio'], ["Seleccione el municipio."])
+
+        form = SolicitudForm({'municipio': self.municipio.pk, 'parroquia': self.parroquia.pk})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['estado'], ["Seleccione el estado."])
+        self.assertNotIn('parroquia', form.errors)
+
+        # Con un municipio de otro estado solo se señala el municipio.
+        form = SolicitudForm({'estado': zulia.pk, 'municipio': self.municipio.pk, 'parroquia': self.parroquia.pk})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['municipio'], ["El municipio seleccionado no pertenece al estado seleccionado."])
+
+    def test_planteles_sin_municipio_conocido(self):
+        sin_municipio = Plantel.objects.create(
+            nombre_plantel="U.E. sin municipio", estado_plantel="MIRANDA", municipio_plantel="Municipio inexistente",
+            codigo_plantel="P-2", tipo_dependencia='estadal', modalidad_principal='regular',
+        )
+        sin_estado = Plantel.objects.create(
+            nombre_plantel="U.E. sin estado", estado_plantel="Estado inexistente", municipio_plantel="Sucre",
+            codigo_plantel="P-3", tipo_dependencia='estadal', modalidad_principal='regular',
+        )
+        zulia = Estado.objects.create(nombre="Zulia")
+        maracaibo = Municipio.objects.create(nombre="Maracaibo", estado=zulia)
+
+        # El plantel sin municipio conocido se ofrece con los municipios de su estado, no con
+        # los de otro; el que tampoco tiene un estado conocido no se ofrece con ninguno.
+        self.assertEqual(ids_de(Plantel, self.municipio.pk), {self.plantel.pk, sin_municipio.pk})
+        self.assertEqual(ids_de(Plantel, self.otro_municipio.pk), {sin_municipio.pk})
+        self.assertEqual(ids_de(Plantel, maracaibo.pk), set())
+        self.assertFalse(pertenece_a(Plantel, sin_estado.pk, self.municipio.pk))
+
+        datos = {'estado': zulia.pk, 'municipio': maracaibo.pk, 'plantel': sin_municipio.pk}
+        form = SolicitudForm(datos)
+        self.assertFalse(form.is_valid())
+        self.assertIn('plantel', form.errors)
+        form = SolicitudForm(dict(datos, estado=self.estado.pk, municipio=self.otro_municipio.pk))
+        form.is_valid()
+        self.assertNotIn('plantel', form.errors)
+
+    def test_endpoints_de_opciones(self):
+        casos = [
+            ('municipios_de_estado', self.estado.pk, ["Baruta (Miranda)", "Sucre (Miranda)"]),
+            ('parroquias_de_municipio', self.municipio.pk, ["Petare (Sucre, Miranda)"]),
+            ('planteles_de_municipio', self.municipio.pk, ["U.E. de prueba"]),
+            ('planteles_de_municipio', self.otro_municipio.pk, []),
+        ]
+        for nombre_url, id_padre, esperadas in casos:
+            with self.subTest(url=nombre_url, id_padre=id_padre):
+                respuesta = self.client.get(reverse(nombre_url, args=[id_padre]))
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertEqual([opcion['nombre'] for opcion in respuesta.json()['opciones']], esperadas)
+                self.assertIn('public', respuesta['Cache-Control'])
+
+        self.assertEqual(self.client.get(reverse('parroquias_de_municipio', args=[0])).status_code, 404)
+
+    def test_busqueda_de_planteles(self):
+        buscar = lambda **parametros: [
+            opcion['nombre'] for opcion in self.client.get(reverse('buscar_planteles'), parametros).json()['opciones']
+        ]
+        self.assertEqual(buscar(q="prue"), ["U.E. de prueba"])
+        self.assertEqual(buscar(q="PRUÉBA u.e"), ["U.E. de prueba"])
+        self.assertEqual(buscar(q="p-1"), ["U.E. de prueba"])
+        self.assertEqual(buscar(q="rueba"), [])
+        self.assertEqual(buscar(q="p"), [])
+        self.assertEqual(buscar(q="prueba", municipio=self.municipio.pk), ["U.E. de prueba"])
+        self.assertEqual(buscar(q="prueba", municipio=self.otro_municipio.pk), [])
+
+        # Al cambiar el nombre se regeneran los términos.
+        self.plantel.nombre_plantel = "Liceo Bolivariano"
+        self.plantel.save()
+        self.assertEqual(buscar(q="prueba"), [])
+        self.assertEqual(buscar(q="bolivar"), ["Liceo Bolivariano"])
+
+        # Con la huella vigente en la URL, el navegador puede guardar la respuesta mucho más tiempo.
+        corta = self.client.get(reverse('municipios_de_estado', args=[self.estado.pk]))
+        larga = self.client.get(reverse('municipios_de_estado', args=[self.estado.pk]), {'v': huella_dependientes()})
+        self.assertIn(f'max-age={CATALOGOS_TTL}', corta['Cache-Control'])
+        self.assertIn(f'max-age={CATALOGOS_MAX_AGE}', larga['Cache-Control'])
+
+    def test_cambios_vacian_el_catalogo(self):
+        precargar_catalogos()
+        Estado.objects.create(nombre="Zulia")
+        self.estado.nombre = "Edo. Miranda"
+        self.estado.save()
+        form = SolicitudForm(initial={'estado': self.estado.pk, 'municipio': self.municipio.pk})
+        etiquetas = lambda campo: [etiqueta for _, etiqueta in form.fields[campo].choices]
+        self.assertIn("Zulia", etiquetas('estado'))
+        self.assertIn("Sucre (Edo. Miranda)", etiquetas('municipio'))
+        self.assertIn("Petare (Sucre, Edo. Miranda)", etiquetas('parroquia'))
+
+
+# El formulario no vuelve a consultar las claves foráneas de catálogo: si la opción elegida
+# se borra en otro proceso, la BD la rechaza al confirmar. TransactionTestCase porque SQLite
+# revisa las claves foráneas al confirmar la transacción.
+class CatalogoBorradoTests(TransactionTestCase):
+
+    def setUp(self):
+        EstatusBeca.invalidar_registro()
+        invalidar_catalogo()
+        self.banco = Banco.objects.create(nombre="Banco borrado")
+        self.usuario = User.objects.create_user('solicitante_catalogo_borrado', 'user@example.com', 'clave')
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=self.media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def _jpg(self, nombre):
+        contenido = io.BytesIO()
+        Image.new('RGB', (40, 40), 'white').save(contenido, 'JPEG')
+        return SimpleUploadedFile(nombre, contenido.getvalue(), content_type='image/jpeg')
+
+    def _archivos_guardados(self):
+        return [os.path.join(raiz, nombre) for raiz, _, nombres in os.walk(self.media) for nombre in nombres]
+
+    def test_opcion_borrada_en_otro_proceso(self):
+        precargar_catalogos()
+        # Borrado sin señales, como lo vería otro worker: el catálogo en memoria no se entera.
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM "{Banco._meta.db_table}" WHERE "{Banco._meta.pk.column}" = %s', [self.banco.pk])
+
+        self.client.force_login(self.usuario)
+        cedula = self._jpg("cedula.jpg")
+        respuesta = self.client.post(reverse('create_tasks'), {'banco': self.banco.pk, 'cedula': cedula})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn("ya no existe", respuesta.context['form'].non_field_errors()[0])
+        self.assertFalse(Solicitud.objects.exists())
+        # El catálogo se recargó: la opción borrada ya no se ofrece.
+        self.assertNotIn(self.banco.pk, obtener_catalogo(Banco).por_pk)
+        # El documento que ya se había escrito no queda en el disco sin referencias.
+        self.assertFalse(DocumentoAlmacenado.objects.exists())
+        self.assertEqual(self._archivos_guardados(), [])
+
+    def test_error_inesperado_no_se_muestra(self):
+        self.client.force_login(self.usuario)
+        cedula = self._jpg("cedula.jpg")
+        # Falla el guardado de la solicitud (el estatus por defecto ya existe).
+        EstatusBeca.obtener(EstatusBeca.EN_PROCESO, crear=True)
+        with mock.patch('tasks.models.VersionDatos.incrementar', side_effect=RuntimeError("detalle interno")), \
+                self.assertLogs('tasks.views.user_solicitud_views', 'ERROR'):
+            respuesta = self.client.post(reverse('create_tasks'), {'banco': self.banco.pk, 'cedula': cedula})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotContains(respuesta, "detalle interno")
+        self.assertIn("inténtalo de nuevo", respuesta.context['error'])
+        self.assertFalse(Solicitud.objects.exists())
+        self.assertEqual(self._archivos_guardados(), [])
+
+
+# ----------------------------------------------------------------------
+# Pruebas del importador de planteles (comando import_planteles y carga desde el admin).
+class ImportarPlantelesTests(TestCase):
+    CSV = (
+        "Código del Plantel;nombre_plantel;estado_plantel;municipio_plantel;tipo_dependencia;modalidad_principal\n"
+        "P-1;U.E. Simón Bolívar;Miranda;Sucre;Estadal;regular\n"
+        "P-2;Liceo Andrés Bello;miranda;Baruta;privada_mppe;Jóvenes\n"
+        "P-3;Sin estado;Narnia;Sucre;estadal;regular\n"
+        "P-4;;Miranda;Sucre;estadal;regular\n"
+    )
+
+    def setUp(self):
+        self.existente = Plantel.objects.create(
+            nombre_plantel="Nombre viejo", estado_plantel="Miranda", municipio_plantel="Sucre",
+            codigo_plantel="P-1", tipo_dependencia="nacional", modalidad_principal="regular", estatus_plantel="inactivo",
+        )
+        invalidar_catalogo()
+
+    def importar(self, contenido, nombre="planteles.csv"):
+        return importar_planteles(leer_filas(io.BytesIO(contenido), nombre), tamano_lote=1)
+
+    def test_importar_csv(self):
+        obtener_catalogo(Plantel)
+        version = VersionDatos.obtener(['plantel'])['plantel'][0]
+        resultado = self.importar(self.CSV.encode('utf-8'))
+
+        self.assertEqual((resultado.filas, resultado.creados, resultado.actualizados), (4, 1, 1))
+        self.assertEqual([fila for fila, _ in resultado.errores], [4, 5])
+        self.existente.refresh_from_db()
+        # Actualiza por código; el estatus no viene en el archivo y se conserva.
+        self.assertEqual(
+            (self.existente.nombre_plantel, self.existente.tipo_dependencia, self.existente.estatus_plantel),
+            ("U.E. Simón Bolívar", "estadal", "inactivo"),
+        )
+        nuevo = Plantel.objects.get(codigo_plantel="P-2")
+        self.assertEqual((nuevo.estado_plantel, nuevo.modalidad_principal), ("Miranda", "jovenes"))
+
+        # bulk_create/bulk_update no disparan señales: el índice, el catálogo y la versión se actualizan igual.
+        self.assertEqual(set(PlantelTermino.buscar("bolivar")), {self.existente.pk})
+        self.assertEqual(set(PlantelTermino.buscar("vieja")), set())
+        self.assertIn(nuevo.pk, obtener_catalogo(Plantel).por_pk)
+        self.assertEqual(VersionDatos.obtener(['plantel'])['plantel'][0], version + 1)
+
+        # Importar el mismo archivo otra vez no cambia nada.
+        resultado = self.importar(self.CSV.encode('utf-8'))
+        self.assertEqual((resultado.creados, resultado.actualizados, resultado.sin_cambios), (0, 0, 2))
+
+    def test_importar_xlsx(self):
+        workbook = openpyxl.Workbook()
+        hoja = workbook.active
+        hoja.append(["codigo_plantel", "nombre_plantel", "estado_plantel", "municipio_plantel", "tipo_dependencia", "modalidad_principal", "estatus_plantel"])
+        hoja.append([12345, "Escuela Básica Miranda", "Miranda", "Sucre", "nacional", "especial", "Inactivo"])
+        contenido = io.BytesIO()
+        workbook.save(contenido)
+
+        resultado = self.importar(contenido.getvalue(), "planteles.xlsx")
+        self.assertEqual((resultado.creados, resultado.total_errores), (1, 0))
+        self.assertEqual(Plantel.objects.get(codigo_plantel="12345").estatus_plantel, "inactivo")
+
+    def test_encabezado_incompleto(self):
+        with self.assertRaisesMessage(ValueError, "modalidad_principal"):
+            self.importar(b"codigo_plantel,nombre_plantel,estado_plantel,municipio_plantel,tipo_dependencia\n")
+        with self.assertRaises(ValueError):
+            self.importar(b"", "planteles.txt")
+
+    def test_importar_desde_el_admin(self):
+        self.client.force_login(User.objects.create_superuser('admin_importar', 'admin@example.com', 'clave'))
+        url = reverse('admin:tasks_plantel_importar')
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        archivo = SimpleUploadedFile("planteles.csv", self.CSV.encode('utf-8'), content_type='text/csv')
+        respuesta = self.client.post(url, {'archivo': archivo}, follow=True)
+        self.assertRedirects(respuesta, reverse('admin:tasks_plantel_changelist'))
+        self.assertContains(respuesta, "1 creados, 1 actualizados")
+        self.assertContains(respuesta, "Fila 4:")
+        self.assertTrue(Plantel.objects.filter(codigo_plantel="P-2").exists())
+
+
+# ----------------------------------------------------------------------
+# Pruebas de la carga de la división territorial (comando cargar_division_territorial).
+class DivisionTerritorialTests(TestCase):
+
+    def test_carga_idempotente(self):
+        # Un municipio ya cargado a mano sin acento no se duplica.
+        miranda = Estado.objects.create(nombre="Miranda")
+        paez = Municipio.objects.create(nombre="Paez", estado=miranda)
+        datos = leer_division_territorial()
+        municipios = sum(len(municipios) for municipios in datos.values())
+        parroquias = sum(len(nombres) for municipios in datos.values() for nombres in municipios.values())
+        obtener_catalogo(Parroquia)
+
+        # Por tabla: leer las existentes, los INSERT y leer los ids nuevos (más el savepoint).
+        # En SQLite el bulk_create de las parroquias se parte en 3 INSERT (límite de variables).
+        with self.assertNumQueries(13):
+            creados = cargar_division_territorial(datos)
+        self.assertEqual(creados, {Estado: len(datos) - 1, Municipio: municipios - 1, Parroquia: parroquias})
+        self.assertEqual(
+            set(paez.parroquias.values_list('nombre', flat=True)),
+            {"El Guapo", "Paparo", "Río Chico", "San Fernando del Guapo", "Tacarigua de la Laguna"},
+        )
+        self.assertEqual(len(obtener_catalogo(Parroquia).por_pk), parroquias)
+
+        with self.assertNumQueries(5):
+            creados = cargar_division_territorial(datos)
+        self.assertEqual(set(creados.values()), {0})
+
+
+# ----------------------------------------------------------------------
+# Documentos subidos: cada prueba guarda los archivos en un MEDIA_ROOT temporal.
+class DocumentosTemporalesMixin:
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=self.media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        EstatusBeca.invalidar_registro()
+        self.solicitante = User.objects.create_user('solicitante_miniaturas', 'user@example.com', 'clave')
+
+    def _jpg(self, nombre, tamano=(1200, 1600), **opciones):
+        contenido = io.BytesIO()
+        Image.new('RGB', tamano, 'white').save(contenido, 'JPEG', **opciones)
+        return SimpleUploadedFile(nombre, contenido.getvalue(), content_type='image/jpeg')
+
+    # Ejecuta el worker de documentos en este proceso (ver procesar_documentos).
+    def _procesar_documentos(self):
+        call_command('procesar_documentos', '--once', '--procesos', '0', stdout=io.StringIO(), stderr=io.StringIO())
+
+
+# Pruebas de las versiones reducidas de los documentos subidos (utils/miniaturas.py).
+class MiniaturasDocumentosTests(DocumentosTemporalesMixin, TestCase):
+
+    def test_miniaturas_al_subir_y_en_el_detalle(self):
+        solicitud = Solicitud.objects.create(user=self.solicitante, cedula=self._jpg("cedula.jpg"))
+        self._procesar_documentos()
+        for rendicion, lado in RENDICIONES.items():
+            with default_storage.open(ruta_rendicion(solicitud.cedula.name, rendicion)) as archivo:
+                self.assertEqual(max(Image.open(archivo).size), lado)
+
+        self.client.force_login(self.solicitante)
+        respuesta = self.client.get(reverse('solic_details_user', args=[solicitud.id_solicitud]))
+        solicitud.refresh_from_db()
+        miniatura = url_documento(solicitud.cedula, 'miniatura')
+        vista_previa = url_documento(solicitud.cedula, 'vista_previa')
+        self.assertIn('?v=', miniatura)
+        self.assertContains(respuesta, f'srcset="{miniatura} 1x, {vista_previa} 2x"')
+
+    def test_generar_miniaturas_de_archivos_existentes(self):
+        solicitud = Solicitud.objects.create(user=self.solicitante, boletin=self._jpg("boletin.jpg"))
+        miniatura = ruta_rendicion(solicitud.boletin.name, 'miniatura')
+
+        # Sin versiones reducidas, el detalle muestra el original.
+        self.client.force_login(self.solicitante)
+        respuesta = self.client.get(reverse('solic_details_user', args=[solicitud.id_solicitud]))
+        self.assertContains(respuesta, f'src="{url_documento(solicitud.boletin)}"')
+
+        call_command('generar_miniaturas', stdout=io.StringIO())
+        self.assertTrue(default_storage.exists(miniatura))
+
+
+# ----------------------------------------------------------------------
+# Pruebas del almacenamiento por contenido de los documentos (utils/almacenamiento.py).
+class AlmacenamientoDocumentosTests(DocumentosTemporalesMixin, TestCase):
+
+    def _archivos(self):
+        return sorted(
+            os.path.relpath(os.path.join(carpeta, nombre), self.media).replace(os.sep, '/')
+            for carpeta, _, nombres in os.walk(self.media) for nombre in nombres
+        )
+
+    def test_subidas_repetidas_se_guardan_una_vez(self):
+        contenido = self._jpg("cedula.jpg").read()
+        primera = Solicitud.objects.create(user=self.solicitante, cedula=SimpleUploadedFile("cedula.jpg", contenido))
+        segunda = Solicitud.objects.create(user=self.solicitante, boletin=SimpleUploadedFile("otra.JPG", contenido))
+        self._procesar_documentos()
+
+        digest = hashlib.sha256(contenido).hexdigest()
+        nombre = f"documentos/{digest[:2]}/{digest[2:4]}/{digest}.jpg"
+        self.assertEqual((primera.cedula.name, segunda.boletin.name), (nombre, nombre))
+        self.assertEqual(
+            self._archivos(),
+            sorted([nombre] + [ruta_rendicion(nombre, rendicion) for rendicion in RENDICIONES]),
+        )
+        self.assertEqual(DocumentoAlmacenado.objects.get(nombre=nombre).referencias, 2)
+
+        # Cambiar el documento de una solicitud suelta su referencia al anterior.
+        primera.cedula = self._jpg("nueva.jpg", tamano=(300, 400))
+        primera.save()
+        self._procesar_documentos()
+        self.assertEqual(DocumentoAlmacenado.objects.get(nombre=nombre).referencias, 1)
+
+        # Al eliminar la última solicitud que lo usa, se borra del disco (con sus miniaturas).
+        with self.captureOnCommitCallbacks(execute=True):
+            segunda.delete()
+        self.assertFalse(DocumentoAlmacenado.objects.filter(nombre=nombre).exists())
+        self.assertTrue(all(not archivo.startswith(f"documentos/{digest[:2]}/{digest[2:4]}/{digest}") for archivo in self._archivos()))
+        self.assertTrue(default_storage.exists(primera.cedula.name))
+
+    def test_borrado_no_quita_el_archivo_a_una_subida_en_curso(self):
+        contenido = self._jpg("cedula.jpg").read()
+        solicitud = Solicitud.objects.create(user=self.solicitante, cedula=SimpleUploadedFile("cedula.jpg", contenido))
+        nombre = solicitud.cedula.name
+
+        # Se suelta la última referencia; el borrado del archivo corre al confirmar.
+        with self.captureOnCommitCallbacks() as callbacks:
+            solicitud.delete()
+        self.assertFalse(DocumentoAlmacenado.objects.filter(nombre=nombre).exists())
+
+        # Mientras tanto, otra subida del mismo contenido encuentra el archivo ya guardado
+        # (su solicitud aún no se guarda): el storage ya tomó su referencia.
+        self.assertEqual(almacenamiento_documentos.save("copia.jpg", io.BytesIO(contenido)), nombre)
+        for callback in callbacks:
+            callback()
+        self.assertTrue(default_storage.exists(nombre))
+        self.assertEqual(DocumentoAlmacenado.objects.get(nombre=nombre).referencias, 1)
+
+        # Guardar otra solicitud con el mismo archivo suma una sola referencia (la que toma el storage).
+        otra = Solicitud.objects.create(user=self.solicitante, cedula=SimpleUploadedFile("otra.jpg", contenido))
+        self.assertEqual(otra.cedula.name, nombre)
+        self.assertEqual(DocumentoAlmacenado.objects.get(nombre=nombre).referencias, 2)
+
+    def test_migrar_documentos_anteriores(self):
+        contenido = self._jpg("boletin.jpg").read()
+        anteriores = [default_storage.save("boletines/1.jpg", io.BytesIO(contenido)) for _ in range(3)]
+        self.assertEqual(len(set(anteriores)), 3)
+        for nombre in anteriores:
+            Solicitud.objects.filter(pk=Solicitud.objects.create(user=self.solicitante).pk).update(boletin=nombre)
+
+        call_command('migrar_documentos', '--eliminar-originales', stdout=io.StringIO())
+
+        nombres = set(Solicitud.objects.values_list('boletin', flat=True))
+        self.assertEqual(len(nombres), 1)
+        nombre = nombres.pop()
+        self.assertTrue(nombre.startswith("documentos/"))
+        self.assertEqual(DocumentoAlmacenado.objects.get(nombre=nombre).referencias, 3)
+        self.assertFalse(any(default_storage.exists(anterior) for anterior in anteriores))
+        self.assertTrue(default_storage.exists(ruta_rendicion(nombre, 'miniatura')))
+
+
+# ----------------------------------------------------------------------
+# Pruebas del worker que procesa los documentos subidos (utils/document_jobs.py).
+class TrabajosDocumentosTests(DocumentosTemporalesMixin, TestCase):
+
+    def test_subir_solo_encola(self):
+        solicitud = Solicitud.objects.create(user=self.solicitante, cedula=self._jpg("cedula.jpg"), boletin=self._jpg("boletin.jpg"))
+        self.assertEqual(
+            sorted(solicitud.trabajos_documento.values_list('campo', 'estatus')),
+            [('boletin', TrabajoDocumento.ESTATUS_PENDIENTE), ('cedula', TrabajoDocumento.ESTATUS_PENDIENTE)],
+        )
+        self.assertFalse(default_storage.exists(ruta_rendicion(solicitud.cedula.name, 'miniatura')))
+
+        # Un cambio de estatus no vuelve a encolar los documentos.
+        solicitud.motivo_rechazo = "Documentos ilegibles"
+        solicitud.save()
+        self.assertEqual(solicitud.trabajos_documento.count(), 2)
+
+    def test_foto_grande_con_exif(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientación: girada 90°.
+        exif[0x010F] = "Cámara de prueba"
+        solicitud = Solicitud.objects.create(user=self.solicitante, cedula=self._jpg("foto.jpg", tamano=(4000, 3000), exif=exif))
+        original = solicitud.cedula.name
+        self._procesar_documentos()
+
+        solicitud.refresh_from_db()
+        self.assertNotEqual(solicitud.cedula.name, original)
+        with default_storage.open(solicitud.cedula.name) as archivo:
+            imagen = Image.open(archivo)
+            self.assertEqual(imagen.size, (1500, 2000))
+            self.assertFalse(imagen.getexif())
+        # El original ya no se usa: se elimina al confirmar la transacción.
+        self.assertFalse(DocumentoAlmacenado.objects.filter(nombre=original).exists())
+        self.assertEqual(DocumentoAlmacenado.objects.get(nombre=solicitud.cedula.name).referencias, 1)
+        self.assertTrue(default_storage.exists(ruta_rendicion(solicitud.cedula.name, 'miniatura')))
+        self.assertEqual(solicitud.trabajos_documento.get().estatus, TrabajoDocumento.ESTATUS_COMPLETADO)
+
+    def test_reintentos(self):
+        solicitud = Solicitud.objects.create(user=self.solicitante, cedula=self._jpg("cedula.jpg"))
+        trabajo = solicitud.trabajos_documento.get()
+        # Un error pasajero (el archivo no está disponible): vuelve a la cola con espera.
+        os.rename(default_storage.path(solicitud.cedula.name), default_storage.path("aparte.jpg"))
+        with self.assertLogs('tasks.utils.document_jobs', 'ERROR'):
+            self._procesar_documentos()
+        trabajo.refresh_from_db()
+        self.assertEqual((trabajo.estatus, trabajo.intentos), (TrabajoDocumento.ESTATUS_PENDIENTE, 1))
+        self.assertGreater(trabajo.fecha_disponible, timezone.now())
+
+        # Cuando vuelve a estar disponible, el siguiente intento lo completa.
+        os.rename(default_storage.path("aparte.jpg"), default_storage.path(solicitud.cedula.name))
+        TrabajoDocumento.objects.filter(pk=trabajo.pk).update(fecha_disponible=timezone.now())
+        self._procesar_documentos()
+        trabajo.refresh_from_db()
+        self.assertEqual((trabajo.estatus, trabajo.intentos), (TrabajoDocumento.ESTATUS_COMPLETADO, 2))
+
+        # Un archivo que no es una imagen falla sin reintentos.
+        otra = Solicitud.objects.create(user=self.solicitante, boletin=SimpleUploadedFile("boletin.jpg", b"no es una imagen"))
+        with self.assertLogs('tasks.utils.document_jobs', 'ERROR'):
+            self._procesar_documentos()
+        self.assertEqual(otra.trabajos_documento.get().estatus, TrabajoDocumento.ESTATUS_FALLIDO)
+
+
+# ----------------------------------------------------------------------
+# Pruebas de la validación de los documentos mientras se suben (utils/subidas.py).
+class ValidacionSubidasTests(DocumentosTemporalesMixin, TestCase):
+
+    # Cabecera JPEG mínima: SOI, un segmento APP0 y el SOF0 con 'ancho' x 'alto'.
+    def _cabecera_jpeg(self, ancho, alto):
+        return (
+            b'\xff\xd8' + b'\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00'
+            + b'\xff\xc0\x00\x11\x08' + alto.to_bytes(2, 'big') + ancho.to_bytes(2, 'big') + b'\x03' + b'\x00' * 9
+        )
+
+    def _png(self, nombre):
+        contenido = io.BytesIO()
+        Image.new('RGB', (50, 50), 'white').save(contenido, 'PNG')
+        return SimpleUploadedFile(nombre, contenido.getvalue(), content_type='image/jpeg')
+
+    def _enviar(self, **archivos):
+        self.client.force_login(self.solicitante)
+        return self.client.post(reverse('create_tasks'), archivos)
+
+    def test_dimensiones_desde_la_cabecera(self):
+        self.assertEqual(dimensiones_jpeg(self._jpg("foto.jpg", tamano=(640, 480), exif=Image.Exif()).read()), (640, 480))
+        self.assertEqual(dimensiones_jpeg(self._cabecera_jpeg(300, 200)), (300, 200))
+        # Aún no llega el segmento SOF.
+        self.assertIsNone(dimensiones_jpeg(self._cabecera_jpeg(300, 200)[:20]))
+        with self.assertRaises(ValueError):
+            dimensiones_jpeg(self._png("imagen.jpg").read())
+
+        self.assertIsNone(error_cabecera(self._cabecera_jpeg(4000, 3000)))
+        self.assertIn("dimensiones", error_cabecera(self._cabecera_jpeg(65000, 65000)))
+        self.assertIn("JPG", error_cabecera(self._cabecera_jpeg(300, 200)[:20], completa=True))
+
+    def test_archivos_rechazados_al_subir(self):
+        respuesta = self._enviar(
+            cedula=self._png("cedula.jpg"),
+            boletin=SimpleUploadedFile("boletin.jpg", self._cabecera_jpeg(65000, 65000) + b'\x00' * 1000),
+            constancia_estudios=self._jpg("constancia.jpg"),
+        )
+        form = respuesta.context['form']
+        # Los archivos rechazados no llegan al formulario; el válido sí.
+        self.assertNotIn('cedula', form.files)
+        self.assertNotIn('boletin', form.files)
+        self.assertIn('constancia_estudios', form.files)
+        self.assertIn("no es una imagen JPG válida", form.errors['cedula'][0])
+        self.assertIn("dimensiones no permitidas", form.errors['boletin'][0])
+        self.assertNotIn('constancia_estudios', form.errors)
+        self.assertFalse(Solicitud.objects.exists())
+
+    def test_limites_de_tamano(self):
+        with override_settings(DOCUMENTOS_MAX_BYTES=10 * 1024):
+            respuesta = self._enviar(cedula=self._jpg("cedula.jpg", tamano=(2000, 2000), quality=100))
+        self.assertNotIn('cedula', respuesta.context['form'].files)
+        self.assertIn("demasiado grande", respuesta.context['form'].errors['cedula'][0])
+
+        with override_settings(DOCUMENTOS_MAX_BYTES_PETICION=1024):
+            respuesta = self._enviar(cedula=self._jpg("cedula.jpg"))
+        self.assertFalse(respuesta.context['form'].files)
+        self.assertIn("por solicitud", respuesta.context['form'].non_field_errors()[0])
+
+
+# ----------------------------------------------------------------------
+# Pruebas de la entrega protegida de los documentos (views/documento_views.py).
+class DocumentosProtegidosTests(DocumentosTemporalesMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.solicitud = Solicitud.objects.create(user=self.solicitante, cedula=self._jpg("cedula.jpg"))
+        with default_storage.open(self.solicitud.cedula.name, 'rb') as archivo:
+            self.contenido = archivo.read()
+        self.url = reverse('ver_documento', args=[self.solicitud.id_solicitud, 'cedula'])
+
+    def test_solo_el_dueno_o_un_analista(self):
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+        self.client.force_login(User.objects.create_user('otro_solicitante', 'otro@example.com', 'clave'))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+        self.client.force_login(User.objects.create_superuser('analista_documentos', 'admin@example.com', 'clave'))
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(b''.join(respuesta.streaming_content), self.contenido)
+
+        self.assertEqual(self.client.get(reverse('ver_documento', args=[self.solicitud.id_solicitud, 'boletin'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('ver_documento', args=[self.solicitud.id_solicitud, 'user'])).status_code, 404)
+
+    def test_etag_rangos_y_cache(self):
+        self.client.force_login(self.solicitante)
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta['Accept-Ranges'], 'bytes')
+        # Sin el hash en la URL, el navegador revalida con el ETag.
+        self.assertIn('no-cache', respuesta['Cache-Control'])
+        self.assertIn('private', respuesta['Cache-Control'])
+        etag = respuesta['ETag']
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        respuesta = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(respuesta.status_code, 206)
+        self.assertEqual(respuesta['Content-Range'], f"bytes 10-19/{len(self.contenido)}")
+        self.assertEqual(b''.join(respuesta.streaming_content), self.contenido[10:20])
+
+        respuesta = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(respuesta.streaming_content), self.contenido[-5:])
+
+        # Con otra versión (If-Range distinto) se envía el archivo completo.
+        respuesta = self.client.get(self.url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"otro"')
+        self.assertEqual(respuesta.status_code, 200)
+
+        respuesta = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.contenido)}-')
+        self.assertEqual(respuesta.status_code, 416)
+
+    def test_cache_inmutable_solo_con_el_hash_actual(self):
+        self.client.force_login(self.solicitante)
+        digest = hashlib.sha256(self.contenido).hexdigest()
+        url = url_documento(self.solicitud.cedula)
+        self.assertEqual(url, f"{self.url}?v={digest}")
+        respuesta = self.client.get(url)
+        self.assertIn('immutable', respuesta['Cache-Control'])
+        self.assertEqual(respuesta['ETag'], f'"{digest}"')
+
+        # Si el documento cambia (otra subida, la versión limpia del worker), la URL anterior
+        # ya no se guarda como inmutable y la nueva es distinta.
+        self.solicitud.cedula = self._jpg("otra.jpg", tamano=(640, 480))
+        self.solicitud.save()
+        respuesta = self.client.get(url)
+        self.assertNotIn('immutable', respuesta['Cache-Control'])
+        self.assertIn('no-cache', respuesta['Cache-Control'])
+        self.assertNotEqual(url_documento(self.solicitud.cedula), url)
+
+    def test_admin_enlaza_la_vista_protegida(self):
+        self.client.force_login(User.objects.create_superuser('admin_documentos', 'admin@example.com', 'clave'))
+        respuesta = self.client.get(reverse('admin:tasks_solicitud_change', args=[self.solicitud.pk]))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, f'href="{url_documento(self.solicitud.cedula)}"')
+        # Sin el widget de archivo, que enlazaría a media/ (no se sirve).
+        self.assertNotIn('cedula', respuesta.context['adminform'].form.fields)
+        self.assertNotContains(respuesta, settings.MEDIA_URL + self.solicitud.cedula.name)
+
+    @override_settings(DOCUMENTOS_ENTREGA='x-accel-redirect')
+    def test_entrega_por_el_servidor_web(self):
+        self.client.force_login(self.solicitante)
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta['X-Accel-Redirect'], f"/media-protegida/{self.solicitud.cedula.name}")
+        self.assertEqual(respuesta.content, b'')
+
+
+# ----------------------------------------------------------------------
+# Pruebas de la gestión de solicitudes por lote (gestionar_solicitudes_lote).
+class GestionLoteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estatus = {codigo: EstatusBeca.objects.get_or_create(nombre=nombre)[0] for codigo, nombre in EstatusBeca.NOMBRES.items()}
+        cls.admin = User.objects.create_superuser('admin_lote', 'admin@example.com', 'clave')
+        cls.solicitante = User.objects.create_user('solicitante_lote', 'user@example.com', 'clave')
+
+    def setUp(self):
+        EstatusBeca.invalidar_registro()
+        self.en_proceso = [
+            Solicitud.objects.create(user=self.solicitante, estatus_beca=self.estatus[EstatusBeca.EN_PROCESO]).id_solicitud
+            for _ in range(3)
+        ]
+        self.aprobada = Solicitud.objects.create(user=self.solicitante, estatus_beca=self.estatus[EstatusBeca.APROBADA]).id_solicitud
+        self.client.force_login(self.admin)
+
+    # Totales de EstadisticaSolicitud (sin filas en cero), para compararlos con una reconstrucción.
+    def _estadisticas(self):
+        return set(EstadisticaSolicitud.objects.exclude(total=0).values_list('dimension', 'periodo', 'fecha', 'valor', 'total'))
+
+    def test_aprobar_lote(self):
+        version = VersionDatos.obtener(['solicitud'])['solicitud'][0]
+        ids = self.en_proceso[:2] + [self.aprobada, 999999]
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.post(reverse('gestionar_solicitudes_lote', args=['aprobar']), {'ids': ','.join(map(str, ids))})
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        self.assertEqual(datos['aplicadas'], 2)
+        self.assertEqual(datos['resultados'][str(self.en_proceso[0])], {'resultado': 'aplicada', 'estatus': 'Aprobada'})
+        self.assertEqual(datos['resultados'][str(self.aprobada)], {'resultado': 'no_permitida', 'estatus': 'Aprobada'})
+        self.assertEqual(datos['resultados']['999999']['resultado'], 'no_encontrada')
+
+        # Un solo UPDATE de solicitudes para todo el lote.
+        tabla = Solicitud._meta.db_table
+        self.assertEqual(len([c for c in consultas if c['sql'].startswith(f'UPDATE "{tabla}"')]), 1)
+        self.assertEqual(
+            Solicitud.objects.filter(estatus_beca=self.estatus[EstatusBeca.APROBADA]).count(), 3,
+        )
+        self.assertGreater(VersionDatos.obtener(['solicitud'])['solicitud'][0], version)
+
+        # El resumen del dashboard queda igual que si se reconstruyera.
+        actuales = self._estadisticas()
+        EstadisticaSolicitud.reconstruir()
+        self.assertEqual(actuales, self._estadisticas())
+
+    def test_update_antes_de_leer_y_transiciones(self):
+        with CaptureQueriesContext(connection) as consultas:
+            datos = self.client.post(
+                reverse('gestionar_solicitudes_lote', args=['asignar']), {'ids': [self.aprobada, *self.en_proceso]},
+            ).json()
+        self.assertEqual(datos['aplicadas'], 1)
+
+        # La primera consulta a la tabla de solicitudes es el UPDATE condicional, que retorna
+        # las filas que cambió (así no se leen antes de tomar el bloqueo de escritura).
+        tabla = f'"{Solicitud._meta.db_table}"'
+        sql = [c['sql'] for c in consultas if tabla in c['sql']]
+        self.assertTrue(sql[0].startswith(f'UPDATE {tabla}'))
+        self.assertIn('RETURNING', sql[0])
+
+        transicion = TransicionSolicitud.objects.get(solicitud_id=self.aprobada)
+        self.assertEqual(transicion.estatus_anterior, self.estatus[EstatusBeca.APROBADA])
+        self.assertEqual(transicion.estatus_nuevo, self.estatus[EstatusBeca.ASIGNADA])
+        self.assertFalse(TransicionSolicitud.objects.filter(solicitud_id__in=self.en_proceso).exists())
+        actuales = self._estadisticas()
+        EstadisticaSolicitud.reconstruir()
+        self.assertEqual(actuales, self._estadisticas())
+
+    def test_rechazar_lote_requiere_motivo(self):
+        url = reverse('gestionar_solicitudes_lote', args=['rechazar'])
+        respuesta = self.client.post(url, {'ids': self.en_proceso})
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertFalse(Solicitud.objects.filter(estatus_beca=self.estatus[EstatusBeca.RECHAZADA]).exists())
+
+        respuesta = self.client.post(url, {'ids': self.en_proceso, 'motivo_select': "Documentos ilegibles"})
+        self.assertEqual(respuesta.json()['aplicadas'], 3)
+        self.assertEqual(
+            set(Solicitud.objects.filter(id_solicitud__in=self.en_proceso).values_list('motivo_rechazo', flat=True)),
+            {"Motivo Principal: Documentos ilegibles"},
+        )
+
+        self.assertEqual(self.client.post(reverse('gestionar_solicitudes_lote', args=['borrar']), {'ids': self.en_proceso}).status_code, 400)
+        self.client.force_login(self.solicitante)
+        self.assertEqual(self.client.post(url, {'ids': self.en_proceso}).status_code, 302)
+
+    def test_historial_de_transiciones(self):
+        # Uno a uno (gestionar_solicitud) y por lote: una transición por solicitud que cambia.
+        self.client.force_login(self.admin)
+        self.client.get(reverse('gestionar_solicitud', args=[self.en_proceso[0], 'aprobar']))
+        self.client.post(
+            reverse('gestionar_solicitudes_lote', args=['rechazar']),
+            {'ids': self.en_proceso[1:] + [self.aprobada], 'motivo_select': "Datos incompletos"},
+        )
+        transiciones = TransicionSolicitud.objects.order_by('solicitud_id')
+        self.assertEqual(
+            [(t.solicitud_id, t.estatus_anterior_id, t.estatus_nuevo_id, t.actor_id) for t in transiciones],
+            [(self.en_proceso[0], self.estatus[EstatusBeca.EN_PROCESO].pk, self.estatus[EstatusBeca.APROBADA].pk, self.admin.pk)]
+            + [(pk, self.estatus[EstatusBeca.EN_PROCESO].pk, self.estatus[EstatusBeca.RECHAZADA].pk, self.admin.pk) for pk in self.en_proceso[1:]],
+        )
+        self.assertEqual(transiciones.last().motivo, "Motivo Principal: Datos incompletos")
+        self.assertEqual(
+            TransicionSolicitud.por_analista_y_dia(timezone.now() - timedelta(days=1), timezone.now() + timedelta(days=1)),
+            [{'dia': timezone.now().date(), 'actor_id': self.admin.pk, 'total': 3}],
+        )
+
+        # El historial solo se agrega.
+        transicion = transiciones.first()
+        transicion.motivo = "Otro"
+        with self.assertRaises(ValueError):
+            transicion.save()
+
+
+class BloqueoOptimistaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estatus = {codigo: EstatusBeca.objects.get_or_create(nombre=nombre)[0] for codigo, nombre in EstatusBeca.NOMBRES.items()}
+        cls.admin = User.objects.create_superuser('admin_version', 'admin@example.com', 'clave')
+        cls.solicitante = User.objects.create_user('solicitante_version', 'user@example.com', 'clave')
+
+    def setUp(self):
+        EstatusBeca.invalidar_registro()
+        self.solicitud = Solicitud.objects.create(user=self.solicitante, estatus_beca=self.estatus[EstatusBeca.EN_PROCESO])
+        self.client.force_login(self.admin)
+
+    def _gestionar(self, accion, version, **datos):
+        url = reverse('gestionar_solicitud', kwargs={'solicitud_id': self.solicitud.pk, 'accion': accion})
+        return self.client.post(url, {'version': version, **datos}, follow=True)
+
+    def test_gana_el_primero_y_el_segundo_ve_el_conflicto(self):
+        # Dos analistas abren la solicitud en la misma versión.
+        version = self.solicitud.version
+        self._gestionar('rechazar', version, motivo_select="Documentos ilegibles")
+        respuesta = self._gestionar('aprobar', version)
+
+        self.solicitud.refresh_from_db()
+        self.assertEqual(self.solicitud.estatus_beca, self.estatus[EstatusBeca.RECHAZADA])
+        self.assertEqual(self.solicitud.motivo_rechazo, "Motivo Principal: Documentos ilegibles")
+        self.assertEqual(self.solicitud.version, version + 1)
+        avisos = [str(m) for m in respuesta.context['messages'] if m.level == message_constants.WARNING]
+        self.assertEqual(len(avisos), 1)
+        self.assertIn("Rechazada", avisos[0])
+        self.assertEqual(self.solicitud.transiciones.count(), 1)
+
+        # Con la versión actual sí se aplica, y el resumen del dashboard sigue cuadrando.
+        self._gestionar('aprobar', self.solicitud.version)
+        self.solicitud.refresh_from_db()
+        self.assertEqual(self.solicitud.estatus_beca, self.estatus[EstatusBeca.APROBADA])
+        self.assertEqual(self.solicitud.version, version + 2)
+        actuales = set(EstadisticaSolicitud.objects.exclude(total=0).values_list('dimension', 'periodo', 'fecha', 'valor', 'total'))
+        EstadisticaSolicitud.reconstruir()
+        self.assertEqual(actuales, set(EstadisticaSolicitud.objects.exclude(total=0).values_list('dimension', 'periodo', 'fecha', 'valor', 'total')))
+
+    def test_update_solo_escribe_los_campos_cambiados(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self._gestionar('aprobar', self.solicitud.version)
+        tabla = Solicitud._meta.db_table
+        updates = [c['sql'] for c in consultas if c['sql'].startswith(f'UPDATE "{tabla}"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"cedula"', updates[0])
+        self.assertIn('"version"', updates[0].split('WHERE')[1])
+
+    def test_save_aumenta_la_version(self):
+        self.solicitud.telefono_becario = '04141234567'
+        self.solicitud.save(update_fields=['telefono_becario'])
+        self.solicitud.refresh_from_db()
+        self.assertEqual(self.solicitud.version, 1)
+
+
+class ColaRevisionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estatus = {codigo: EstatusBeca.objects.get_or_create(nombre=nombre)[0] for codigo, nombre in EstatusBeca.NOMBRES.items()}
+        cls.analista_a = User.objects.create_superuser('analista_a', 'a@example.com', 'clave')
+        cls.analista_b = User.objects.create_superuser('analista_b', 'b@example.com', 'clave')
+        cls.solicitante = User.objects.create_user('solicitante_cola', 'user@example.com', 'clave')
+
+    def setUp(self):
+        EstatusBeca.invalidar_registro()
+        self.pendientes = [
+            Solicitud.objects.create(user=self.solicitante, estatus_beca=self.estatus[EstatusBeca.EN_PROCESO]).id_solicitud
+            for _ in range(5)
+        ]
+        Solicitud.objects.create(user=self.solicitante, estatus_beca=self.estatus[EstatusBeca.APROBADA])
+
+    def test_cada_analista_recibe_solicitudes_distintas(self):
+        tomadas_a = tomar_solicitudes(self.analista_a, 2)
+        tomadas_b = tomar_solicitudes(self.analista_b, 10)
+        # Las más antiguas primero, sin repetir y solo las pendientes.
+        self.assertEqual(tomadas_a, self.pendientes[:2])
+        self.assertEqual(tomadas_b, self.pendientes[2:])
+        self.assertEqual(tomar_solicitudes(self.analista_a, 1), [])
+        self.assertEqual(set(reservadas(self.analista_b).values_list('id_solicitud', flat=True)), set(self.pendientes[2:]))
+
+    @override_settings(COLA_REVISION_MAX_RESERVADAS=3)
+    def test_limite_de_reservas_por_analista(self):
+        self.assertEqual(tomar_solicitudes(self.analista_a, 2), self.pendientes[:2])
+        # Tomar otra vez solo completa el límite; las demás quedan para otros analistas.
+        self.assertEqual(tomar_solicitudes(self.analista_a, 2), self.pendientes[2:3])
+        self.assertEqual(tomar_solicitudes(self.analista_a, 1), [])
+        self.assertEqual(tomar_solicitudes(self.analista_b, 5), self.pendientes[3:])
+
+        self.client.force_login(self.analista_a)
+        respuesta = self.client.post(reverse('tomar_cola_revision'), {'cantidad': 1}, follow=True)
+        self.assertIn("el máximo", [str(m) for m in respuesta.context['messages']][0])
+
+        # Las reservas vencidas y las decididas ya no cuentan.
+        Solicitud.objects.filter(id_solicitud=self.pendientes[0]).update(reservada_hasta=timezone.now() - timedelta(seconds=1))
+        Solicitud.objects.filter(id_solicitud=self.pendientes[1]).update(estatus_beca=self.estatus[EstatusBeca.APROBADA])
+        self.assertEqual(tomar_solicitudes(self.analista_a, 5), [self.pendientes[0]])
+
+    def test_reserva_vencida_vuelve_a_la_cola(self):
+        tomar_solicitudes(self.analista_a, 5)
+        Solicitud.objects.filter(id_solicitud=self.pendientes[3]).update(reservada_hasta=timezone.now() - timedelta(seconds=1))
+        self.assertFalse(reservadas(self.analista_a).filter(id_solicitud=self.pendientes[3]).exists())
+        self.assertEqual(tomar_solicitudes(self.analista_b, 5), [self.pendientes[3]])
+        self.assertEqual(Solicitud.objects.get(id_solicitud=self.pendientes[3]).revisor, self.analista_b)
+
+    def test_decidir_o_liberar_quita_la_reserva(self):
+        tomar_solicitudes(self.analista_a, 3)
+        self.client.force_login(self.analista_a)
+        self.client.get(reverse('gestionar_solicitud', kwargs={'solicitud_id': self.pendientes[0], 'accion': 'aprobar'}))
+        self.assertIsNone(Solicitud.objects.get(id_solicitud=self.pendientes[0]).revisor)
+
+        self.assertEqual(liberar_solicitudes(self.analista_a, [self.pendientes[1]]), 1)
+        self.assertEqual(list(reservadas(self.analista_a).values_list('id_solicitud', flat=True)), [self.pendientes[2]])
+        self.assertEqual(tomar_solicitudes(self.analista_b, 1), [self.pendientes[1]])
+
+    def test_la_reserva_impide_que_otro_la_gestione(self):
+        reservada = tomar_solicitudes(self.analista_a, 1)[0]
+        self.client.force_login(self.analista_b)
+
+        # No aparece en las pendientes de otro analista.
+        respuesta = self.client.get(reverse('solic_pendiente'))
+        self.assertNotIn(reservada, [s.id_solicitud for s in respuesta.context['solic_pend']])
+        self.assertEqual(len(respuesta.context['solic_pend']), 4)
+
+        # Ni uno a uno ni por lote: el conflicto se informa y la solicitud no cambia.
+        respuesta = self.client.get(reverse('gestionar_solicitud', kwargs={'solicitud_id': reservada, 'accion': 'aprobar'}), follow=True)
+        self.assertTrue(respuesta.context['reserva_ajena'])
+        avisos = [str(m) for m in respuesta.context['messages'] if m.level == message_constants.WARNING]
+        self.assertEqual(len(avisos), 1)
+        self.assertIn('analista_a', avisos[0])
+        datos = self.client.post(reverse('gestionar_solicitudes_lote', args=['aprobar']), {'ids': [reservada, self.pendientes[1]]}).json()
+        self.assertEqual(datos['resultados'][str(reservada)]['resultado'], 'reservada')
+        self.assertEqual(datos['resultados'][str(self.pendientes[1])]['resultado'], 'aplicada')
+        self.assertEqual(Solicitud.objects.get(id_solicitud=reservada).estatus_beca, self.estatus[EstatusBeca.EN_PROCESO])
+
+        # Quien la reservó sí la ve y la gestiona.
+        self.client.force_login(self.analista_a)
+        self.assertIn(reservada, [s.id_solicitud for s in self.client.get(reverse('solic_pendiente')).context['solic_pend']])
+        self.client.get(reverse('gestionar_solicitud', kwargs={'solicitud_id': reservada, 'accion': 'aprobar'}))
+        self.assertEqual(Solicitud.objects.get(id_solicitud=reservada).estatus_beca, self.estatus[EstatusBeca.APROBADA])
+
+    def test_reserva_vencida_no_impide_gestionarla(self):
+        reservada = tomar_solicitudes(self.analista_a, 1)[0]
+        Solicitud.objects.filter(id_solicitud=reservada).update(reservada_hasta=timezone.now() - timedelta(seconds=1))
+        self.client.force_login(self.analista_b)
+        self.client.get(reverse('gestionar_solicitud', kwargs={'solicitud_id': reservada, 'accion': 'aprobar'}))
+        self.assertEqual(Solicitud.objects.get(id_solicitud=reservada).estatus_beca, self.estatus[EstatusBeca.APROBADA])
+
+    def test_vistas_de_la_cola(self):
+        self.client.force_login(self.analista_a)
+        respuesta = self.client.post(reverse('tomar_cola_revision'), {'cantidad': 2}, follow=True)
+        self.assertEqual([s.id_solicitud for s in respuesta.context['solic_reservadas']], self.pendientes[:2])
+        self.assertEqual(self.client.post(reverse('tomar_cola_revision'), {'cantidad': 0}).status_code, 302)
+        self.assertEqual(reservadas(self.analista_a).count(), 2)
+
+        self.client.post(reverse('liberar_cola_revision'))
+        self.assertFalse(reservadas(self.analista_a).exists())
+
+        # Solo administradores y analistas.
+        self.client.force_login(self.solicitante)
+        self.client.post(reverse('tomar_cola_revision'), {'cantidad': 2})
+        self.assertFalse(Solicitud.objects.filter(revisor__isnull=False).exists())
+
+
+# ----------------------------------------------------------------------
+# Pruebas de la descarga de reportes Excel con la versión de los datos (views/reporte_views.py
+# y utils/export_cache.py). Los reportes se guardan en una carpeta temporal.
+class ReportesCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.beca = Becas.objects.create(nombre="Beca de prueba", descripcion="Beca de prueba")
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.carpeta, ignore_errors=True)
+        ajustes = override_settings(REPORTES_CACHE_DIR=self.carpeta)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.url = reverse('export_becas_excel')
+
+    def _descargar(self, **cabeceras):
+        respuesta = self.client.get(self.url, **cabeceras)
+        if respuesta.status_code == 200:
+            contenido = b''.join(respuesta.streaming_content)
+            respuesta.close()
+            return respuesta, contenido
+        return respuesta, None
+
+    def test_version_de_datos_al_guardar_y_eliminar(self):
+        version = VersionDatos.obtener(['becas'])['becas'][0]
+        beca = Becas.objects.create(nombre="Otra beca", descripcion="Otra beca")
+        self.assertEqual(VersionDatos.obtener(['becas'])['becas'][0], version + 1)
+        beca.nombre = "Beca renombrada"
+        beca.save()
+        self.assertEqual(VersionDatos.obtener(['becas'])['becas'][0], version + 2)
+        beca.delete()
+        self.assertEqual(VersionDatos.obtener(['becas'])['becas'][0], version + 3)
+        # Los modelos que no son fuente de ningún reporte no tienen contador.
+        Banco.objects.create(nombre="Banco de prueba")
+        self.assertEqual(VersionDatos.obtener(['banco'])['banco'], (0, None))
+
+    def test_iniciar_sesion_no_cambia_la_version_de_perfiles(self):
+        usuario = User.objects.create_user('version_perfil', 'version@example.com', 'clave-de-prueba')
+        version = VersionDatos.obtener(['profile'])['profile'][0]
+        # client.login guarda last_login (update_last_login), como un inicio de sesión real.
+        self.assertTrue(self.client.login(username='version_perfil', password='clave-de-prueba'))
+        usuario.refresh_from_db()
+        self.assertIsNotNone(usuario.last_login)
+        self.assertEqual(VersionDatos.obtener(['profile'])['profile'][0], version)
+        # Los demás cambios del usuario sí se registran (los reportes de perfiles los muestran).
+        usuario.email = 'otro@example.com'
+        usuario.save()
+        self.assertEqual(VersionDatos.obtener(['profile'])['profile'][0], version + 1)
+
+    def test_guarda_el_archivo_y_lo_reutiliza(self):
+        respuesta, contenido = self._descargar()
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('attachment; filename="reporte_becas_', respuesta['Content-Disposition'])
+        self.assertEqual(int(respuesta['Content-Length']), len(contenido))
+        self.assertIn('no-cache', respuesta['Cache-Control'])
+        hoja = openpyxl.load_workbook(io.BytesIO(contenido)).active
+        self.assertEqual(hoja['B2'].value, "Beca de prueba")
+        guardados = os.listdir(self.carpeta)
+        self.assertEqual(len(guardados), 1)
+        with open(os.path.join(self.carpeta, guardados[0]), 'rb') as archivo:
+            self.assertEqual(archivo.read(), contenido)
+
+        # Misma versión: se envía el archivo guardado, sin volver a consultar las becas.
+        with CaptureQueriesContext(connection) as consultas:
+            otra, otro_contenido = self._descargar()
+        self.assertEqual(otro_contenido, contenido)
+        self.assertEqual(otra['ETag'], respuesta['ETag'])
+        self.assertFalse([c['sql'] for c in consultas if f'"{Becas._meta.db_table}"' in c['sql']])
+
+        # Al cambiar los datos cambia el ETag y el archivo guardado reemplaza al anterior.
+        Becas.objects.create(nombre="Beca nueva", descripcion="Beca nueva")
+        nueva, nuevo_contenido = self._descargar()
+        self.assertNotEqual(nueva['ETag'], respuesta['ETag'])
+        self.assertEqual(openpyxl.load_workbook(io.BytesIO(nuevo_contenido)).active.max_row, 3)
+        self.assertEqual(len(os.listdir(self.carpeta)), 1)
+        self.assertNotIn(guardados[0], os.listdir(self.carpeta))
+
+    def test_respuestas_condicionales(self):
+        respuesta, _ = self._descargar()
+        etag, last_modified = respuesta['ETag'], respuesta['Last-Modified']
+
+        with self.assertNumQueries(1):
+            no_modificado, _ = self._descargar(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(no_modificado.status_code, 304)
+        self.assertEqual(self._descargar(HTTP_IF_MODIFIED_SINCE=last_modified)[0].status_code, 304)
+
+        # Tras un cambio, el ETag anterior ya no vale y se envía el reporte nuevo.
+        self.beca.descripcion = "Descripción nueva"
+        self.beca.save()
+        respuesta, contenido = self._descargar(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(openpyxl.load_workbook(io.BytesIO(contenido)).active['C2'].value, "Descripción nueva")
+
+
+# ----------------------------------------------------------------------
+# Pruebas de la exportación de reportes Excel en hojas de solo escritura (utils/export_excel.py).
+class ExportacionStreamingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.planteles = [
+            Plantel.objects.create(
+                nombre_plantel=f"Plantel {i}", estado_plantel="Miranda", municipio_plantel="Sucre",
+                codigo_plantel=f"S-{i}", tipo_dependencia='estadal', modalidad_principal='regular',
+            )
+            for i in range(5)
+        ]
+
+    def _leer(self, archivo):
+        with archivo:
+            return openpyxl.load_workbook(archivo).active
+
+    def test_hoja_generada_por_bloques(self):
+        estrategia = PlantelesExportStrategy()
+        avances = []
+        hoja = self._leer(estrategia.export_stream(chunk_size=2, progress_callback=avances.append))
+
+        # Se informa el avance cada 'chunk_size' filas y al terminar.
+        self.assertEqual(avances, [2, 4, 5])
+        self.assertEqual(hoja.title, "Reporte de Planteles")
+        self.assertEqual([celda.value for celda in hoja[1]], estrategia.get_headers())
+        self.assertTrue(hoja['A1'].font.bold)
+        self.assertEqual(hoja.max_row, 1 + len(self.planteles))
+        filas = [[celda.value for celda in fila] for fila in hoja.iter_rows(min_row=2)]
+        self.assertEqual(filas[0][:4], ["Plantel 0", "Miranda", "Sucre", "S-0"])
+        self.assertEqual([fila[0] for fila in filas], [plantel.nombre_plantel for plantel in self.planteles])
+
+    def test_mismas_filas_que_la_exportacion_en_memoria(self):
+        estrategia = PlantelesExportStrategy()
+        filas = list(estrategia.iter_rows(chunk_size=2))
+        self.assertEqual(len(filas), len(self.planteles))
+        self.assertEqual(filas, list(estrategia.iter_rows()))
+
+        en_memoria = [[celda.value for celda in fila] for fila in estrategia.export().active.iter_rows(min_row=2)]
+        por_bloques = [
+            [celda.value for celda in fila]
+            for fila in self._leer(get_exporter('planteles').execute_streaming_export()).iter_rows(min_row=2)
+        ]
+        self.assertEqual(en_memoria, filas)
+        self.assertEqual(por_bloques, filas)
+
+    def test_reporte_vacio(self):
+        Plantel.objects.all().delete()
+        avances = []
+        hoja = self._leer(PlantelesExportStrategy().export_stream(progress_callback=avances.append))
+        self.assertEqual(avances, [0])
+        self.assertEqual(hoja.max_row, 1)
+
+
+# Pruebas de las columnas declarativas (ExportColumn) y de la consulta del reporte de solicitudes.
+class ColumnasExportacionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estatus = {
+            nombre: EstatusBeca.objects.get_or_create(nombre=nombre)[0]
+            for nombre in ('En proceso', 'Aprobada', 'Rechazada', 'Asignada', 'Cancelada')
+        }
+        cls.beca = Becas.objects.create(nombre="Beca de prueba", descripcion="Beca de prueba")
+        cls.solicitante = User.objects.create_user('solicitante_reporte', 'user@example.com', 'clave')
+        cls.solicitante.profile.nombre_completo = "Ana"
+        cls.solicitante.profile.apellido_completo = "Pérez"
+        cls.solicitante.profile.save()
+        # Creadas en un orden distinto al del reporte.
+        cls.solicitudes = {
+            nombre: Solicitud.objects.create(user=cls.solicitante, estatus_beca=cls.estatus[nombre], beca=cls.beca, nombre_becario=nombre)
+            for nombre in ('En proceso', 'Rechazada', 'Cancelada', 'Asignada', 'Aprobada')
+        }
+        cls.segunda_aprobada = Solicitud.objects.create(user=cls.solicitante, estatus_beca=cls.estatus['Aprobada'], nombre_becario="Aprobada 2")
+        Solicitud.objects.create(estatus_beca=cls.estatus['Aprobada'], nombre_becario="Sin usuario")
+
+    def test_formato_y_valor_por_defecto(self):
+        columna = next(columna for columna in ProfilesExportStrategy.columns if columna.field == 'fecha_nacimiento')
+        self.assertEqual(columna.format(date(2024, 3, 5)), "05-03-2024")
+        self.assertEqual(columna.format(None), '')
+        # Sin formateador el valor pasa tal cual; sin 'default', None queda en None.
+        self.assertEqual(ExportColumn("Total", 'total').format(0), 0)
+        self.assertIsNone(ExportColumn("Total", 'total').format(None))
+
+    def test_anchos_y_encabezados_de_las_columnas(self):
+        estrategia = PlantelesExportStrategy()
+        self.assertEqual(estrategia.get_headers(), [columna.header for columna in PlantelesExportStrategy.columns])
+        self.assertEqual(estrategia.get_column_widths(), {numero: 30 for numero in range(1, 8)})
+        self.assertEqual(BecasExportStrategy().get_column_widths(), {3: 80})
+
+        with BecasExportStrategy().export_stream() as archivo:
+            hoja = openpyxl.load_workbook(archivo).active
+        self.assertEqual(hoja.column_dimensions['A'].width, 25)
+        self.assertEqual(hoja.column_dimensions['C'].width, 80)
+
+    def test_solicitudes_en_una_consulta_ordenadas_por_estatus(self):
+        estrategia = SolicitudesExportStrategy()
+        with self.assertNumQueries(1):
+            filas = list(estrategia.iter_rows())
+
+        # Orden de estatus_orden (CASE/WHEN en SQL) y, dentro de cada estatus, por id. Los
+        # estatus fuera de la lista y las solicitudes sin usuario no se incluyen.
+        self.assertEqual(
+            [fila[2] for fila in filas],
+            ["Asignada", "Aprobada", "Aprobada 2", "Rechazada", "En proceso"],
+        )
+        self.assertEqual(filas[0][:2], ["Ana", "Pérez"])
+        self.assertEqual(filas[0][6:], ["Beca de prueba", "Asignada"])
+        # La beca vacía (LEFT JOIN) usa el valor por defecto de la columna.
+        self.assertEqual(filas[2][6], "")
+
+
+# ----------------------------------------------------------------------
+# Pruebas de la cola de reportes en segundo plano (utils/report_jobs.py y sus vistas).
+# Los archivos generados se guardan en un MEDIA_ROOT temporal.
+class TrabajosReporteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.beca = Becas.objects.create(nombre="Beca de prueba", descripcion="Beca de prueba")
+        cls.admin = User.objects.create_superuser('admin_reportes', 'admin@example.com', 'clave')
+        cls.analista = User.objects.create_user('analista_reportes', 'analista@example.com', 'clave')
+        cls.analista.profile.is_analista_exterior = True
+        cls.analista.profile.save()
+        cls.solicitante = User.objects.create_user('solicitante_reportes', 'user@example.com', 'clave')
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=self.media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_solicitudes_duplicadas_se_unen(self):
+        trabajo = encolar_reporte('becas', self.admin)
+        self.assertEqual(encolar_reporte('becas', self.analista).pk, trabajo.pk)
+        self.assertEqual(trabajo.solicitado_por, self.admin)
+        self.assertNotEqual(encolar_reporte('planteles').pk, trabajo.pk)
+
+        # Un trabajo fallido no se reutiliza; uno de otra versión de los datos tampoco.
+        TrabajoReporte.objects.filter(pk=trabajo.pk).update(estatus=TrabajoReporte.ESTATUS_FALLIDO)
+        reintento = encolar_reporte('becas')
+        self.assertNotEqual(reintento.pk, trabajo.pk)
+        Becas.objects.create(nombre="Otra beca", descripcion="Otra beca")
+        self.assertNotEqual(encolar_reporte('becas').pk, reintento.pk)
+
+        with self.assertRaises(ValueError):
+            encolar_reporte('desconocido')
+
+    def test_tomar_siguiente_trabajo(self):
+        primero = encolar_reporte('becas')
+        segundo = encolar_reporte('planteles')
+
+        # Se toman en orden y cada uno una sola vez: el UPDATE condicional ya no coincide.
+        tomado = tomar_siguiente_trabajo()
+        self.assertEqual(tomado.pk, primero.pk)
+        self.assertEqual(tomado.estatus, TrabajoReporte.ESTATUS_EN_PROCESO)
+        self.assertIsNotNone(tomado.fecha_inicio)
+        self.assertEqual(tomar_siguiente_trabajo().pk, segundo.pk)
+        self.assertIsNone(tomar_siguiente_trabajo())
+
+        # Un trabajo en proceso por más de TRABAJO_TIMEOUT (el worker se detuvo) se vuelve a tomar.
+        TrabajoReporte.objects.filter(pk=primero.pk).update(
+            fecha_inicio=timezone.now() - TRABAJO_TIMEOUT - timedelta(seconds=1), filas_procesadas=7,
+        )
+        retomado = tomar_siguiente_trabajo()
+        self.assertEqual(retomado.pk, primero.pk)
+        self.assertEqual(retomado.filas_procesadas, 0)
+        self.assertIsNone(tomar_siguiente_trabajo())
+
+    def test_ejecutar_trabajo(self):
+        encolar_reporte('becas')
+        anterior = ejecutar_trabajo(tomar_siguiente_trabajo())
+        self.assertEqual(anterior.estatus, TrabajoReporte.ESTATUS_COMPLETADO)
+        self.assertEqual((anterior.total_filas, anterior.filas_procesadas, anterior.progreso), (1, 1, 100))
+        self.assertIsNotNone(anterior.fecha_fin)
+        with anterior.archivo.open('rb') as archivo:
+            self.assertEqual(openpyxl.load_workbook(archivo).active['B2'].value, "Beca de prueba")
+        ruta_anterior = anterior.archivo.path
+
+        # Al completar una versión más nueva se borran el trabajo y el archivo anteriores.
+        Becas.objects.create(nombre="Otra beca", descripcion="Otra beca")
+        encolar_reporte('becas')
+        nuevo = procesar_siguiente_trabajo()
+        self.assertEqual(nuevo.total_filas, 2)
+        self.assertFalse(TrabajoReporte.objects.filter(pk=anterior.pk).exists())
+        self.assertFalse(os.path.exists(ruta_anterior))
+
+    def test_trabajo_fallido(self):
+        encolar_reporte('becas')
+        with mock.patch.object(BecasExportStrategy, 'export_stream', side_effect=RuntimeError("disco lleno")):
+            with self.assertLogs('tasks.utils.report_jobs', level='ERROR'):
+                trabajo = procesar_siguiente_trabajo()
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estatus, TrabajoReporte.ESTATUS_FALLIDO)
+        self.assertEqual(trabajo.error, "disco lleno")
+        self.assertFalse(trabajo.archivo)
+        self.assertIsNotNone(trabajo.fecha_fin)
+        # El fallido no bloquea una nueva solicitud del mismo reporte.
+        self.assertNotEqual(encolar_reporte('becas').pk, trabajo.pk)
+
+    def test_vistas_de_reportes(self):
+        self.client.force_login(self.analista)
+        url = reverse('solicitar_reporte', args=['becas'])
+        respuesta = self.client.post(url)
+        self.assertEqual(respuesta.status_code, 202)
+        datos = respuesta.json()
+        self.assertEqual((datos['estatus'], datos['progreso'], datos['url_descarga']), (TrabajoReporte.ESTATUS_PENDIENTE, 0, None))
+        self.assertEqual(self.client.post(url).json()['id'], datos['id'])
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertEqual(self.client.post(reverse('solicitar_reporte', args=['desconocido'])).status_code, 400)
+
+        # Mientras no termina no se puede descargar.
+        self.assertEqual(self.client.get(reverse('descargar_reporte', args=[datos['id']])).status_code, 404)
+        procesar_siguiente_trabajo()
+        estado = self.client.get(datos['url_estado']).json()
+        self.assertEqual((estado['estatus'], estado['progreso']), (TrabajoReporte.ESTATUS_COMPLETADO, 100))
+        respuesta = self.client.get(estado['url_descarga'])
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('attachment; filename="reporte_becas_', respuesta['Content-Disposition'])
+        contenido = b''.join(respuesta.streaming_content)
+        respuesta.close()
+        self.assertEqual(openpyxl.load_workbook(io.BytesIO(contenido)).active['B2'].value, "Beca de prueba")
+
+        # Solo administradores y analistas (is_admin_or_analyst): los demás van al inicio.
+        self.client.force_login(self.solicitante)
+        for respuesta in (
+            self.client.post(url),
+            self.client.get(datos['url_estado']),
+            self.client.get(estado['url_descarga']),
+        ):
+            self.assertEqual(respuesta.status_code, 302)
+            self.assertTrue(respuesta['Location'].startswith('/?'))
+        self.assertEqual(TrabajoReporte.objects.count(), 1)
+
+
+# ----------------------------------------------------------------------
+# Pruebas del API JSON de los gráficos del dashboard y su cache (utils/estadisticas.py).
+class EstadisticaApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estatus = {codigo: EstatusBeca.objects.get_or_create(nombre=nombre)[0] for codigo, nombre in EstatusBeca.NOMBRES.items()}
+        cls.estado = Estado.objects.create(nombre="Miranda")
+        cls.municipio = Municipio.objects.create(nombre="Sucre", estado=cls.estado)
+        cls.admin = User.objects.create_superuser('admin_estadisticas', 'admin@example.com', 'clave')
+        cls.solicitante = User.objects.create_user('solicitante_estadisticas', 'user@example.com', 'clave')
+        for _ in range(2):
+            Solicitud.objects.create(user=cls.solicitante, estatus_beca=cls.estatus[EstatusBeca.EN_PROCESO], estado=cls.estado, municipio=cls.municipio)
+
+    def setUp(self):
+        EstatusBeca.invalidar_registro()
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def _url(self, grafico):
+        return reverse('estadistica_api', kwargs={'version': API_VERSION, 'grafico': grafico})
+
+    # Consultas capturadas sobre la tabla de resumen.
+    def _consultas_de_resumen(self, consultas):
+        return [c['sql'] for c in consultas if f'"{EstadisticaSolicitud._meta.db_table}"' in c['sql']]
+
+    def test_cache_por_grafico_y_filtros(self):
+        with CaptureQueriesContext(connection) as consultas:
+            primera = self.client.get(self._url('estatus')).json()
+        self.assertTrue(self._consultas_de_resumen(consultas))
+        self.assertEqual(primera, {'labels': ["En proceso"], 'data': [2]})
+
+        # Misma clave: además de la sesión y el usuario, solo se leen los contadores de VersionDatos.
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get(self._url('estatus')).json(), primera)
+
+        # Otro gráfico u otros filtros son otra clave; los filtros que el gráfico no usa, no.
+        for url, parametros in ((self._url('municipio'), {}), (self._url('estatus'), {'estado': self.estado.pk})):
+            with CaptureQueriesContext(connection) as consultas:
+                self.client.get(url, parametros)
+            self.assertTrue(self._consultas_de_resumen(consultas))
+        self.client.get(self._url('usuarios'))
+        with self.assertNumQueries(3):
+            self.client.get(self._url('usuarios'), {'estado': self.estado.pk, 'desde': '2024-01-01'})
+
+    def test_ttl_del_grafico(self):
+        for nombre in ('estatus', 'municipio'):
+            with mock.patch('tasks.utils.estadisticas.cache', wraps=cache) as cache_espia:
+                respuesta = self.client.get(self._url(nombre))
+            self.assertEqual(cache_espia.set.call_args.args[2], GRAFICOS[nombre].ttl)
+            self.assertIn(f'max-age={GRAFICOS[nombre].ttl}', respuesta['Cache-Control'])
+            self.assertIn('private', respuesta['Cache-Control'])
+
+    def test_nueva_solicitud_invalida_el_cache(self):
+        self.assertEqual(self.client.get(self._url('estatus')).json()['data'], [2])
+        self.assertEqual(self.client.get(self._url('municipio')).json()['data'], [2])
+
+        version = VersionDatos.obtener(['solicitud'])['solicitud'][0]
+        Solicitud.objects.create(user=self.solicitante, estatus_beca=self.estatus[EstatusBeca.APROBADA], municipio=self.municipio)
+        self.assertGreater(VersionDatos.obtener(['solicitud'])['solicitud'][0], version)
+
+        self.assertEqual(self.client.get(self._url('estatus')).json(), {'labels': ["En proceso", "Aprobada"], 'data': [2, 1]})
+        self.assertEqual(self.client.get(self._url('municipio')).json()['data'], [3])
+
+    def test_acceso_y_graficos_desconocidos(self):
+        self.assertEqual(self.client.get(self._url('desconocido')).status_code, 404)
+        self.assertEqual(self.client.get(reverse('estadistica_api', kwargs={'version': 'v0', 'grafico': 'estatus'})).status_code, 404)
+        self.client.force_login(self.solicitante)
+        self.assertEqual(self.client.get(self._url('estatus')).status_code, 302)
+
+
+# Pruebas de los filtros del dashboard (período, estado, beca y municipio): los totales leídos
+# de la tabla de resumen deben coincidir con contar las solicitudes directamente.
+class FiltrosEstadisticaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estatus = {codigo: EstatusBeca.objects.get_or_create(nombre=nombre)[0] for codigo, nombre in EstatusBeca.NOMBRES.items()}
+        cls.miranda = Estado.objects.create(nombre="Miranda")
+        cls.zulia = Estado.objects.create(nombre="Zulia")
+        cls.sucre = Municipio.objects.create(nombre="Sucre", estado=cls.miranda)
+        cls.maracaibo = Municipio.objects.create(nombre="Maracaibo", estado=cls.zulia)
+        cls.becas = [Becas.objects.create(nombre=f"Beca {i}", descripcion="Beca de prueba") for i in range(2)]
+        cls.admin = User.objects.create_superuser('admin_filtros', 'admin@example.com', 'clave')
+        solicitante = User.objects.create_user('solicitante_filtros', 'user@example.com', 'clave')
+
+        # Solicitudes repartidas entre días de tres meses (incluidos los extremos de cada mes).
+        dias = [date(2024, 1, 1), date(2024, 1, 15), date(2024, 1, 31), date(2024, 2, 1),
+                date(2024, 2, 14), date(2024, 2, 29), date(2024, 3, 1), date(2024, 3, 20)]
+        combinaciones = [
+            (cls.miranda, cls.sucre, cls.becas[0], EstatusBeca.EN_PROCESO),
+            (cls.miranda, cls.sucre, cls.becas[1], EstatusBeca.APROBADA),
+            (cls.zulia, cls.maracaibo, cls.becas[0], EstatusBeca.RECHAZADA),
+        ]
+        for i, dia in enumerate(dias):
+            for estado, municipio, beca, estatus in combinaciones[:1 + i % 3]:
+                solicitud = Solicitud.objects.create(
+                    user=solicitante, estado=estado, municipio=municipio, beca=beca, estatus_beca=cls.estatus[estatus],
+                )
+                Solicitud.objects.filter(pk=solicitud.pk).update(
+                    fecha_creacion=timezone.make_aware(datetime.combine(dia, time(12)))
+                )
+        # fecha_creacion se cambió con UPDATE (sin señales): se reconstruye el resumen.
+        EstadisticaSolicitud.reconstruir()
+
+    def setUp(self):
+        EstatusBeca.invalidar_registro()
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def _url(self, grafico):
+        return reverse('estadistica_api', kwargs={'version': API_VERSION, 'grafico': grafico})
+
+    def test_filtros_invalidos(self):
+        for parametros in (
+            {'desde': '2024-13-01'},
+            {'hasta': 'ayer'},
+            {'estado': 'Miranda'},
+            {'desde': '2024-03-01', 'hasta': '2024-02-01'},
+            {'desde': '2023-01-01', 'hasta': '2024-01-02'},
+        ):
+            with self.subTest(filtros=parametros):
+                respuesta = self.client.get(self._url('estatus'), parametros)
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertIn('error', respuesta.json())
+        self.assertEqual(parsear_filtros({'desde': '', 'estado': '3'}), {'estado': 3})
+
+    def test_rangos_de_meses_y_dias(self):
+        dia, mes = EstadisticaSolicitud.PERIODO_DIA, EstadisticaSolicitud.PERIODO_MES
+        # Enero y febrero completos se leen por mes; los días sueltos de los extremos, por día.
+        self.assertEqual(_rangos_periodo({'desde': date(2023, 12, 20), 'hasta': date(2024, 3, 5)}), [
+            {'periodo': mes, 'fecha__gte': date(2024, 1, 1), 'fecha__lt': date(2024, 3, 1)},
+            {'periodo': dia, 'fecha__gte': date(2023, 12, 20), 'fecha__lt': date(2024, 1, 1)},
+            {'periodo': dia, 'fecha__gte': date(2024, 3, 1), 'fecha__lte': date(2024, 3, 5)},
+        ])
+        # Rango que coincide con meses completos: sin consultas por día.
+        self.assertEqual(_rangos_periodo({'desde': date(2024, 1, 1), 'hasta': date(2024, 2, 29)}), [
+            {'periodo': mes, 'fecha__gte': date(2024, 1, 1), 'fecha__lt': date(2024, 3, 1)},
+        ])
+        # Dentro de un mismo mes (sin meses completos) todo se lee por día.
+        self.assertEqual(_rangos_periodo({'desde': date(2024, 1, 10), 'hasta': date(2024, 1, 20)}), [
+            {'periodo': dia, 'fecha__gte': date(2024, 1, 10), 'fecha__lte': date(2024, 1, 20)},
+        ])
+        self.assertEqual(_rangos_periodo({}), [{'periodo': mes}])
+        self.assertEqual(_rangos_periodo({'hasta': date(2024, 1, 31)}), [{'periodo': mes, 'fecha__lt': date(2024, 2, 1)}])
+
+    def test_totales_filtrados_coinciden_con_contar(self):
+        casos = [
+            {},
+            {'desde': '2024-01-15', 'hasta': '2024-03-01'},
+            {'desde': '2024-01-31', 'hasta': '2024-02-01'},
+            {'desde': '2024-02-01', 'hasta': '2024-02-29', 'estado': self.miranda.pk},
+            {'desde': '2024-01-02', 'beca': self.becas[0].pk},
+            {'hasta': '2024-02-14', 'municipio': self.maracaibo.pk},
+            {'estado': self.zulia.pk, 'beca': self.becas[1].pk},
+        ]
+        columnas = {'estado': 'estado_id', 'beca': 'beca_id', 'municipio': 'municipio_id'}
+        for parametros in casos:
+            with self.subTest(filtros=parametros):
+                solicitudes = Solicitud.objects.filter(**{columnas[nombre]: valor for nombre, valor in parametros.items() if nombre in columnas})
+                if 'desde' in parametros:
+                    solicitudes = solicitudes.filter(fecha_creacion__date__gte=parametros['desde'])
+                if 'hasta' in parametros:
+                    solicitudes = solicitudes.filter(fecha_creacion__date__lte=parametros['hasta'])
+                esperado = dict(solicitudes.values_list('estatus_beca__nombre').annotate(total=Count('id_solicitud')))
+
+                datos = self.client.get(self._url('estatus'), parametros).json()
+                self.assertEqual(dict(zip(datos['labels'], datos['data'])), esperado)
+                datos = self.client.get(self._url('becas'), parametros).json()
+                self.assertEqual(
+                    dict(zip(datos['labels'], datos['data'])),
+                    dict(solicitudes.values_list('beca__nombre').annotate(total=Count('id_solicitud'))),
+                )
@@ -8,6 +8,8 @@ from .views import user_solicitud_views
 from .views import admin_solicitud_views
 from .views import reporte_views
 from .views import monitoreo_views
+from .views import catalogo_views
+from .views import documento_views
 
 # ----------------------------------------------------------------------
 # Definición de patrones de URL (URLconf) 
@@ -32,6 +34,10 @@ urlpatterns = [
     path('tasks/<int:task_id>/complete', user_solicitud_views.complete_task, name='complete_task'),
     path('tasks/<int:task_id>/delete', user_solicitud_views.delete_task, name='delete_task'),
     path('solicitudes_user/<int:solicitud_id>/', user_solicitud_views.solic_details_user, name='solic_details_user'),
+    path('api/v1/catalogos/estados/<int:estado_id>/municipios/', catalogo_views.municipios_de_estado, name='municipios_de_estado'),
+    path('api/v1/catalogos/municipios/<int:municipio_id>/parroquias/', catalogo_views.parroquias_de_municipio, name='parroquias_de_municipio'),
+    path('api/v1/catalogos/municipios/<int:municipio_id>/planteles/', catalogo_views.planteles_de_municipio, name='planteles_de_municipio'),
+    path('api/v1/catalogos/planteles/buscar/', catalogo_views.buscar_planteles, name='buscar_planteles'),
 
     # 4. Solicitudes de Admin/Analista (admin_solicitud_views.py)
     path('asig_beca/', admin_solicitud_views.asig_beca, name='asig_beca'),
@@ -40,15 +46,25 @@ urlpatterns = [
     path('solic_aprobadas/', admin_solicitud_views.solic_aprobadas, name='solic_aprobadas'),
     path('solic_rechazadas/', admin_solicitud_views.solic_rechazadas, name='solic_rechazadas'),
     path('solicitudes/<int:solicitud_id>/', admin_solicitud_views.solic_details, name='solic_details'),
+    path('solicitudes/<int:solicitud_id>/documentos/<str:campo>/', documento_views.ver_documento, name='ver_documento'),
+    path('solicitudes/<int:solicitud_id>/documentos/<str:campo>/<str:rendicion>/', documento_views.ver_documento, name='ver_documento_rendicion'),
     path('asig_beca_estado/<int:solicitud_id>/', admin_solicitud_views.asig_beca_estado, name='asig_beca_estado'),
     path('solicitudes/<int:solicitud_id>/<str:accion>/', admin_solicitud_views.gestionar_solicitud, name='gestionar_solicitud'),
+    path('solicitudes/lote/<str:accion>/', admin_solicitud_views.gestionar_solicitudes_lote, name='gestionar_solicitudes_lote'),
+    path('cola_revision/', admin_solicitud_views.cola_revision, name='cola_revision'),
+    path('cola_revision/tomar/', admin_solicitud_views.tomar_cola_revision, name='tomar_cola_revision'),
+    path('cola_revision/liberar/', admin_solicitud_views.liberar_cola_revision, name='liberar_cola_revision'),
 
     # 5. Reportes y Gráficos (reporte_views.py)
     path('graf_beca/', reporte_views.graf_beca, name='estadísticas'),
+    path('api/<str:version>/estadisticas/<str:grafico>/', reporte_views.estadistica_api, name='estadistica_api'),
     path('reporte/perfiles/excel/', reporte_views.export_profiles_to_excel, name='export_profiles_excel'),
     path('reporte/becas/excel/', reporte_views.export_becas_to_excel, name='export_becas_excel'),
     path('reporte/planteles/excel/', reporte_views.export_planteles_to_excel, name='export_planteles_excel'),
     path('reporte/solicitudes/excel', reporte_views.export_solicitudes_to_excel, name='export_solicitudes_excel'),
+    path('reporte/<str:tipo_reporte>/solicitar/', reporte_views.solicitar_reporte, name='solicitar_reporte'),
+    path('reporte/trabajo/<int:trabajo_id>/', reporte_views.estado_reporte, name='estado_reporte'),
+    path('reporte/trabajo/<int:trabajo_id>/descargar/', reporte_views.descargar_reporte, name='descargar_reporte'),
 
     # 6. Monitoreo (monitoreo_views.py)
     path('ver_actividad/', monitoreo_views.ver_actividad_view, name='ver_actividad'),
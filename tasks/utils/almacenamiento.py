@@ -0,0 +1,96 @@
+# tasks/utils/almacenamiento.py
+
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+# Carpeta (dentro de MEDIA_ROOT) donde se guardan los documentos por contenido.
+RAIZ_DOCUMENTOS = 'documentos/'
+
+
+# Nombre de un archivo subido guardado por contenido: 'documentos/ab/cd/<sha256>.<extensión>'.
+_NOMBRE_POR_CONTENIDO_RE = re.compile(r'^documentos/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(\.[^./]+)?$')
+
+
+def es_por_contenido(nombre):
+    """True si 'nombre' es un archivo guardado por AlmacenamientoPorContenido."""
+    return bool(nombre) and nombre.startswith(RAIZ_DOCUMENTOS)
+
+
+def hash_de_contenido(nombre):
+    """
+    SHA-256 del contenido de un archivo subido guardado por contenido (está en su nombre), o
+    None si 'nombre' no es uno de ellos (archivos anteriores o derivados, como las miniaturas).
+    """
+    coincidencia = _NOMBRE_POR_CONTENIDO_RE.match(nombre or '')
+    return coincidencia.group(1) if coincidencia else None
+
+
+# Clase AlmacenamientoPorContenido: storage de los documentos subidos de las solicitudes.
+# Cada archivo se guarda con el SHA-256 de su contenido como nombre, repartido en carpetas por
+# sus primeros caracteres ('documentos/ab/cd/<sha256>.jpg'): subir dos veces el mismo archivo
+# no ocupa más disco, y ninguna carpeta crece tanto como para que buscar o crear un archivo
+# se vuelva lento. Como el nombre sale del contenido, no hace falta buscar uno libre.
+# Cuántas solicitudes usan cada archivo se cuenta en DocumentoAlmacenado (ver models.py): cada
+# archivo que se guarda sale con una referencia ya tomada (la del campo que lo va a usar).
+@deconstructible
+class AlmacenamientoPorContenido(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # Archivos derivados dentro de la carpeta de documentos (p. ej. las miniaturas):
+        # se guardan con su nombre, como en FileSystemStorage.
+        if es_por_contenido(name):
+            return super().get_available_name(name, max_length)
+        # Subidas: el nombre definitivo lo decide _save() a partir del contenido.
+        return name
+
+    def _save(self, name, content):
+        from ..models import DocumentoAlmacenado
+
+        if es_por_contenido(name):
+            return super()._save(name, content)
+
+        # Se calcula el hash mientras se copia el archivo a un temporal de la misma carpeta
+        # (una sola lectura del contenido); luego se renombra a su ruta definitiva.
+        carpeta = self.path(RAIZ_DOCUMENTOS)
+        os.makedirs(carpeta, exist_ok=True)
+        sha256 = hashlib.sha256()
+        referenciado = None
+        temporal = tempfile.NamedTemporaryFile(dir=carpeta, prefix='.subida-', delete=False)
+        try:
+            with temporal:
+                for chunk in content.chunks():
+                    sha256.update(chunk)
+                    temporal.write(chunk)
+            digest = sha256.hexdigest()
+            extension = os.path.splitext(name)[1].lower()
+            nombre = f"{RAIZ_DOCUMENTOS}{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+            destino = self.path(nombre)
+            # La referencia se toma antes de ver si el archivo ya existe: si otra solicitud
+            # soltaba la última referencia, su borrado termina antes (y aquí se vuelve a
+            # escribir) o ve esta referencia y no borra nada.
+            DocumentoAlmacenado.incrementar(nombre)
+            referenciado = nombre
+            if os.path.exists(destino):
+                # Mismo contenido ya guardado: no se escribe otra copia.
+                os.remove(temporal.name)
+            else:
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temporal.name, self.file_permissions_mode)
+                os.replace(temporal.name, destino)
+        except BaseException:
+            if os.path.exists(temporal.name):
+                os.remove(temporal.name)
+            if referenciado:
+                DocumentoAlmacenado.decrementar(referenciado)
+            raise
+        return nombre
+
+
+# Instancia usada por los ImageField de Solicitud.
+almacenamiento_documentos = AlmacenamientoPorContenido()
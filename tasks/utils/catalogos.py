@@ -0,0 +1,211 @@
+# tasks/utils/catalogos.py
+
+import hashlib
+import json
+import time
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models.signals import post_save, post_delete
+
+from ..models import Estado, Municipio, Parroquia, Plantel, Becas, Banco, EstatusBeca
+from .texto import normalizar
+
+# Segundos que un catálogo cargado se considera vigente. Las señales lo vacían en el proceso
+# donde se hizo el cambio; el tiempo límite hace que los demás procesos también lo vean.
+CATALOGOS_TTL = getattr(settings, 'CATALOGOS_TTL', 300)
+
+
+class Catalogo:
+    """
+    Filas de una tabla de referencia cargadas en memoria, con la etiqueta de cada opción
+    ya calculada (así Municipio y Parroquia no consultan sus relaciones al mostrarse).
+    """
+    def __init__(self, objetos):
+        self.por_pk = {obj.pk: obj for obj in objetos}
+        self.opciones = [(obj.pk, str(obj)) for obj in objetos]
+        self.cargado = time.monotonic()
+        # Catálogos dependientes: opciones por id del padre y su JSON ya serializado
+        # (se calculan la primera vez que se piden, ver opciones_de()).
+        self.grupos = None
+        self.respuestas = {}
+        # Ids de las opciones de cada padre, para validar (ver pertenece_a()).
+        self.permitidos = {}
+
+    @property
+    def vigente(self):
+        return time.monotonic() - self.cargado < CATALOGOS_TTL
+
+
+# Cómo cargar cada catálogo. El orden es el de Meta.ordering de cada modelo y
+# select_related trae lo que usa su __str__. EstatusBeca sale de su propio registro.
+CARGADORES = {
+    Estado: lambda: Estado.objects.all(),
+    Municipio: lambda: Municipio.objects.select_related('estado'),
+    Parroquia: lambda: Parroquia.objects.select_related('municipio__estado'),
+    Plantel: lambda: Plantel.objects.all(),
+    Becas: lambda: Becas.objects.all(),
+    Banco: lambda: Banco.objects.all(),
+    EstatusBeca: lambda: EstatusBeca.todos(),
+}
+
+# Catálogos cargados en este proceso, por modelo.
+_catalogos = {}
+
+
+def obtener_catalogo(modelo):
+    """Catálogo del modelo, cargándolo (una consulta) si no está en memoria o ya venció."""
+    catalogo = _catalogos.get(modelo)
+    if catalogo is None or not catalogo.vigente:
+        catalogo = Catalogo(list(CARGADORES[modelo]()))
+        _catalogos[modelo] = catalogo
+    return catalogo
+
+
+def invalidar_catalogo(modelo=None):
+    """Vacía el catálogo del modelo (o todos); se vuelve a cargar en la próxima consulta."""
+    if modelo is None:
+        _catalogos.clear()
+    else:
+        _catalogos.pop(modelo, None)
+
+
+def precargar_catalogos():
+    """
+    Carga todos los catálogos al iniciar el worker (ver djangoELearning/wsgi.py), para que
+    la primera petición no pague las consultas. Si la BD aún no está lista no hace nada.
+    """
+    try:
+        for modelo in CARGADORES:
+            obtener_catalogo(modelo)
+    except DatabaseError:
+        invalidar_catalogo()
+
+
+# ----------------------------------------------------------------------
+# Catálogos dependientes (estado -> municipio -> parroquia / plantel), usados por los
+# selects encadenados del formulario de solicitud y sus endpoints JSON.
+
+def _municipio_de_plantel():
+    """
+    Plantel guarda su estado y municipio como texto: retorna una función que da el id del
+    Municipio con ese estado y nombre. Si el municipio escrito no coincide con ninguno, da
+    ('estado', id) con el id del Estado escrito (ver _estado_de_municipio), o None si
+    tampoco el estado coincide.
+    """
+    municipios = {
+        (normalizar(municipio.estado.nombre), normalizar(municipio.nombre)): municipio.pk
+        for municipio in obtener_catalogo(Municipio).por_pk.values()
+    }
+    estados = {normalizar(estado.nombre): estado.pk for estado in obtener_catalogo(Estado).por_pk.values()}
+
+    def id_padre_de(plantel):
+        estado = normalizar(plantel.estado_plantel)
+        id_municipio = municipios.get((estado, normalizar(plantel.municipio_plantel)))
+        if id_municipio is not None:
+            return id_municipio
+        return ('estado', estados[estado]) if estado in estados else None
+    return id_padre_de
+
+def _estado_de_municipio(id_municipio):
+    """Grupo de los planteles sin municipio conocido del estado del municipio 'id_municipio'."""
+    municipio = obtener_catalogo(Municipio).por_pk.get(id_municipio)
+    return ('estado', municipio.estado_id) if municipio else None
+
+# Catálogo padre de cada catálogo dependiente, cómo obtener el id del padre de cada objeto y,
+# si lo hay, el grupo de las opciones sin padre exacto que también se ofrecen con cada padre.
+PADRES = {
+    Municipio: (Estado, lambda: attrgetter('estado_id'), None),
+    Parroquia: (Municipio, lambda: attrgetter('municipio_id'), None),
+    Plantel: (Municipio, _municipio_de_plantel, _estado_de_municipio),
+}
+
+
+def _grupos(modelo):
+    catalogo = obtener_catalogo(modelo)
+    if catalogo.grupos is None:
+        id_padre_de = PADRES[modelo][1]()
+        grupos = {}
+        for pk, etiqueta in catalogo.opciones:
+            grupos.setdefault(id_padre_de(catalogo.por_pk[pk]), []).append((pk, etiqueta))
+        catalogo.grupos = grupos
+    return catalogo
+
+def opciones_de(modelo, id_padre):
+    """
+    Opciones [(pk, etiqueta)] del catálogo dependiente 'modelo' que pertenecen a 'id_padre'
+    (ninguna si id_padre es None). Los planteles cuyo municipio escrito no coincide con
+    ninguno se ofrecen con todos los municipios de su estado; los que tampoco tienen un
+    estado conocido no se ofrecen.
+    """
+    if id_padre is None:
+        return []
+    grupos = _grupos(modelo).grupos
+    grupo_amplio = PADRES[modelo][2]
+    if grupo_amplio is None:
+        return grupos.get(id_padre, [])
+    return grupos.get(id_padre, []) + grupos.get(grupo_amplio(id_padre), [])
+
+def ids_de(modelo, id_padre):
+    """Conjunto de los ids de opciones_de(), calculado una vez por padre y guardado en el catálogo."""
+    catalogo = _grupos(modelo)
+    permitidos = catalogo.permitidos.get(id_padre)
+    if permitidos is None:
+        permitidos = catalogo.permitidos[id_padre] = frozenset(pk for pk, _ in opciones_de(modelo, id_padre))
+    return permitidos
+
+def pertenece_a(modelo, pk, id_padre):
+    """True si el objeto 'pk' del catálogo dependiente 'modelo' pertenece a 'id_padre'."""
+    return pk in ids_de(modelo, id_padre)
+
+def json_opciones_de(modelo, id_padre):
+    """opciones_de() serializado como JSON ({"opciones": [{"id", "nombre"}]}), guardado en el catálogo."""
+    catalogo = _grupos(modelo)
+    contenido = catalogo.respuestas.get(id_padre)
+    if contenido is None:
+        contenido = json.dumps({
+            'opciones': [{'id': pk, 'nombre': etiqueta} for pk, etiqueta in opciones_de(modelo, id_padre)],
+        }, ensure_ascii=False).encode('utf-8')
+        catalogo.respuestas[id_padre] = contenido
+    return contenido
+
+# Última huella calculada: (catálogos de los que se calculó, huella).
+_huella = (None, None)
+
+def huella_dependientes():
+    """
+    Huella del contenido de los catálogos dependientes. Va en la URL de los endpoints
+    ('?v='), así que el navegador puede guardarlos mucho tiempo: cuando cambian, cambia la URL.
+    Se recalcula solo cuando alguno de esos catálogos se vuelve a cargar.
+    """
+    global _huella
+    catalogos = tuple(_grupos(modelo) for modelo in PADRES)
+    calculada_de, huella = _huella
+    if calculada_de is None or any(a is not b for a, b in zip(calculada_de, catalogos)):
+        partes = [sorted(catalogo.grupos.items(), key=lambda grupo: str(grupo[0])) for catalogo in catalogos]
+        huella = hashlib.sha1(repr(partes).encode('utf-8')).hexdigest()[:12]
+        _huella = (catalogos, huella)
+    return huella
+
+
+# ----------------------------------------------------------------------
+# Cuando se edita una tabla de referencia (admin, vistas de gestión, shell) se vacía su
+# catálogo, y también los que dependen de él (Municipio y Parroquia muestran el Estado en
+# su etiqueta; los planteles se agrupan por el nombre del municipio). Se repite al
+# confirmar la transacción.
+DEPENDIENTES = {
+    Estado: (Estado, Municipio, Parroquia, Plantel),
+    Municipio: (Municipio, Parroquia, Plantel),
+}
+
+def invalidar_por_cambio(sender, **kwargs):
+    def invalidar():
+        for modelo in DEPENDIENTES.get(sender, (sender,)):
+            invalidar_catalogo(modelo)
+    invalidar()
+    transaction.on_commit(invalidar)
+
+for _modelo in CARGADORES:
+    post_save.connect(invalidar_por_cambio, sender=_modelo, dispatch_uid=f'catalogo_{_modelo._meta.model_name}_save')
+    post_delete.connect(invalidar_por_cambio, sender=_modelo, dispatch_uid=f'catalogo_{_modelo._meta.model_name}_delete')
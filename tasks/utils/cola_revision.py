@@ -0,0 +1,114 @@
+# tasks/utils/cola_revision.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import Solicitud, EstatusBeca
+
+# Tiempo que un analista tiene reservadas las solicitudes que toma. Si no las decide antes,
+# la reserva vence y vuelven a la cola para otro analista.
+RESERVA_DURACION = timedelta(minutes=30)
+
+# Máximo de solicitudes que se pueden tomar en una sola petición.
+MAX_RESERVA = 50
+
+
+def sin_reserva_ajena(usuario, ahora=None):
+    """
+    Filtro (Q) de las solicitudes que 'usuario' puede ver en la cola y gestionar: sin reserva,
+    reservadas por él o con la reserva vencida. Los comandos de views/commands.py lo agregan
+    a sus UPDATE condicionales.
+    """
+    return Q(revisor__isnull=True) | Q(revisor_id=usuario.pk) | Q(reservada_hasta__isnull=True) | Q(reservada_hasta__lte=ahora or timezone.now())
+
+
+def reservada_por_otro(solicitud, usuario, ahora=None):
+    """True si 'solicitud' tiene una reserva vigente de un analista distinto de 'usuario'."""
+    return (
+        solicitud.revisor_id is not None and solicitud.revisor_id != usuario.pk
+        and solicitud.reservada_hasta is not None and solicitud.reservada_hasta > (ahora or timezone.now())
+    )
+
+
+def disponibles(ahora=None):
+    """
+    Solicitudes en proceso sin reserva vigente (nunca tomadas, o con la reserva vencida), de
+    la más antigua a la más reciente. Recorre el índice sol_estatus_fecha_idx: las reservadas
+    que salta son, como mucho, las que tienen tomadas los analistas en ese momento.
+    """
+    ahora = ahora or timezone.now()
+    return Solicitud.objects.filter(
+        Q(reservada_hasta__isnull=True) | Q(reservada_hasta__lte=ahora),
+        estatus_beca=EstatusBeca.obtener(EstatusBeca.EN_PROCESO),
+    ).order_by('fecha_creacion', 'id_solicitud')
+
+
+def reservadas(usuario, ahora=None):
+    """Solicitudes en proceso que 'usuario' tiene reservadas (reserva vigente)."""
+    return Solicitud.objects.filter(
+        revisor=usuario,
+        reservada_hasta__gt=ahora or timezone.now(),
+        estatus_beca=EstatusBeca.obtener(EstatusBeca.EN_PROCESO),
+    )
+
+
+def reservas_disponibles(usuario, ahora=None):
+    """
+    Cuántas solicitudes más puede reservar 'usuario': settings.COLA_REVISION_MAX_RESERVADAS
+    menos las que ya tiene reservadas (reserva vigente).
+    """
+    return max(settings.COLA_REVISION_MAX_RESERVADAS - reservadas(usuario, ahora).count(), 0)
+
+
+def tomar_solicitudes(usuario, cantidad):
+    """
+    Reserva para 'usuario', hasta dentro de RESERVA_DURACION, las 'cantidad' solicitudes
+    disponibles más antiguas, y retorna sus ids (menos si no quedan, o si con ellas tendría más
+    de settings.COLA_REVISION_MAX_RESERVADAS reservadas). Dos analistas nunca reciben la misma: en las bases de datos que lo permiten (PostgreSQL, MySQL, Oracle) las
+    filas se bloquean con SELECT ... FOR UPDATE SKIP LOCKED, que salta las que otro analista
+    está tomando en ese momento; en SQLite cada una se reserva con un UPDATE condicional
+    (como tomar_trabajos en utils/document_jobs.py).
+    """
+    ahora = timezone.now()
+    cantidad = min(cantidad, reservas_disponibles(usuario, ahora))
+    if cantidad <= 0:
+        return []
+    campos = {'revisor': usuario, 'reservada_hasta': ahora + RESERVA_DURACION}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(disponibles(ahora).select_for_update(skip_locked=True).values_list('id_solicitud', flat=True)[:cantidad])
+            Solicitud.objects.filter(id_solicitud__in=ids).update(**campos)
+        return ids
+
+    tomados = []
+    vistos = set()
+    while len(tomados) < cantidad:
+        candidatos = list(
+            disponibles(ahora).exclude(id_solicitud__in=vistos).values_list('id_solicitud', flat=True)[:(cantidad - len(tomados)) * 2]
+        )
+        if not candidatos:
+            break
+        for solicitud_id in candidatos:
+            vistos.add(solicitud_id)
+            # Solo se reserva si sigue disponible: si otro analista la tomó primero, no cambia nada.
+            if disponibles(ahora).filter(id_solicitud=solicitud_id).update(**campos):
+                tomados.append(solicitud_id)
+                if len(tomados) == cantidad:
+                    break
+    return tomados
+
+
+def liberar_solicitudes(usuario, ids=None):
+    """
+    Devuelve a la cola las solicitudes que 'usuario' tiene reservadas (solo las de 'ids', si
+    se indican). Retorna cuántas liberó.
+    """
+    solicitudes = Solicitud.objects.filter(revisor=usuario, reservada_hasta__isnull=False)
+    if ids is not None:
+        solicitudes = solicitudes.filter(id_solicitud__in=ids)
+    return solicitudes.update(revisor=None, reservada_hasta=None)
@@ -0,0 +1,87 @@
+# tasks/utils/division_territorial.py
+
+import json
+import os
+
+from django.db import transaction
+
+from ..models import Estado, Municipio, Parroquia
+from .catalogos import DEPENDIENTES, invalidar_catalogo
+from .texto import normalizar
+
+# Archivo con la división territorial incluida en la aplicación:
+# {"Estado": {"Municipio": ["Parroquia", ...], ...}, ...}. Los nombres de los estados son los
+# de Plantel.ESTADO_CHOICES (así los planteles se asocian a sus municipios, ver catalogos.py).
+ARCHIVO_DIVISION_TERRITORIAL = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'division_territorial.json')
+
+
+def leer_division_territorial(ruta=ARCHIVO_DIVISION_TERRITORIAL):
+    """Datos {estado: {municipio: [parroquias]}} del archivo JSON; ValueError si no tiene esa forma."""
+    with open(ruta, encoding='utf-8') as archivo:
+        datos = json.load(archivo)
+    if not isinstance(datos, dict) or not all(isinstance(municipios, dict) for municipios in datos.values()):
+        raise ValueError("El archivo debe tener la forma {estado: {municipio: [parroquias]}}.")
+    return datos
+
+
+def _crear_faltantes(modelo, campo_padre, existentes, filas):
+    """
+    Crea con un bulk_create las 'filas' {(id_padre, nombre normalizado): valores} que no están
+    en 'existentes' (mismas llaves) y las agrega con su id. Retorna la cantidad creada.
+    """
+    faltantes = [valores for llave, valores in filas.items() if llave not in existentes]
+    if faltantes:
+        modelo.objects.bulk_create([modelo(**valores) for valores in faltantes])
+        # Se vuelven a leer los ids (no todas las bases de datos los retornan en bulk_create).
+        columnas = ('id', 'nombre') + ((f'{campo_padre}_id',) if campo_padre else ())
+        for pk, nombre, *padre in modelo.objects.filter(nombre__in={valores['nombre'] for valores in faltantes}).order_by().values_list(*columnas):
+            existentes.setdefault((padre[0] if padre else None, normalizar(nombre)), pk)
+    return len(faltantes)
+
+
+def cargar_division_territorial(datos):
+    """
+    Carga los estados, municipios y parroquias de 'datos' (ver leer_division_territorial())
+    en una transacción, con un bulk_create por tabla: los ids de los padres se resuelven en
+    memoria. Los que ya existen (mismo nombre sin importar acentos ni mayúsculas, dentro del
+    mismo padre) no se duplican ni se modifican, así que se puede ejecutar varias veces.
+    Retorna {modelo: cantidad creada}.
+    """
+    with transaction.atomic():
+        estados = {(None, normalizar(nombre)): pk for pk, nombre in Estado.objects.order_by().values_list('id', 'nombre')}
+        creados = {Estado: _crear_faltantes(Estado, None, estados, {
+            (None, normalizar(estado)): {'nombre': estado} for estado in datos
+        })}
+
+        municipios = {
+            (estado_id, normalizar(nombre)): pk
+            for pk, estado_id, nombre in Municipio.objects.order_by().values_list('id', 'estado_id', 'nombre')
+        }
+        filas = {}
+        for estado, municipios_del_estado in datos.items():
+            id_estado = estados[(None, normalizar(estado))]
+            for municipio in municipios_del_estado:
+                filas[(id_estado, normalizar(municipio))] = {'nombre': municipio, 'estado_id': id_estado}
+        creados[Municipio] = _crear_faltantes(Municipio, 'estado', municipios, filas)
+
+        parroquias = {
+            (municipio_id, normalizar(nombre)): pk
+            for pk, municipio_id, nombre in Parroquia.objects.order_by().values_list('id', 'municipio_id', 'nombre')
+        }
+        filas = {}
+        for estado, municipios_del_estado in datos.items():
+            id_estado = estados[(None, normalizar(estado))]
+            for municipio, parroquias_del_municipio in municipios_del_estado.items():
+                id_municipio = municipios[(id_estado, normalizar(municipio))]
+                for parroquia in parroquias_del_municipio:
+                    filas[(id_municipio, normalizar(parroquia))] = {'nombre': parroquia, 'municipio_id': id_municipio}
+        creados[Parroquia] = _crear_faltantes(Parroquia, 'municipio', parroquias, filas)
+
+    # bulk_create no dispara post_save: se vacían a mano los catálogos que dependen de Estado.
+    if any(creados.values()):
+        def invalidar():
+            for modelo in DEPENDIENTES[Estado]:
+                invalidar_catalogo(modelo)
+        invalidar()
+        transaction.on_commit(invalidar)
+    return creados
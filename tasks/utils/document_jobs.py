@@ -0,0 +1,162 @@
+# tasks/utils/document_jobs.py
+
+import io
+import logging
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.signals import pre_save, post_save
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from ..models import Solicitud, TrabajoDocumento, DocumentoAlmacenado
+from .almacenamiento import almacenamiento_documentos
+from .miniaturas import generar_rendiciones
+
+logger = logging.getLogger(__name__)
+
+# Tiempo máximo que un trabajo puede estar 'en_proceso' antes de considerarse abandonado
+# (por ejemplo, si el worker se detuvo a mitad del trabajo) y volver a tomarse.
+TRABAJO_TIMEOUT = timedelta(minutes=10)
+
+# Espera antes del primer reintento; se duplica en cada intento.
+ESPERA_REINTENTO = timedelta(seconds=30)
+
+# Las fotos con un lado mayor a MAX_LADO_DOCUMENTO píxeles, o de más de MAX_BYTES_DOCUMENTO,
+# se reducen y se vuelven a comprimir (un documento se lee bien a ese tamaño).
+MAX_LADO_DOCUMENTO = 2000
+MAX_BYTES_DOCUMENTO = 1024 * 1024
+CALIDAD_DOCUMENTO = 85
+
+
+# ==========================
+# 1. ENCOLAR (al guardar la solicitud)
+# ==========================
+
+# Antes de guardar una Solicitud: recuerda los documentos recién subidos (archivos aún no
+# guardados en el storage). Los cambios de estatus no encolan nada.
+def recordar_documentos_nuevos(sender, instance, **kwargs):
+    instance._documentos_nuevos = [
+        campo for campo in Solicitud.CAMPOS_DOCUMENTOS
+        if getattr(instance, campo) and not getattr(instance, campo)._committed
+    ]
+
+# Después de guardar: un trabajo por documento nuevo, en la misma transacción que la
+# solicitud (el worker solo lo ve si la solicitud se confirmó). La petición termina en
+# cuanto los archivos originales están guardados.
+def encolar_documentos_nuevos(sender, instance, **kwargs):
+    campos = getattr(instance, '_documentos_nuevos', ())
+    if campos:
+        TrabajoDocumento.objects.bulk_create([TrabajoDocumento(solicitud=instance, campo=campo) for campo in campos])
+    instance._documentos_nuevos = []
+
+pre_save.connect(recordar_documentos_nuevos, sender=Solicitud, dispatch_uid='documentos_solicitud_nuevos')
+post_save.connect(encolar_documentos_nuevos, sender=Solicitud, dispatch_uid='documentos_solicitud_encolar')
+
+
+# ==========================
+# 2. PROCESAR (el worker)
+# ==========================
+
+def tomar_trabajos(cantidad=1):
+    """
+    Reserva de forma atómica hasta 'cantidad' trabajos disponibles (pendientes cuya espera
+    ya pasó, o abandonados) y retorna sus ids. El UPDATE condicional evita que dos workers
+    tomen el mismo. Cada reserva cuenta como un intento.
+    """
+    ahora = timezone.now()
+    disponibles = TrabajoDocumento.objects.filter(
+        Q(estatus=TrabajoDocumento.ESTATUS_PENDIENTE, fecha_disponible__lte=ahora) |
+        Q(estatus=TrabajoDocumento.ESTATUS_EN_PROCESO, fecha_inicio__lt=ahora - TRABAJO_TIMEOUT)
+    ).order_by('fecha_disponible')
+
+    tomados = []
+    for trabajo_id, estatus, fecha_inicio in disponibles.values_list('id', 'estatus', 'fecha_inicio')[:cantidad * 2]:
+        if TrabajoDocumento.objects.filter(id=trabajo_id, estatus=estatus, fecha_inicio=fecha_inicio).update(
+            estatus=TrabajoDocumento.ESTATUS_EN_PROCESO,
+            fecha_inicio=timezone.now(),
+            intentos=F('intentos') + 1,
+        ):
+            tomados.append(trabajo_id)
+            if len(tomados) == cantidad:
+                break
+    return tomados
+
+
+def procesar_imagen(contenido):
+    """
+    Versión limpia del documento 'contenido' (bytes): sin metadatos (EXIF con ubicación,
+    cámara, etc.), con la orientación aplicada a los píxeles y, si es muy grande, reducida y
+    comprimida como JPEG. Retorna None si no hace falta cambiar nada.
+    """
+    imagen = Image.open(io.BytesIO(contenido))
+    metadatos = bool(imagen.getexif()) or any(clave in imagen.info for clave in ('xmp', 'comment'))
+    grande = max(imagen.size) > MAX_LADO_DOCUMENTO or len(contenido) > MAX_BYTES_DOCUMENTO
+    if imagen.format == 'JPEG' and not metadatos and not grande:
+        return None
+
+    icc_profile = imagen.info.get('icc_profile')
+    imagen = ImageOps.exif_transpose(imagen).convert('RGB')
+    imagen.thumbnail((MAX_LADO_DOCUMENTO, MAX_LADO_DOCUMENTO), Image.LANCZOS)
+    salida = io.BytesIO()
+    # Sin el parámetro exif, Pillow no copia los metadatos EXIF del original.
+    imagen.save(salida, 'JPEG', quality=CALIDAD_DOCUMENTO, optimize=True, progressive=True, icc_profile=icc_profile)
+    return salida.getvalue()
+
+
+def _procesar_documento(trabajo):
+    """Limpia el documento del trabajo, lo reemplaza en la solicitud y genera sus miniaturas."""
+    campo = Solicitud._meta.get_field(trabajo.campo)
+    nombre = Solicitud.objects.filter(pk=trabajo.solicitud_id).values_list(trabajo.campo, flat=True).first()
+    if not nombre:
+        # La solicitud ya no tiene ese documento.
+        return
+
+    with almacenamiento_documentos.open(nombre, 'rb') as original:
+        procesado = procesar_imagen(original.read())
+    if procesado is not None:
+        # Se guarda por contenido (un nombre fuera de 'documentos/' le da su ruta por hash); el
+        # storage ya toma la referencia del archivo nuevo.
+        nuevo = almacenamiento_documentos.save(f"{trabajo.campo}.jpg", ContentFile(procesado))
+        # update() no dispara las señales de Solicitud: las referencias se ajustan aquí. Solo se
+        # reemplaza si el documento no cambió mientras tanto (otra subida, otro worker).
+        with transaction.atomic():
+            reemplazado = Solicitud.objects.filter(pk=trabajo.solicitud_id, **{trabajo.campo: nombre}).update(**{trabajo.campo: nuevo})
+            if reemplazado:
+                DocumentoAlmacenado.actualizar_referencias({trabajo.campo: nombre}, {trabajo.campo: nuevo}, referenciados=(trabajo.campo,))
+            else:
+                # Se suelta la referencia del archivo nuevo (se borra si nadie más lo usa).
+                DocumentoAlmacenado.decrementar(nuevo)
+        if not reemplazado:
+            return
+        nombre = nuevo
+
+    generar_rendiciones(campo.attr_class(None, campo, nombre))
+
+
+def ejecutar_trabajo(trabajo_id):
+    """
+    Ejecuta un trabajo ya tomado (ver tomar_trabajos) y retorna su estatus final. Si falla,
+    vuelve a la cola con una espera creciente hasta agotar MAX_INTENTOS; una imagen que no
+    se puede leer falla sin reintentos.
+    """
+    trabajo = TrabajoDocumento.objects.get(id=trabajo_id)
+    try:
+        _procesar_documento(trabajo)
+    except Exception as e:
+        logger.exception("Error al procesar el documento del trabajo %s", trabajo.pk)
+        trabajo.error = str(e)
+        if trabajo.intentos < TrabajoDocumento.MAX_INTENTOS and not isinstance(e, UnidentifiedImageError):
+            trabajo.estatus = TrabajoDocumento.ESTATUS_PENDIENTE
+            trabajo.fecha_disponible = timezone.now() + ESPERA_REINTENTO * 2 ** (trabajo.intentos - 1)
+        else:
+            trabajo.estatus = TrabajoDocumento.ESTATUS_FALLIDO
+            trabajo.fecha_fin = timezone.now()
+    else:
+        trabajo.estatus = TrabajoDocumento.ESTATUS_COMPLETADO
+        trabajo.error = ''
+        trabajo.fecha_fin = timezone.now()
+    trabajo.save(update_fields=['estatus', 'error', 'fecha_disponible', 'fecha_fin'])
+    return trabajo.estatus
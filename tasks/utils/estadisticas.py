@@ -0,0 +1,317 @@
+# tasks/utils/estadisticas.py
+
+from datetime import timedelta, date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from ..models import EstadisticaSolicitud, EstatusBeca, Becas, Municipio, Parroquia, VersionDatos
+
+# Versión del formato de las respuestas del API de estadísticas (forma parte de la URL y de la clave del cache).
+API_VERSION = 'v1'
+
+# Filtros de catálogo aceptados por el API (parámetro GET -> columna de EstadisticaSolicitud).
+FILTROS_CATALOGO = {
+    'estado': 'id_estado',
+    'beca': 'id_beca',
+    'municipio': 'id_municipio',
+}
+# Días por defecto de los gráficos por fecha y máximo permitido en un rango (un período de convocatoria).
+DIAS_POR_DEFECTO = 30
+MAX_DIAS_RANGO = 366
+
+
+# ==================
+# 1. FUNCIONES HELPER
+# ==================
+
+def _parsear_fecha(valor, nombre):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise ValueError(f"El filtro '{nombre}' debe tener el formato AAAA-MM-DD.")
+
+def parsear_filtros(params):
+    """
+    Valida los filtros del dashboard recibidos por GET (desde, hasta, estado, beca, municipio).
+    Retorna un diccionario solo con los filtros presentes; lanza ValueError si alguno es inválido.
+    """
+    filtros = {}
+    for nombre in ('desde', 'hasta'):
+        if params.get(nombre):
+            filtros[nombre] = _parsear_fecha(params[nombre], nombre)
+    for nombre in FILTROS_CATALOGO:
+        if params.get(nombre):
+            try:
+                filtros[nombre] = int(params[nombre])
+            except ValueError:
+                raise ValueError(f"El filtro '{nombre}' debe ser un ID numérico.")
+
+    if 'desde' in filtros and 'hasta' in filtros:
+        if filtros['desde'] > filtros['hasta']:
+            raise ValueError("La fecha 'desde' no puede ser posterior a la fecha 'hasta'.")
+        if (filtros['hasta'] - filtros['desde']).days >= MAX_DIAS_RANGO:
+            raise ValueError(f"El rango de fechas no puede superar {MAX_DIAS_RANGO} días.")
+    return filtros
+
+def _primer_dia_mes_siguiente(fecha):
+    return (fecha.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def _rangos_periodo(filtros, por_dia=False):
+    """
+    Divide el rango de fechas de los filtros en consultas sobre EstadisticaSolicitud:
+    los meses completos se leen de las filas por mes y solo los días sueltos de los
+    extremos se leen de las filas por día. Con 'por_dia' todo el rango se lee por día
+    (gráficos que agrupan por fecha). Retorna una lista de filtros (kwargs) por consulta.
+    """
+    desde = filtros.get('desde')
+    hasta = filtros.get('hasta')
+    if por_dia:
+        rango = {'periodo': EstadisticaSolicitud.PERIODO_DIA}
+        if desde:
+            rango['fecha__gte'] = desde
+        if hasta:
+            rango['fecha__lte'] = hasta
+        return [rango]
+
+    # Meses completos dentro del rango: [inicio_meses, fin_meses) (None = sin límite).
+    inicio_meses = None
+    if desde:
+        inicio_meses = desde if desde.day == 1 else _primer_dia_mes_siguiente(desde)
+    fin_meses = None
+    if hasta:
+        siguiente = hasta + timedelta(days=1)
+        fin_meses = siguiente if siguiente.day == 1 else hasta.replace(day=1)
+
+    if inicio_meses and fin_meses and inicio_meses >= fin_meses:
+        # El rango no contiene ningún mes completo.
+        return _rangos_periodo(filtros, por_dia=True)
+
+    meses = {'periodo': EstadisticaSolicitud.PERIODO_MES}
+    if inicio_meses:
+        meses['fecha__gte'] = inicio_meses
+    if fin_meses:
+        meses['fecha__lt'] = fin_meses
+    rangos = [meses]
+    if desde and desde < inicio_meses:
+        rangos.append({'periodo': EstadisticaSolicitud.PERIODO_DIA, 'fecha__gte': desde, 'fecha__lt': inicio_meses})
+    if hasta and fin_meses <= hasta:
+        rangos.append({'periodo': EstadisticaSolicitud.PERIODO_DIA, 'fecha__gte': fin_meses, 'fecha__lte': hasta})
+    return rangos
+
+def _sumar_estadisticas(dimension, agrupar='valor', filtros=None, por_dia=False):
+    """
+    Suma los totales de una dimensión de EstadisticaSolicitud agrupados por 'agrupar'
+    ('valor' de la dimensión o una columna como 'id_beca', 'id_municipio' o 'fecha').
+    Retorna una lista de (valor, total) ordenada de mayor a menor, sin totales en cero.
+    'filtros' son filtros del API (ver parsear_filtros).
+    """
+    filtros = filtros or {}
+    qs = EstadisticaSolicitud.objects.filter(
+        dimension=dimension,
+        **{columna: filtros[nombre] for nombre, columna in FILTROS_CATALOGO.items() if nombre in filtros}
+    )
+    totales = {}
+    for rango in _rangos_periodo(filtros, por_dia):
+        agregados = qs.filter(**rango).values(agrupar).annotate(cantidad=Sum('total')).order_by()
+        for valor, cantidad in agregados.values_list(agrupar, 'cantidad'):
+            totales[valor] = totales.get(valor, 0) + cantidad
+    return sorted(
+        ((valor, cantidad) for valor, cantidad in totales.items() if cantidad > 0),
+        key=lambda item: (-item[1], item[0]),
+    )
+
+def _sumar_por_id(dimension, agrupar='valor', filtros=None):
+    """Como _sumar_estadisticas, pero con los valores convertidos a ID (int) y sin el 0 (sin dato)."""
+    por_id = [(int(valor), cantidad) for valor, cantidad in _sumar_estadisticas(dimension, agrupar, filtros)]
+    return sorted(((id_valor, cantidad) for id_valor, cantidad in por_id if id_valor), key=lambda item: (-item[1], item[0]))
+
+def _top_catalogo(dimension, agrupar, modelo, limite, filtros=None):
+    """Top 'limite' de una dimensión de catálogo (ID != 0), con los nombres del catálogo."""
+    top = _sumar_por_id(dimension, agrupar, filtros)[:limite]
+    nombres = dict(modelo.objects.filter(pk__in=[id_catalogo for id_catalogo, _ in top]).values_list('pk', 'nombre'))
+    top = [(nombres[id_catalogo], cantidad) for id_catalogo, cantidad in top if id_catalogo in nombres]
+    return {
+        'labels': [nombre for nombre, _ in top],
+        'data': [cantidad for _, cantidad in top],
+    }
+
+def _rango_fechas(filtros):
+    """
+    Rango (desde, hasta) de los gráficos por fecha y sus etiquetas (YYYY-MM-DD), un día por etiqueta.
+    Sin filtros de fecha son los últimos 30 días; con uno solo, se completa con 30 días.
+    """
+    hasta = filtros.get('hasta')
+    desde = filtros.get('desde')
+    if hasta is None:
+        hasta = desde + timedelta(days=DIAS_POR_DEFECTO - 1) if desde else timezone.localdate()
+    if desde is None:
+        desde = hasta - timedelta(days=DIAS_POR_DEFECTO - 1)
+    all_dates_in_range = [(desde + timedelta(days=i)) for i in range((hasta - desde).days + 1)]
+    return desde, hasta, [d.strftime('%Y-%m-%d') for d in all_dates_in_range]
+
+
+# ==========================================
+# 2. DATOS DE CADA GRÁFICO (del dashboard)
+# ==========================================
+
+def estadistica_estatus(filtros):
+    """Solicitudes por Estatus."""
+    estatus_nombres = {estatus.pk: estatus.nombre for estatus in EstatusBeca.todos()}
+    solicitudes_por_estatus = [
+        (estatus_nombres[id_estatus], cantidad)
+        for id_estatus, cantidad in _sumar_por_id('estatus', filtros=filtros)
+        if id_estatus in estatus_nombres
+    ]
+    return {
+        'labels': [nombre for nombre, _ in solicitudes_por_estatus],
+        'data': [cantidad for _, cantidad in solicitudes_por_estatus],
+    }
+
+def estadistica_fecha(filtros):
+    """Solicitudes por Fecha (Últimos 30 días o el rango filtrado)."""
+    desde, hasta, labels_fecha = _rango_fechas(filtros)
+    solicitudes_por_fecha = _sumar_estadisticas('total', 'fecha', dict(filtros, desde=desde, hasta=hasta), por_dia=True)
+
+    data_fecha_dict = {str(fecha): cantidad for fecha, cantidad in solicitudes_por_fecha}
+    return {
+        'labels': labels_fecha,
+        'data': [data_fecha_dict.get(date_str, 0) for date_str in labels_fecha],
+    }
+
+def estadistica_usuarios_fecha(filtros):
+    """Usuarios Registrados por Fecha (Últimos 30 días o el rango filtrado)."""
+    desde, hasta, labels_fecha = _rango_fechas(filtros)
+    usuarios_por_fecha = User.objects.filter(
+        date_joined__date__range=(desde, hasta)
+    ).values('date_joined__date').annotate(count=Count('id')).order_by('date_joined__date')
+
+    data_usuarios_fecha_dict = {str(item['date_joined__date']): item['count'] for item in usuarios_por_fecha}
+    return {
+        'labels': labels_fecha,
+        'data': [data_usuarios_fecha_dict.get(date_str, 0) for date_str in labels_fecha],
+    }
+
+def estadistica_becas(filtros):
+    """Becas Más Solicitadas (Top 5)."""
+    return _top_catalogo('total', 'id_beca', Becas, 5, filtros)
+
+def estadistica_municipio(filtros):
+    """Solicitudes por Municipio (Top 10)."""
+    return _top_catalogo('total', 'id_municipio', Municipio, 10, filtros)
+
+def estadistica_parroquia(filtros):
+    """Solicitudes por Parroquia (Top 10)."""
+    return _top_catalogo('parroquia', 'valor', Parroquia, 10, filtros)
+
+def estadistica_genero(filtros):
+    """Solicitudes por Género."""
+    etiquetas = {'M': 'Masculino', 'F': 'Femenino'}
+    solicitudes_por_genero = [(genero, cantidad) for genero, cantidad in _sumar_estadisticas('genero', filtros=filtros) if genero in etiquetas]
+    return {
+        'labels': [etiquetas[genero] for genero, _ in solicitudes_por_genero],
+        'data': [cantidad for _, cantidad in solicitudes_por_genero],
+    }
+
+def estadistica_edad(filtros):
+    """
+    Solicitudes por Rango de Edad. La edad se calcula como año actual - año de nacimiento
+    a partir del año de nacimiento guardado en el resumen.
+    """
+    today_date = date.today()
+    rangos_edad_data = {'r18_24': 0, 'r25_34': 0, 'r35_mas': 0, 'r_menor': 0}
+
+    for anio_nacimiento, cantidad in _sumar_por_id('anio', filtros=filtros):
+        age = today_date.year - anio_nacimiento
+        if 18 <= age <= 24:
+            rangos_edad_data['r18_24'] += cantidad
+        elif 25 <= age <= 34:
+            rangos_edad_data['r25_34'] += cantidad
+        elif age >= 35:
+            rangos_edad_data['r35_mas'] += cantidad
+        elif 0 <= age < 18:
+            rangos_edad_data['r_menor'] += cantidad
+
+    labels_edad = ['18-24 años', '25-34 años', '35+ años', 'Menor de 18']
+    data_edad = [
+        rangos_edad_data['r18_24'],
+        rangos_edad_data['r25_34'],
+        rangos_edad_data['r35_mas'],
+        rangos_edad_data['r_menor']
+    ]
+
+    if data_edad[-1] == 0 and len(data_edad) > 1:
+        labels_edad.pop()
+        data_edad.pop()
+
+    return {'labels': labels_edad, 'data': data_edad}
+
+def estadistica_usuarios(filtros):
+    """Conteo de usuarios por tipo (Datos para la tarjeta de resumen, no usa filtros)."""
+    return {
+        'total_usuarios': User.objects.count(),
+        'analistas_bienestar': User.objects.filter(is_superuser=True).count(),
+        'analistas_exterior': User.objects.filter(profile__is_analista_exterior=True).count(),
+        'solicitantes': User.objects.filter(is_superuser=False).exclude(profile__is_analista_exterior=True).count(),
+    }
+
+
+# ===========================================
+# 3. REGISTRO DE GRÁFICOS Y CACHE DEL SERVIDOR
+# ===========================================
+
+class GraficoEstadistica:
+    """
+    Describe un gráfico del API: la función que calcula sus datos, el tiempo de vida
+    de su cache (TTL, en segundos), los modelos (VersionDatos) cuyos cambios lo invalidan
+    y los filtros que acepta (los demás se ignoran y no fragmentan el cache).
+    """
+    def __init__(self, calcular, ttl, data_sources=(), filtros=()):
+        self.calcular = calcular
+        self.ttl = ttl
+        self.data_sources = data_sources
+        self.filtros = filtros
+
+# Filtros de los gráficos basados en EstadisticaSolicitud y de los gráficos de usuarios.
+FILTROS_SOLICITUDES = ('desde', 'hasta') + tuple(FILTROS_CATALOGO)
+FILTROS_FECHA = ('desde', 'hasta')
+
+# Los gráficos de solicitudes se invalidan al cambiar las solicitudes o los perfiles
+# (género y edad); los de usuarios dependen de 'profile', que se guarda con cada User.
+GRAFICOS = {
+    'estatus': GraficoEstadistica(estadistica_estatus, 300, ('solicitud', 'estatusbeca'), FILTROS_SOLICITUDES),
+    'fecha': GraficoEstadistica(estadistica_fecha, 300, ('solicitud',), FILTROS_SOLICITUDES),
+    'becas': GraficoEstadistica(estadistica_becas, 600, ('solicitud', 'becas'), FILTROS_SOLICITUDES),
+    'municipio': GraficoEstadistica(estadistica_municipio, 600, ('solicitud',), FILTROS_SOLICITUDES),
+    'parroquia': GraficoEstadistica(estadistica_parroquia, 600, ('solicitud',), FILTROS_SOLICITUDES),
+    'genero': GraficoEstadistica(estadistica_genero, 600, ('solicitud', 'profile'), FILTROS_SOLICITUDES),
+    'edad': GraficoEstadistica(estadistica_edad, 600, ('solicitud', 'profile'), FILTROS_SOLICITUDES),
+    'usuarios_fecha': GraficoEstadistica(estadistica_usuarios_fecha, 300, ('profile',), FILTROS_FECHA),
+    'usuarios': GraficoEstadistica(estadistica_usuarios, 300, ('profile',)),
+}
+
+def obtener_estadistica(nombre, filtros=None):
+    """
+    Retorna los datos de un gráfico usando el cache del servidor.
+    La clave incluye la versión del API, el día actual, los filtros que aplican al gráfico
+    y los contadores de VersionDatos de sus modelos fuente, así que un cambio en los datos
+    invalida la entrada de inmediato; el TTL cubre los catálogos que no se versionan
+    (ej. nombres de municipios).
+    """
+    grafico = GRAFICOS.get(nombre)
+    if grafico is None:
+        raise ValueError(f"Gráfico de estadísticas desconocido: {nombre}")
+
+    filtros = {clave: valor for clave, valor in (filtros or {}).items() if clave in grafico.filtros}
+    versiones = VersionDatos.obtener(grafico.data_sources)
+    huella = "-".join(f"{fuente}:{versiones[fuente][0]}" for fuente in grafico.data_sources)
+    huella_filtros = "&".join(f"{clave}={filtros[clave]}" for clave in sorted(filtros))
+    clave = f"estadistica:{API_VERSION}:{nombre}:{timezone.localdate().isoformat()}:{huella}:{huella_filtros}"
+
+    datos = cache.get(clave)
+    if datos is None:
+        datos = grafico.calcular(filtros)
+        cache.set(clave, datos, grafico.ttl)
+    return datos
@@ -0,0 +1,70 @@
+# tasks/utils/export_cache.py
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+
+# Extensión de los reportes guardados (el nombre es '<tipo>-<huella de la versión>.xlsx').
+EXPORT_CACHE_EXT = '.xlsx'
+
+
+def _cache_dir():
+    """Carpeta donde se guardan los reportes generados, compartida entre procesos (settings.REPORTES_CACHE_DIR)."""
+    return str(settings.REPORTES_CACHE_DIR)
+
+
+def _cache_path(report_type, version):
+    """Ruta del archivo: tipo de reporte + huella de la versión de los datos."""
+    huella = hashlib.sha1(version.encode('utf-8')).hexdigest()
+    return os.path.join(_cache_dir(), f"{report_type}-{huella}{EXPORT_CACHE_EXT}")
+
+
+def get_export_etag(report_type, version):
+    """ETag (sin comillas) que identifica el contenido de un reporte para una versión de datos."""
+    return hashlib.sha1(f"{report_type}:{version}".encode('utf-8')).hexdigest()
+
+
+def get_cached_export(report_type, version):
+    """
+    Retorna el reporte guardado para esa versión de los datos, abierto en modo binario, o
+    None. Se abre aquí (y no se retorna la ruta) porque otro proceso puede borrarlo al
+    guardar una versión más nueva: el archivo ya abierto se sigue pudiendo leer.
+    """
+    try:
+        return open(_cache_path(report_type, version), 'rb')
+    except FileNotFoundError:
+        return None
+
+
+def set_cached_export(report_type, version, archivo):
+    """
+    Guarda una copia del reporte generado ('archivo', abierto en modo binario) para esa
+    versión de los datos y retorna el archivo guardado, abierto en modo binario. Se copia a
+    un archivo temporal de la misma carpeta y se renombra, así nadie lee un reporte a medio
+    escribir. Las versiones anteriores del mismo reporte ya no se pedirán (la versión solo
+    aumenta) y se borran: la carpeta guarda un archivo por tipo de reporte.
+    """
+    carpeta = _cache_dir()
+    os.makedirs(carpeta, exist_ok=True)
+    destino = _cache_path(report_type, version)
+
+    archivo.seek(0)
+    with tempfile.NamedTemporaryFile(dir=carpeta, prefix=f'.{report_type}-', delete=False) as temporal:
+        try:
+            shutil.copyfileobj(archivo, temporal)
+        except BaseException:
+            os.unlink(temporal.name)
+            raise
+    os.replace(temporal.name, destino)
+
+    for nombre in os.listdir(carpeta):
+        ruta = os.path.join(carpeta, nombre)
+        if nombre.startswith(f'{report_type}-') and nombre.endswith(EXPORT_CACHE_EXT) and ruta != destino:
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+    return open(destino, 'rb')
@@ -1,14 +1,14 @@
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 from openpyxl.utils import get_column_letter
-import datetime
+import tempfile
 
 # Importaciones de Django para la obtención de datos y modelos
-from django.db.models import Count, Q 
-from django.contrib.auth.models import User 
+from django.db.models import QuerySet, Case, When, Value, IntegerField
 
 # Importaciones de Modelos
-from ..models import Solicitud, Profile, Becas, Plantel 
+from ..models import Solicitud, Profile, Becas, Plantel, VersionDatos
 
 # =============================
 # 1. ESTILOS Y MAPPINGS COMUNES 
@@ -17,6 +17,11 @@ from ..models import Solicitud, Profile, Becas, Plantel
 HEADER_FONT = Font(bold=True, color="FFFFFF")
 THIN_BORDER = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
 HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="center")
+# Alineación compartida por todas las celdas de datos (se crea una sola vez, no una por celda).
+ROW_ALIGNMENT = Alignment(vertical="top", wrap_text=True)
+
+# Cantidad de filas que se traen de la BD por cada consulta al iterar en modo streaming.
+STREAM_CHUNK_SIZE = 2000
 
 # Mapeos de CHOICES
 ESTADO_CHOICES = (
@@ -55,238 +60,319 @@ def _apply_row_style(sheet, row_num, col_count):
     for col_num in range(1, col_count + 1):
         cell = sheet.cell(row=row_num, column=col_num)
         cell.border = THIN_BORDER
-        cell.alignment = Alignment(vertical="top", wrap_text=True)
+        cell.alignment = ROW_ALIGNMENT
+
+def _write_only_row(sheet, values, font=None, fill=None, alignment=ROW_ALIGNMENT):
+    """
+    Función helper que construye una fila de celdas WriteOnlyCell con estilos compartidos.
+    Se usa en las hojas de solo escritura, donde no se puede modificar una celda después de agregarla.
+    """
+    row = []
+    for value in values:
+        cell = WriteOnlyCell(sheet, value=value)
+        cell.border = THIN_BORDER
+        cell.alignment = alignment
+        if font is not None:
+            cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        row.append(cell)
+    return row
 
 
 # ==========================================
-# 2. INTERFAZ DE ESTRATEGIA (ExportStrategy)
+# 2. COLUMNAS DECLARATIVAS (ExportColumn)
 # ==========================================
 
-class ExportStrategy:
-    """Clase base (Interfaz) para todas las estrategias de exportación."""
-    def export(self):
-        """Método que debe ser implementado por las estrategias concretas."""
-        raise NotImplementedError("La subclase debe implementar el método export()")
+def _format_fecha(value):
+    """Formatea una fecha como dd-mm-YYYY (cadena vacía si no hay fecha)."""
+    return value.strftime('%d-%m-%Y') if value else ''
 
-    def get_headers(self):
-        """Define los encabezados específicos de la exportación."""
-        raise NotImplementedError("La subclase debe definir los encabezados.")
+def _map_choice(mapping):
+    """Retorna un formateador que traduce un valor de CHOICES a su etiqueta legible."""
+    return lambda value: mapping.get(value, value)
 
-    def get_data(self):
-        """Consulta y prepara los datos del modelo."""
+
+class ExportColumn:
+    """
+    Describe una columna del reporte: su encabezado, el campo (lookup del ORM) que
+    se consulta con values_list, el ancho en la hoja y un formateador opcional.
+    Si el valor es None se usa 'default' (útil para relaciones vacías en un LEFT JOIN).
+    """
+    def __init__(self, header, field, width=None, formatter=None, default=None):
+        self.header = header
+        self.field = field
+        self.width = width
+        self.formatter = formatter
+        self.default = default
+
+    def format(self, value):
+        if value is None:
+            return self.default
+        if self.formatter is not None:
+            return self.formatter(value)
+        return value
+
+
+# ==========================================
+# 3. INTERFAZ DE ESTRATEGIA (ExportStrategy)
+# ==========================================
+
+class ExportStrategy:
+    """
+    Clase base (Interfaz) para todas las estrategias de exportación.
+    Cada estrategia concreta declara sus 'columns' y su consulta base (get_queryset);
+    la base se encarga de traer solo esas columnas con values_list, sin instanciar modelos.
+    """
+    # Color de relleno del encabezado de la hoja.
+    header_fill_color = "4CAF50"
+    # Lista de ExportColumn que define el reporte.
+    columns = []
+    # Modelos (model_name) cuyos cambios alteran el contenido del reporte.
+    data_sources = ()
+
+    def get_queryset(self):
+        """Consulta base (filtros y orden) del reporte."""
         raise NotImplementedError("La subclase debe implementar la lógica de consulta.")
 
     def get_title(self):
         """Define el título de la hoja."""
         return "Reporte"
 
-
-# ========================
-# 3. ESTRATEGIAS CONCRETAS
-# ========================
-
-class ProfilesExportStrategy(ExportStrategy):
-    """Estrategia para exportar perfiles."""
-    def get_title(self):
-        return "Reporte de Solicitantes"
-    
     def get_headers(self):
-        return [
-            "ID de Usuario", "Nombre de Usuario", "Correo Electrónico",
-            "Nombre Completo", "Apellido Completo", "Cédula de Identidad",
-            "Edad", "Género", "Fecha de Nacimiento", "Número de Teléfono"
-        ]
-        
+        """Define los encabezados específicos de la exportación."""
+        return [column.header for column in self.columns]
+
+    def get_column_widths(self):
+        """Anchos específicos por número de columna (los demás quedan en 25)."""
+        return {
+            col_num: column.width
+            for col_num, column in enumerate(self.columns, 1)
+            if column.width is not None
+        }
+
+    def get_data_state(self):
+        """
+        Huella barata de los datos del reporte, armada con los contadores de VersionDatos
+        de sus modelos fuente. No recorre las tablas.
+        Retorna (version, ultima_modificacion), ej. ('solicitud:12-profile:4', datetime).
+        """
+        versiones = VersionDatos.obtener(self.data_sources)
+        version = "-".join(f"{nombre}:{versiones[nombre][0]}" for nombre in self.data_sources)
+        fechas = [fecha for _, fecha in versiones.values() if fecha is not None]
+        return version, max(fechas) if fechas else None
+
+    def get_data_version(self):
+        """Versión actual de los datos del reporte (ver get_data_state)."""
+        return self.get_data_state()[0]
+
     def get_data(self):
-        return Profile.objects.filter(is_analista_exterior=False).select_related('user').exclude(user__is_superuser=True)
-    
+        """Consulta solo los campos declarados en las columnas, como tuplas."""
+        fields = [column.field for column in self.columns]
+        return self.get_queryset().values_list(*fields)
+
+    def get_row(self, values):
+        """Convierte una tupla de get_data() en la lista de valores de una fila."""
+        return [column.format(value) for column, value in zip(self.columns, values)]
+
+    def iter_data(self, chunk_size=STREAM_CHUNK_SIZE):
+        """Recorre los datos por lotes, sin cargar todo el QuerySet en memoria."""
+        data = self.get_data()
+        if isinstance(data, QuerySet):
+            return data.iterator(chunk_size=chunk_size)
+        return iter(data)
+
+    def iter_rows(self, chunk_size=STREAM_CHUNK_SIZE):
+        """Generador con las filas (listas de valores) del reporte."""
+        for item in self.iter_data(chunk_size=chunk_size):
+            yield self.get_row(item)
+
+    def _set_column_widths(self, sheet, col_count):
+        for col_num in range(1, col_count + 1):
+            sheet.column_dimensions[get_column_letter(col_num)].width = 25
+        for col_num, width in self.get_column_widths().items():
+            sheet.column_dimensions[get_column_letter(col_num)].width = width
+
     def export(self):
+        """Genera el Workbook completo en memoria (modo tradicional)."""
         workbook = openpyxl.Workbook()
         sheet = workbook.active
         sheet.title = self.get_title()
-        
+
         headers = self.get_headers()
-        _apply_header_style(sheet, headers, fill_color="4CAF50")
-        
-        # Ajustes de ancho específicos
-        sheet.column_dimensions[get_column_letter(4)].width = 35 
-        sheet.column_dimensions[get_column_letter(5)].width = 35 
-        sheet.column_dimensions[get_column_letter(3)].width = 35 
-
-        for profile in self.get_data():
-            row_data = [
-                profile.user.id,
-                profile.user.username,
-                profile.user.email,
-                profile.nombre_completo,
-                profile.apellido_completo,
-                profile.cedula_identidad,
-                profile.edad,
-                profile.genero,
-                profile.fecha_nacimiento.strftime('%d-%m-%Y') if profile.fecha_nacimiento else '',
-                profile.numero_telefono
-            ]
+        _apply_header_style(sheet, headers, fill_color=self.header_fill_color)
+        self._set_column_widths(sheet, len(headers))
+
+        for row_data in self.iter_rows():
             sheet.append(row_data)
-            _apply_row_style(sheet, sheet.max_row, len(headers))
-            
+            _apply_row_style(sheet, sheet.max_row, len(row_data))
+
         return workbook
 
+    def export_stream(self, chunk_size=STREAM_CHUNK_SIZE, progress_callback=None):
+        """
+        Genera el reporte con una hoja de solo escritura (write_only) y lo guarda en un
+        archivo temporal. La memoria usada no crece con la cantidad de filas.
+        Si se indica progress_callback, se llama con la cantidad de filas escritas
+        cada 'chunk_size' filas y al terminar.
+        Retorna el archivo temporal posicionado al inicio, listo para enviarse por partes.
+        """
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet(title=self.get_title())
+
+        headers = self.get_headers()
+        self._set_column_widths(sheet, len(headers))
+        header_fill = PatternFill(start_color=self.header_fill_color, end_color=self.header_fill_color, fill_type="solid")
+        sheet.append(_write_only_row(sheet, headers, font=HEADER_FONT, fill=header_fill, alignment=HEADER_ALIGNMENT))
+
+        filas = 0
+        for row_data in self.iter_rows(chunk_size=chunk_size):
+            sheet.append(_write_only_row(sheet, row_data))
+            filas += 1
+            if progress_callback is not None and filas % chunk_size == 0:
+                progress_callback(filas)
+
+        if progress_callback is not None:
+            progress_callback(filas)
+
+        output = tempfile.TemporaryFile()
+        workbook.save(output)
+        output.seek(0)
+        return output
+
+
+# ========================
+# 4. ESTRATEGIAS CONCRETAS
+# ========================
+
+class ProfilesExportStrategy(ExportStrategy):
+    """Estrategia para exportar perfiles."""
+    columns = [
+        ExportColumn("ID de Usuario", 'user__id'),
+        ExportColumn("Nombre de Usuario", 'user__username'),
+        ExportColumn("Correo Electrónico", 'user__email', width=35),
+        ExportColumn("Nombre Completo", 'nombre_completo', width=35),
+        ExportColumn("Apellido Completo", 'apellido_completo', width=35),
+        ExportColumn("Cédula de Identidad", 'cedula_identidad'),
+        ExportColumn("Edad", 'edad'),
+        ExportColumn("Género", 'genero'),
+        ExportColumn("Fecha de Nacimiento", 'fecha_nacimiento', formatter=_format_fecha, default=''),
+        ExportColumn("Número de Teléfono", 'numero_telefono'),
+    ]
+
+    data_sources = ('profile',)
+
+    def get_title(self):
+        return "Reporte de Solicitantes"
+
+    def get_queryset(self):
+        return Profile.objects.filter(is_analista_exterior=False).exclude(user__is_superuser=True)
+
 
 class BecasExportStrategy(ExportStrategy):
     """Estrategia para exportar el catálogo de becas."""
+    header_fill_color = "28A745"
+    columns = [
+        ExportColumn("ID Beca", 'id_beca'),
+        ExportColumn("Nombre", 'nombre'),
+        ExportColumn("Descripción", 'descripcion', width=80),
+    ]
+
+    data_sources = ('becas',)
+
     def get_title(self):
         return "Reporte de Becas"
-        
-    def get_headers(self):
-        return ["ID Beca", "Nombre", "Descripción"]
-        
-    def get_data(self):
-        return Becas.objects.all()
-        
-    def export(self):
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
-        sheet.title = self.get_title()
-        
-        headers = self.get_headers()
-        _apply_header_style(sheet, headers, fill_color="28A745")
-        
-        sheet.column_dimensions[get_column_letter(3)].width = 80 
-
-        for beca in self.get_data():
-            row_data = [
-                beca.id_beca,
-                beca.nombre,
-                beca.descripcion
-            ]
-            sheet.append(row_data)
-            _apply_row_style(sheet, sheet.max_row, len(headers))
 
-        return workbook
+    def get_queryset(self):
+        return Becas.objects.all()
 
 
 class PlantelesExportStrategy(ExportStrategy):
     """Estrategia para exportar el catálogo de planteles."""
+    header_fill_color = "007BFF"
+    columns = [
+        ExportColumn("Nombre del Plantel", 'nombre_plantel', width=30),
+        ExportColumn("Estado del Plantel", 'estado_plantel', width=30, formatter=_map_choice(estado_mapping), default=''),
+        ExportColumn("Municipio del Plantel", 'municipio_plantel', width=30, default=''),
+        ExportColumn("Código del Plantel", 'codigo_plantel', width=30, default=''),
+        ExportColumn("Tipo de Dependencia", 'tipo_dependencia', width=30, formatter=_map_choice(dependencia_mapping), default=''),
+        ExportColumn("Modalidad Principal", 'modalidad_principal', width=30, formatter=_map_choice(modalidad_mapping), default=''),
+        ExportColumn("Estatus del Plantel", 'estatus_plantel', width=30, formatter=_map_choice(estatus_plantel_mapping), default=''),
+    ]
+
+    data_sources = ('plantel',)
+
     def get_title(self):
         return "Reporte de Planteles"
 
-    def get_headers(self):
-        return [
-            "Nombre del Plantel", "Estado del Plantel", "Municipio del Plantel",
-            "Código del Plantel", "Tipo de Dependencia", "Modalidad Principal",
-            "Estatus del Plantel"
-        ]
-        
-    def get_data(self):
+    def get_queryset(self):
         return Plantel.objects.all()
-        
-    def export(self):
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
-        sheet.title = self.get_title()
-        
-        headers = self.get_headers()
-        _apply_header_style(sheet, headers, fill_color="007BFF")
-        
-        for col_num in range(1, len(headers) + 1):
-            sheet.column_dimensions[get_column_letter(col_num)].width = 30 
-
-        for plantel in self.get_data():
-            row_data = [
-                plantel.nombre_plantel,
-                estado_mapping.get(getattr(plantel, 'estado_plantel', ''), getattr(plantel, 'estado_plantel', '')),
-                getattr(plantel, 'municipio_plantel', ''),
-                getattr(plantel, 'codigo_plantel', ''),
-                dependencia_mapping.get(getattr(plantel, 'tipo_dependencia', ''), getattr(plantel, 'tipo_dependencia', '')),
-                modalidad_mapping.get(getattr(plantel, 'modalidad_principal', ''), getattr(plantel, 'modalidad_principal', '')),
-                estatus_plantel_mapping.get(getattr(plantel, 'estatus_plantel', ''), getattr(plantel, 'estatus_plantel', ''))
-            ]
-            sheet.append(row_data)
-            _apply_row_style(sheet, sheet.max_row, len(headers))
-            
-        return workbook
 
 
 class SolicitudesExportStrategy(ExportStrategy):
     """Estrategia para exportar el reporte completo de solicitudes."""
+    # Orden en el que se listan los estatus dentro del reporte.
+    estatus_orden = ['Asignada', 'Aprobada', 'Rechazada', 'En proceso']
+    columns = [
+        ExportColumn("Nombre del Solicitante", 'user__profile__nombre_completo', default=""),
+        ExportColumn("Apellido del Solicitante", 'user__profile__apellido_completo', default=""),
+        ExportColumn("Nombre del estudiante", 'nombre_becario'),
+        ExportColumn("Apellido del estudiante", 'apellido_becario'),
+        ExportColumn("Cédula", 'user__profile__cedula_identidad', default=""),
+        ExportColumn("Teléfono", 'user__profile__numero_telefono', default=""),
+        ExportColumn("Beca Solicitada", 'beca__nombre', default=""),
+        ExportColumn("Estatus", 'estatus_beca__nombre', default=""),
+    ]
+
+    data_sources = ('solicitud', 'profile', 'becas', 'estatusbeca')
+
     def get_title(self):
         return "Reporte de Solicitudes"
-        
-    def get_headers(self):
-        return [
-            "Nombre del Solicitante", "Apellido del Solicitante",
-            "Nombre del estudiante", "Apellido del estudiante",
-            "Cédula", "Teléfono", "Beca Solicitada", "Estatus"
-        ]
-        
-    def get_data(self):
-        estatus_orden = ['Asignada', 'Aprobada', 'Rechazada', 'En proceso']
-        solicitudes_ordenadas = []
-
-        for estatus_nombre in estatus_orden:
-            solicitudes = Solicitud.objects.filter(
-                estatus_beca__nombre=estatus_nombre,
-                user__isnull=False
-            ).select_related('user__profile', 'beca', 'estatus_beca')
-            solicitudes_ordenadas.extend(list(solicitudes))
-        return solicitudes_ordenadas
-        
-    def export(self):
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = self.get_title()
-        
-        headers = self.get_headers()
-        _apply_header_style(ws, headers, fill_color="4CAF50")
-        
-        ws.column_dimensions[get_column_letter(3)].width = 25
-        ws.column_dimensions[get_column_letter(4)].width = 25
-
-        for solicitud in self.get_data():
-            profile = solicitud.user.profile if hasattr(solicitud.user, 'profile') else None
-            
-            nombre_completo = getattr(profile, 'nombre_completo', "")
-            apellido_completo = getattr(profile, 'apellido_completo', "")
-            cedula_identidad = getattr(profile, 'cedula_identidad', "")
-            numero_telefono = getattr(profile, 'numero_telefono', "")
-                
-            beca_nombre = solicitud.beca.nombre if solicitud.beca else ""
-            estatus_actual = solicitud.estatus_beca.nombre if solicitud.estatus_beca else ""
-            
-            nombre_becario = getattr(solicitud, 'nombre_becario', "")
-            apellido_becario = getattr(solicitud, 'apellido_becario', "")
-
-            row_data = [
-                nombre_completo,
-                apellido_completo,
-                nombre_becario,
-                apellido_becario,
-                cedula_identidad,
-                numero_telefono,
-                beca_nombre,
-                estatus_actual
-            ]
-            ws.append(row_data)
-            _apply_row_style(ws, ws.max_row, len(row_data))
-
-        return wb
+
+    def get_queryset(self):
+        # Una sola consulta: el orden por estatus se resuelve en SQL con CASE/WHEN.
+        prioridad_estatus = Case(
+            *[When(estatus_beca__nombre=nombre, then=Value(posicion)) for posicion, nombre in enumerate(self.estatus_orden)],
+            output_field=IntegerField(),
+        )
+        return Solicitud.objects.filter(
+            estatus_beca__nombre__in=self.estatus_orden,
+            user__isnull=False
+        ).order_by(prioridad_estatus, 'id_solicitud')
 
 
 # ================================
-# 4. CONTEXTO (ExcelExportContext) y MAPEO
+# 5. CONTEXTO (ExcelExportContext) y MAPEO
 # ================================
 
 class ExcelExportContext:
     """
     El Contexto que utiliza una Estrategia concreta para ejecutar la exportación.
     """
-    def __init__(self, strategy: ExportStrategy):
+    def __init__(self, strategy: ExportStrategy, report_type: str = None):
         self._strategy = strategy
+        self.report_type = report_type
 
     def execute_export(self):
         """Ejecuta el método de exportación de la estrategia seleccionada."""
         return self._strategy.export()
 
+    def execute_streaming_export(self, chunk_size=STREAM_CHUNK_SIZE, progress_callback=None):
+        """Ejecuta la exportación en modo streaming y retorna el archivo temporal generado."""
+        return self._strategy.export_stream(chunk_size=chunk_size, progress_callback=progress_callback)
+
+    def count_rows(self):
+        """Cantidad de filas de datos que tendrá el reporte."""
+        return self._strategy.get_data().count()
+
+    def get_data_version(self):
+        """Versión actual de los datos del reporte."""
+        return self._strategy.get_data_version()
+
+    def get_data_state(self):
+        """Versión actual de los datos del reporte y fecha de su último cambio."""
+        return self._strategy.get_data_state()
+
 # Mapa que relaciona el tipo de reporte con la Estrategia concreta a usar
 STRATEGY_MAP = {
     'profiles': ProfilesExportStrategy,
@@ -295,9 +381,17 @@ STRATEGY_MAP = {
     'solicitudes': SolicitudesExportStrategy,
 }
 
+# Nombre base del archivo descargado para cada tipo de reporte
+REPORT_FILENAMES = {
+    'profiles': 'reporte_solicitantes',
+    'becas': 'reporte_becas',
+    'planteles': 'reporte_planteles',
+    'solicitudes': 'reporte_solicitudes',
+}
+
 
 # ================================================
-# 5. PUNTO DE ENTRADA (Lo que las vistas llamarán)
+# 6. PUNTO DE ENTRADA (Lo que las vistas llamarán)
 # ================================================
 
 def get_exporter(report_type: str):
@@ -306,6 +400,7 @@ def get_exporter(report_type: str):
     
     Ejemplo de uso en la vista:
     workbook = get_exporter('profiles').execute_export()
+    archivo = get_exporter('profiles').execute_streaming_export()
     """
     strategy_class = STRATEGY_MAP.get(report_type)
     
@@ -313,4 +408,4 @@ def get_exporter(report_type: str):
         raise ValueError(f"Estrategia de exportación desconocida: {report_type}")
         
     strategy_instance = strategy_class()
-    return ExcelExportContext(strategy_instance)
\ No newline at end of file
+    return ExcelExportContext(strategy_instance, report_type)
\ No newline at end of file
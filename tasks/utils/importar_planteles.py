@@ -0,0 +1,230 @@
+# tasks/utils/importar_planteles.py
+
+import csv
+import io
+import os
+from itertools import chain
+
+import openpyxl
+from django.db import transaction
+
+from ..models import Plantel, PlantelTermino, VersionDatos
+from .catalogos import invalidar_catalogo
+from .texto import normalizar
+
+# Filas que se guardan por transacción (una consulta de lectura, un bulk_create y un bulk_update).
+TAMANO_LOTE = 1000
+
+# Errores de fila que se guardan para mostrar (el resto solo se cuentan).
+MAX_ERRORES = 100
+
+# Columnas que entiende el importador. 'estatus_plantel' es opcional: si el archivo no la trae,
+# los planteles nuevos quedan 'activo' y los existentes conservan su estatus.
+COLUMNAS = [
+    'codigo_plantel', 'nombre_plantel', 'estado_plantel', 'municipio_plantel',
+    'tipo_dependencia', 'modalidad_principal', 'estatus_plantel',
+]
+OBLIGATORIAS = COLUMNAS[:-1]
+
+# Columnas con opciones predefinidas: se acepta el valor o la etiqueta (sin importar acentos ni mayúsculas).
+OPCIONES = {
+    'estado_plantel': Plantel.ESTADO_CHOICES,
+    'tipo_dependencia': Plantel.DEPENDENCIA_CHOICES,
+    'modalidad_principal': Plantel.MODALIDAD_CHOICES,
+    'estatus_plantel': Plantel.ESTATUS_CHOICES,
+}
+_VALORES = {
+    columna: {normalizar(texto): valor for valor, etiqueta in opciones for texto in (valor, etiqueta)}
+    for columna, opciones in OPCIONES.items()
+}
+
+# Encabezados aceptados: el nombre del campo o su verbose_name ("Código del Plantel").
+_ENCABEZADOS = {
+    normalizar(texto): columna
+    for columna in COLUMNAS
+    for texto in (columna, Plantel._meta.get_field(columna).verbose_name)
+}
+
+
+class ResultadoImportacion:
+    """Conteo de una importación; se actualiza lote a lote (ver importar_planteles)."""
+    def __init__(self):
+        self.filas = 0
+        self.creados = 0
+        self.actualizados = 0
+        self.sin_cambios = 0
+        self.total_errores = 0
+        # Primeros MAX_ERRORES errores: (número de fila en el archivo, mensaje).
+        self.errores = []
+
+    def agregar_error(self, fila, mensaje):
+        self.total_errores += 1
+        if len(self.errores) < MAX_ERRORES:
+            self.errores.append((fila, mensaje))
+
+    def __str__(self):
+        return (
+            f"{self.filas} filas: {self.creados} creados, {self.actualizados} actualizados, "
+            f"{self.sin_cambios} sin cambios, {self.total_errores} con errores"
+        )
+
+
+# ==========================
+# 1. LECTURA (fila a fila)
+# ==========================
+
+def _leer_csv(archivo):
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    primera = texto.readline()
+    # Excel con configuración regional en español guarda el CSV separado por ';'.
+    delimitador = ';' if primera.count(';') > primera.count(',') else ','
+    yield from csv.reader(chain([primera], texto), delimiter=delimitador)
+
+def _leer_xlsx(archivo):
+    # Modo de solo lectura: openpyxl lee la hoja a medida que se recorre, sin cargarla completa.
+    workbook = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+LECTORES = {'.csv': _leer_csv, '.xlsx': _leer_xlsx}
+
+def leer_filas(archivo, nombre):
+    """
+    Recorre las filas (tuplas de valores) de un archivo .csv o .xlsx abierto en modo binario.
+    'nombre' es el nombre del archivo, de donde se toma el formato.
+    """
+    extension = os.path.splitext(nombre)[1].lower()
+    if extension not in LECTORES:
+        raise ValueError(f"Formato no soportado: '{extension or nombre}'. Use un archivo .csv o .xlsx.")
+    return LECTORES[extension](archivo)
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    # Excel guarda los códigos numéricos como float (12345.0).
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+# ==========================
+# 2. VALIDACIÓN
+# ==========================
+
+def _columnas(encabezado):
+    """Posición de cada columna conocida en el encabezado; ValueError si falta alguna obligatoria."""
+    posiciones = {}
+    for posicion, valor in enumerate(encabezado):
+        columna = _ENCABEZADOS.get(normalizar(_texto(valor)))
+        if columna is not None:
+            posiciones.setdefault(columna, posicion)
+    faltantes = [columna for columna in OBLIGATORIAS if columna not in posiciones]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en el encabezado: {', '.join(faltantes)}.")
+    return posiciones
+
+def _validar(fila, posiciones):
+    """Valores {columna: valor} de la fila, o ValueError con el motivo por el que no es válida."""
+    valores = {}
+    for columna, posicion in posiciones.items():
+        valor = _texto(fila[posicion]) if posicion < len(fila) else ''
+        if not valor:
+            if columna in OBLIGATORIAS:
+                raise ValueError(f"'{columna}' está vacío.")
+            continue
+        if columna in OPCIONES:
+            if normalizar(valor) not in _VALORES[columna]:
+                raise ValueError(f"'{valor}' no es una opción válida de '{columna}'.")
+            valor = _VALORES[columna][normalizar(valor)]
+        elif len(valor) > Plantel._meta.get_field(columna).max_length:
+            raise ValueError(f"'{columna}' supera {Plantel._meta.get_field(columna).max_length} caracteres.")
+        valores[columna] = valor
+    return valores
+
+
+# ==========================
+# 3. GUARDADO (por lotes)
+# ==========================
+
+def _guardar_lote(lote, resultado):
+    """
+    Crea o actualiza (por 'codigo_plantel') los planteles del lote {codigo: valores} en una
+    transacción, y regenera sus términos de búsqueda.
+    """
+    with transaction.atomic():
+        existentes = Plantel.objects.in_bulk(list(lote), field_name='codigo_plantel')
+        nuevos, modificados, renombrados, campos = [], [], [], set()
+        for codigo, valores in lote.items():
+            plantel = existentes.get(codigo)
+            if plantel is None:
+                nuevos.append(Plantel(**valores))
+                continue
+            cambios = {columna: valor for columna, valor in valores.items() if getattr(plantel, columna) != valor}
+            if not cambios:
+                resultado.sin_cambios += 1
+                continue
+            for columna, valor in cambios.items():
+                setattr(plantel, columna, valor)
+            campos.update(cambios)
+            modificados.append(plantel)
+            if 'nombre_plantel' in cambios:
+                renombrados.append(plantel)
+
+        Plantel.objects.bulk_create(nuevos)
+        if modificados:
+            Plantel.objects.bulk_update(modificados, sorted(campos))
+        if any(plantel.pk is None for plantel in nuevos):
+            # Bases de datos sin RETURNING: bulk_create no asigna las llaves primarias.
+            ids = dict(Plantel.objects.filter(codigo_plantel__in=[p.codigo_plantel for p in nuevos]).values_list('codigo_plantel', 'id'))
+            for plantel in nuevos:
+                plantel.pk = ids[plantel.codigo_plantel]
+        # Solo cambian los términos de los planteles nuevos o con otro nombre.
+        PlantelTermino.indexar_lote(nuevos + renombrados)
+
+    resultado.creados += len(nuevos)
+    resultado.actualizados += len(modificados)
+
+def importar_planteles(filas, tamano_lote=TAMANO_LOTE, progreso=None):
+    """
+    Importa planteles desde 'filas' (ver leer_filas()): la primera es el encabezado. Las
+    filas válidas se guardan por lotes de 'tamano_lote', cada uno en su propia transacción,
+    así que la memoria usada no depende del tamaño del archivo. Las inválidas se omiten y se
+    reportan en el resultado. Si un código se repite, la última fila gana.
+    'progreso(resultado)' (opcional) se llama después de cada lote.
+    """
+    filas = iter(filas)
+    try:
+        posiciones = _columnas(next(filas))
+    except StopIteration:
+        raise ValueError("El archivo está vacío.")
+
+    resultado = ResultadoImportacion()
+    lote = {}
+    for numero, fila in enumerate(filas, start=2):
+        if not any(_texto(valor) for valor in fila):
+            continue
+        resultado.filas += 1
+        try:
+            valores = _validar(fila, posiciones)
+        except ValueError as error:
+            resultado.agregar_error(numero, str(error))
+            continue
+        lote[valores['codigo_plantel']] = valores
+        if len(lote) >= tamano_lote:
+            _guardar_lote(lote, resultado)
+            lote = {}
+            if progreso is not None:
+                progreso(resultado)
+    if lote:
+        _guardar_lote(lote, resultado)
+        if progreso is not None:
+            progreso(resultado)
+
+    # bulk_create y bulk_update no disparan post_save: se avisa del cambio a mano.
+    if resultado.creados or resultado.actualizados:
+        VersionDatos.incrementar('plantel')
+        invalidar_catalogo(Plantel)
+        transaction.on_commit(lambda: invalidar_catalogo(Plantel))
+    return resultado
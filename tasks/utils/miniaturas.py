@@ -0,0 +1,79 @@
+# tasks/utils/miniaturas.py
+
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from ..models import Solicitud
+
+logger = logging.getLogger(__name__)
+
+# Documentos (ImageField) de la solicitud que tienen versiones reducidas.
+CAMPOS_DOCUMENTOS = Solicitud.CAMPOS_DOCUMENTOS
+
+# Versiones reducidas de cada documento: nombre -> lado máximo en píxeles. Las vistas de
+# detalle muestran los documentos con 80px de alto: la miniatura es para pantallas normales
+# y la vista previa para pantallas de alta densidad (ver templatetags/documentos.py).
+RENDICIONES = {
+    'miniatura': 80,
+    'vista_previa': 320,
+}
+
+# Calidad JPEG de las versiones reducidas.
+CALIDAD_JPEG = 80
+
+
+def ruta_rendicion(nombre, rendicion):
+    """
+    Ruta de una versión reducida, junto al original: 'cedulas/1.jpg' -> 'cedulas/1.miniatura.jpg'
+    (otros formatos conservan su extensión: 'cedulas/1.png' -> 'cedulas/1.png.miniatura.jpg').
+    """
+    base, extension = os.path.splitext(nombre)
+    if extension.lower() not in ('.jpg', '.jpeg'):
+        base = nombre
+    return f"{base}.{rendicion}.jpg"
+
+
+def generar_rendiciones(archivo, forzar=False):
+    """
+    Genera (con Pillow) las versiones reducidas del archivo de imagen 'archivo' (FieldFile)
+    que aún no existen, o todas si 'forzar'. Retorna cuántas generó. Si el archivo no es una
+    imagen válida, no genera ninguna (las plantillas usan entonces el original).
+    """
+    storage = archivo.storage
+    pendientes = {
+        rendicion: lado for rendicion, lado in RENDICIONES.items()
+        if forzar or not storage.exists(ruta_rendicion(archivo.name, rendicion))
+    }
+    if not pendientes:
+        return 0
+
+    try:
+        with storage.open(archivo.name, 'rb') as original:
+            imagen = ImageOps.exif_transpose(Image.open(original))
+            imagen = imagen.convert('RGB')
+    except (OSError, Image.DecompressionBombError) as error:
+        logger.warning("No se pudo leer la imagen %s: %s", archivo.name, error)
+        return 0
+
+    # De la más grande a la más pequeña: cada una se reduce a partir de la anterior.
+    for rendicion, lado in sorted(pendientes.items(), key=lambda item: item[1], reverse=True):
+        imagen.thumbnail((lado, lado), Image.LANCZOS)
+        contenido = io.BytesIO()
+        imagen.save(contenido, 'JPEG', quality=CALIDAD_JPEG, optimize=True, progressive=True)
+        ruta = ruta_rendicion(archivo.name, rendicion)
+        # storage.save() no sobrescribe: cambiaría el nombre del archivo.
+        storage.delete(ruta)
+        storage.save(ruta, ContentFile(contenido.getvalue()))
+    return len(pendientes)
+
+
+def rendiciones_existentes(archivo):
+    """Versiones reducidas (nombres de RENDICIONES) que existen del archivo."""
+    return [
+        rendicion for rendicion in RENDICIONES
+        if archivo.storage.exists(ruta_rendicion(archivo.name, rendicion))
+    ]
@@ -0,0 +1,75 @@
+# tasks/utils/paginacion.py
+
+import base64
+import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+# Tamaño de página por defecto de los listados de revisión y máximo aceptado en '?tamano='.
+SOLICITUDES_POR_PAGINA = getattr(settings, 'SOLICITUDES_POR_PAGINA', 25)
+MAX_SOLICITUDES_POR_PAGINA = 100
+
+
+class PaginaKeyset:
+    """
+    Una página de resultados paginados por cursor (keyset).
+    'siguiente_cursor' es None cuando no hay más resultados.
+    """
+    def __init__(self, items, siguiente_cursor):
+        self.items = items
+        self.siguiente_cursor = siguiente_cursor
+
+    @property
+    def tiene_siguiente(self):
+        return self.siguiente_cursor is not None
+
+
+def codificar_cursor(fecha, pk):
+    """Codifica la posición (fecha, pk) del último elemento de una página en un texto apto para URL."""
+    texto = f"{fecha.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+def decodificar_cursor(cursor):
+    """Inverso de codificar_cursor. Lanza ValueError si el cursor no es válido."""
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        fecha, pk = texto.split('|')
+        return datetime.datetime.fromisoformat(fecha), int(pk)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Cursor de paginación inválido.") from e
+
+def leer_tamano(valor, por_defecto=SOLICITUDES_POR_PAGINA):
+    """Tamaño de página pedido por GET, limitado a [1, MAX_SOLICITUDES_POR_PAGINA]."""
+    try:
+        tamano = int(valor)
+    except (TypeError, ValueError):
+        return por_defecto
+    return max(1, min(tamano, MAX_SOLICITUDES_POR_PAGINA))
+
+def paginar_por_fecha(queryset, cursor=None, tamano=SOLICITUDES_POR_PAGINA, campo_fecha='fecha_creacion'):
+    """
+    Pagina un queryset de la más reciente a la más antigua por (campo_fecha, pk).
+
+    En lugar de OFFSET, cada página continúa desde la posición del último elemento de
+    la anterior (el cursor): la condición es un rango sobre el índice (filtro, fecha, pk),
+    así que la página N cuesta lo mismo que la primera. Se pide un elemento de más para
+    saber si hay otra página sin hacer un COUNT.
+    """
+    pk = queryset.model._meta.pk.name
+    queryset = queryset.order_by(f'-{campo_fecha}', f'-{pk}')
+    if cursor:
+        fecha, ultimo_pk = decodificar_cursor(cursor)
+        # Equivale a (fecha, pk) < (fecha_cursor, pk_cursor), escrito con un límite superior
+        # sobre la fecha para que la base de datos lo resuelva como un rango del índice.
+        queryset = queryset.filter(**{f'{campo_fecha}__lte': fecha}).exclude(
+            Q(**{campo_fecha: fecha}) & Q(**{f'{pk}__gte': ultimo_pk})
+        )
+
+    items = list(queryset[:tamano + 1])
+    siguiente_cursor = None
+    if len(items) > tamano:
+        items = items[:tamano]
+        ultimo = items[-1]
+        siguiente_cursor = codificar_cursor(getattr(ultimo, campo_fecha), getattr(ultimo, pk))
+    return PaginaKeyset(items, siguiente_cursor)
@@ -0,0 +1,133 @@
+# tasks/utils/report_jobs.py
+
+import logging
+from datetime import timedelta
+
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import TrabajoReporte
+from .export_excel import get_exporter, STRATEGY_MAP, REPORT_FILENAMES
+
+logger = logging.getLogger(__name__)
+
+# Tiempo máximo que un trabajo puede estar 'en_proceso' antes de considerarse abandonado
+# (por ejemplo, si el worker se detuvo a mitad de un reporte) y volver a tomarse.
+TRABAJO_TIMEOUT = timedelta(minutes=30)
+
+
+# ==========================
+# 1. ENCOLAR (desde la vista)
+# ==========================
+
+def encolar_reporte(tipo_reporte, user=None):
+    """
+    Crea (o reutiliza) el trabajo para un tipo de reporte y la versión actual de sus datos.
+    Si ya existe un trabajo pendiente, en proceso o completado para esa misma versión,
+    se retorna ese mismo trabajo en lugar de crear uno nuevo.
+    """
+    if tipo_reporte not in STRATEGY_MAP:
+        raise ValueError(f"Estrategia de exportación desconocida: {tipo_reporte}")
+
+    version_datos = get_exporter(tipo_reporte).get_data_version()
+    vigentes = TrabajoReporte.objects.filter(tipo_reporte=tipo_reporte, version_datos=version_datos).exclude(
+        estatus=TrabajoReporte.ESTATUS_FALLIDO
+    )
+
+    trabajo = vigentes.first()
+    if trabajo is not None:
+        return trabajo
+
+    try:
+        with transaction.atomic():
+            return TrabajoReporte.objects.create(
+                tipo_reporte=tipo_reporte,
+                version_datos=version_datos,
+                solicitado_por=user if user is not None and user.is_authenticated else None,
+            )
+    except IntegrityError:
+        # Otra petición creó el mismo trabajo al mismo tiempo (restricción única).
+        return vigentes.get()
+
+
+# ======================
+# 2. PROCESAR (el worker)
+# ======================
+
+def tomar_siguiente_trabajo():
+    """
+    Reserva de forma atómica el siguiente trabajo pendiente (o abandonado) y lo retorna,
+    o None si la cola está vacía. El UPDATE condicional evita que dos workers tomen el mismo.
+    """
+    limite = timezone.now() - TRABAJO_TIMEOUT
+    disponibles = TrabajoReporte.objects.filter(
+        Q(estatus=TrabajoReporte.ESTATUS_PENDIENTE) |
+        Q(estatus=TrabajoReporte.ESTATUS_EN_PROCESO, fecha_inicio__lt=limite)
+    ).order_by('fecha_creacion')
+
+    for trabajo_id, estatus, fecha_inicio in disponibles.values_list('id', 'estatus', 'fecha_inicio')[:10]:
+        tomados = TrabajoReporte.objects.filter(id=trabajo_id, estatus=estatus, fecha_inicio=fecha_inicio).update(
+            estatus=TrabajoReporte.ESTATUS_EN_PROCESO,
+            fecha_inicio=timezone.now(),
+            filas_procesadas=0,
+        )
+        if tomados:
+            return TrabajoReporte.objects.get(id=trabajo_id)
+    return None
+
+
+def ejecutar_trabajo(trabajo):
+    """Genera el archivo del reporte con su Estrategia y lo guarda en MEDIA_ROOT/reportes/."""
+    exporter = get_exporter(trabajo.tipo_reporte)
+
+    try:
+        trabajo.total_filas = exporter.count_rows()
+        trabajo.save(update_fields=['total_filas'])
+
+        # Se llama cada STREAM_CHUNK_SIZE filas: guarda el avance para que la vista de estado lo consulte.
+        def guardar_progreso(filas):
+            trabajo.filas_procesadas = filas
+            TrabajoReporte.objects.filter(id=trabajo.id).update(filas_procesadas=filas)
+
+        archivo = exporter.execute_streaming_export(progress_callback=guardar_progreso)
+        with archivo:
+            fecha = timezone.localdate().strftime('%d-%m-%Y')
+            nombre = f"{REPORT_FILENAMES[trabajo.tipo_reporte]}_{fecha}.xlsx"
+            trabajo.archivo.save(nombre, File(archivo), save=False)
+
+        trabajo.estatus = TrabajoReporte.ESTATUS_COMPLETADO
+        trabajo.fecha_fin = timezone.now()
+        trabajo.save(update_fields=['archivo', 'estatus', 'filas_procesadas', 'fecha_fin'])
+    except Exception as e:
+        logger.exception("Error al generar el reporte %s", trabajo.pk)
+        trabajo.estatus = TrabajoReporte.ESTATUS_FALLIDO
+        trabajo.error = str(e)
+        trabajo.fecha_fin = timezone.now()
+        trabajo.save(update_fields=['estatus', 'error', 'fecha_fin'])
+        return trabajo
+
+    _eliminar_reportes_anteriores(trabajo)
+    return trabajo
+
+
+def _eliminar_reportes_anteriores(trabajo):
+    """Borra los archivos de reportes del mismo tipo generados con versiones anteriores de los datos."""
+    anteriores = TrabajoReporte.objects.filter(
+        tipo_reporte=trabajo.tipo_reporte,
+        estatus=TrabajoReporte.ESTATUS_COMPLETADO,
+        fecha_creacion__lt=trabajo.fecha_creacion,
+    )
+    for anterior in anteriores:
+        if anterior.archivo:
+            anterior.archivo.delete(save=False)
+        anterior.delete()
+
+
+def procesar_siguiente_trabajo():
+    """Toma y ejecuta un trabajo de la cola. Retorna el trabajo procesado o None."""
+    trabajo = tomar_siguiente_trabajo()
+    if trabajo is None:
+        return None
+    return ejecutar_trabajo(trabajo)
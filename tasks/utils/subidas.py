@@ -0,0 +1,130 @@
+# tasks/utils/subidas.py
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopUpload
+from django.template.defaultfilters import filesizeformat
+
+# Bytes del inicio de un documento en los que se busca el tamaño de la imagen. Antes de él
+# solo van segmentos de metadatos (EXIF, XMP, perfil de color), de hasta 64 KB cada uno.
+MAX_CABECERA = 512 * 1024
+
+# Marcadores JPEG 'Start Of Frame' (SOF0-SOF15, salvo DHT, JPG y DAC): llevan el alto y el ancho.
+_MARCADORES_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Marcadores sin longitud (TEM, RST0-RST7).
+_MARCADORES_SIN_LONGITUD = {0x01, *range(0xD0, 0xD8)}
+
+MENSAJE_NO_JPEG = "no es una imagen JPG válida"
+
+
+def dimensiones_jpeg(cabecera):
+    """
+    (ancho, alto) de la imagen JPEG cuyos primeros bytes son 'cabecera', leídos de su
+    segmento SOF sin decodificar la imagen. Retorna None si el segmento aún no aparece en
+    'cabecera'; ValueError si los bytes no son de un JPEG.
+    """
+    if not cabecera.startswith(b'\xff\xd8\xff'):
+        raise ValueError(MENSAJE_NO_JPEG)
+    i = 2
+    while i + 4 <= len(cabecera):
+        if cabecera[i] != 0xFF:
+            raise ValueError(MENSAJE_NO_JPEG)
+        marcador = cabecera[i + 1]
+        if marcador == 0xFF:
+            # Byte de relleno antes del marcador.
+            i += 1
+            continue
+        if marcador in _MARCADORES_SIN_LONGITUD:
+            i += 2
+            continue
+        if marcador in (0xD8, 0xD9, 0xDA):
+            # Otro inicio, el fin o los datos de la imagen antes de su tamaño.
+            raise ValueError(MENSAJE_NO_JPEG)
+        if marcador in _MARCADORES_SOF:
+            if i + 9 > len(cabecera):
+                return None
+            alto = int.from_bytes(cabecera[i + 5:i + 7], 'big')
+            ancho = int.from_bytes(cabecera[i + 7:i + 9], 'big')
+            return ancho, alto
+        longitud = int.from_bytes(cabecera[i + 2:i + 4], 'big')
+        if longitud < 2:
+            raise ValueError(MENSAJE_NO_JPEG)
+        i += 2 + longitud
+    return None
+
+
+def error_tamano(tamano):
+    """Mensaje de error (sin el nombre del campo) si un documento de 'tamano' bytes es muy grande."""
+    if tamano > settings.DOCUMENTOS_MAX_BYTES:
+        return f"es demasiado grande (máximo {filesizeformat(settings.DOCUMENTOS_MAX_BYTES)})"
+    return None
+
+
+def error_cabecera(cabecera, completa=False):
+    """
+    Mensaje de error (sin el nombre del campo, p. ej. "no es una imagen JPG válida") si los
+    primeros bytes 'cabecera' de un documento no son de un JPEG con dimensiones aceptables, o
+    None. Si el tamaño de la imagen aún no aparece y la cabecera no está 'completa' (el archivo
+    sigue llegando), retorna None.
+    """
+    try:
+        dimensiones = dimensiones_jpeg(cabecera)
+    except ValueError as error:
+        return str(error)
+    if dimensiones is None:
+        return MENSAJE_NO_JPEG if completa or len(cabecera) >= MAX_CABECERA else None
+    ancho, alto = dimensiones
+    # Una imagen pequeña en disco puede ocupar gigabytes al decodificarse (una 'bomba de
+    # descompresión'): se rechaza por sus dimensiones, antes de que Pillow la abra.
+    if not ancho or not alto or ancho * alto > settings.DOCUMENTOS_MAX_PIXELES:
+        return f"tiene dimensiones no permitidas ({ancho}x{alto} píxeles)"
+    return None
+
+
+# Clase ValidacionDocumentosHandler: upload handler de las vistas que reciben documentos.
+# Va antes de los handlers de Django (que guardan el archivo en memoria o en un temporal) y
+# revisa cada archivo mientras llega: si la petición supera DOCUMENTOS_MAX_BYTES_PETICION se
+# deja de leer sin recibir ningún archivo; si un archivo supera DOCUMENTOS_MAX_BYTES, o su
+# cabecera no es de un JPEG con dimensiones aceptables, se descarta el resto de ese archivo.
+# Los errores quedan en request.errores_subida ({campo: mensaje}; None para la petición) para
+# que el formulario los muestre (ver SolicitudForm).
+class ValidacionDocumentosHandler(FileUploadHandler):
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.errores = {}
+        if request is not None:
+            request.errores_subida = self.errores
+        self.peticion_excedida = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.peticion_excedida = content_length > settings.DOCUMENTOS_MAX_BYTES_PETICION
+        return None
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        if self.peticion_excedida:
+            # Los campos de texto anteriores (incluido el token CSRF) ya se leyeron.
+            self.errores[None] = (
+                "Los archivos adjuntos superan el máximo de "
+                f"{filesizeformat(settings.DOCUMENTOS_MAX_BYTES_PETICION)} por solicitud."
+            )
+            raise StopUpload(connection_reset=True)
+        self.cabecera = b''
+
+    def receive_data_chunk(self, raw_data, start):
+        tamano = start + len(raw_data)
+        error = error_tamano(tamano)
+        if error is None and self.cabecera is not None:
+            # Solo se guardan los primeros bytes, hasta que aparece el tamaño de la imagen.
+            self.cabecera += raw_data[:MAX_CABECERA - len(self.cabecera)]
+            error = error_cabecera(self.cabecera)
+            if error is None and dimensiones_jpeg(self.cabecera) is not None:
+                self.cabecera = None
+        if error is not None:
+            self.errores[self.field_name] = error
+            raise SkipFile()
+        return raw_data
+
+    def file_complete(self, file_size):
+        # El archivo lo entrega el siguiente handler.
+        return None
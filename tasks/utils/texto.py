@@ -0,0 +1,18 @@
+# tasks/utils/texto.py
+
+import re
+import unicodedata
+
+
+def normalizar(texto):
+    """Texto sin acentos y en minúsculas, para comparar y buscar nombres escritos a mano."""
+    texto = texto or ''
+    if texto.isascii():
+        return texto.casefold().strip()
+    texto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in texto if not unicodedata.combining(c)).casefold().strip()
+
+
+def palabras(texto):
+    """Palabras (letras y dígitos) del texto normalizado, en orden y sin repetir."""
+    return list(dict.fromkeys(re.findall(r'\w+', normalizar(texto))))
@@ -1,57 +1,99 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
+from django.conf import settings
 from django.db import transaction
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.views.decorators.http import require_POST
 
 from ..models import Solicitud, EstatusBeca 
 # Importa el mapa de comandos
-from .commands import COMMAND_MAP 
+from .commands import COMMAND_MAP, RESULTADO_APLICADA, ConflictoSolicitud
+from ..utils.paginacion import paginar_por_fecha, leer_tamano
+from ..utils.cola_revision import (
+    MAX_RESERVA, RESERVA_DURACION, reservadas, reservas_disponibles, tomar_solicitudes, liberar_solicitudes, sin_reserva_ajena, reservada_por_otro,
+)
+from .monitoreo_views import is_admin_or_analyst
+
+# Máximo de solicitudes por petición de gestionar_solicitudes_lote.
+MAX_SOLICITUDES_LOTE = 1000
 
 # ----------------
 # FUNCIONES HELPER 
 # ----------------
 
-def _get_solicitudes_by_estatus(request, estatus_nombre, template_name, context_key):
-    """Función helper para obtener y renderizar listas de solicitudes por estatus."""
+def _get_solicitudes_by_estatus(request, codigo_estatus, template_name, context_key, sin_reservas_ajenas=False):
+    """
+    Función helper para obtener y renderizar listas de solicitudes por estatus.
+    Las listas se paginan por cursor (ver utils/paginacion.py): '?cursor=' pide la
+    página siguiente y '?tamano=' cambia el tamaño de página. Las peticiones de
+    "Cargar más" (AJAX) reciben solo las tarjetas, del template 'partials/<lista>_items.html'.
+    Con 'sin_reservas_ajenas' no se listan las que otro analista tiene reservadas en su cola
+    de revisión (ver utils/cola_revision.py).
+    """
+    estatus_nombre = EstatusBeca.NOMBRES[codigo_estatus]
     solicitudes = []
+    pagina = None
     try:
-        estatus = EstatusBeca.objects.get(nombre=estatus_nombre)
-        solicitudes = Solicitud.objects.filter(estatus_beca=estatus).order_by('-fecha_creacion')
+        estatus = EstatusBeca.obtener(codigo_estatus)
+        solicitudes = Solicitud.objects.for_review_list().filter(estatus_beca=estatus)
+        if sin_reservas_ajenas:
+            solicitudes = solicitudes.filter(sin_reserva_ajena(request.user))
+        pagina = paginar_por_fecha(
+            solicitudes,
+            cursor=request.GET.get('cursor'),
+            tamano=leer_tamano(request.GET.get('tamano')),
+        )
+        solicitudes = pagina.items
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
     except EstatusBeca.DoesNotExist:
         messages.warning(request, f"El estado '{estatus_nombre}' no está definido en la BD. Por favor, revíselo.")
     except Exception as e:
         messages.error(request, f"Ocurrió un error al cargar las solicitudes de {estatus_nombre}: {e}")
 
     context = {
-        context_key: solicitudes
+        context_key: solicitudes,
+        'pagina': pagina,
+        'url_siguiente': _url_siguiente(request, pagina),
     }
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return render(request, f"partials/{template_name.replace('.html', '_items.html')}", context)
     return render(request, template_name, context)
 
+def _url_siguiente(request, pagina):
+    """URL de la página siguiente (conserva el resto de parámetros GET), o None si no hay más."""
+    if pagina is None or not pagina.tiene_siguiente:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = pagina.siguiente_cursor
+    return f"{request.path}?{params.urlencode()}"
+
 # ----------------------------------------------------------------------
 # VISTAS DE LISTADO (USAN EL HELPER)
 # ----------------------------------------------------------------------
 
 def solic_pendiente(request):
-    """Muestra las solicitudes con estatus 'En proceso'."""
-    return _get_solicitudes_by_estatus(request, 'En proceso', 'solic_pendiente.html', 'solic_pend')
+    """Muestra las solicitudes con estatus 'En proceso' (salvo las reservadas por otro analista)."""
+    return _get_solicitudes_by_estatus(request, EstatusBeca.EN_PROCESO, 'solic_pendiente.html', 'solic_pend', sin_reservas_ajenas=True)
 
 def solic_aprobadas(request):
     """Muestra las solicitudes con estatus 'Aprobada'."""
-    return _get_solicitudes_by_estatus(request, 'Aprobada', 'solic_aprobadas.html', 'solic_aprobadas')
+    return _get_solicitudes_by_estatus(request, EstatusBeca.APROBADA, 'solic_aprobadas.html', 'solic_aprobadas')
 
 @login_required
 def solic_rechazadas(request):
     """Muestra las solicitudes con estatus 'Rechazada'."""
-    return _get_solicitudes_by_estatus(request, 'Rechazada', 'solic_rechazadas.html', 'solic_rechazadas')
+    return _get_solicitudes_by_estatus(request, EstatusBeca.RECHAZADA, 'solic_rechazadas.html', 'solic_rechazadas')
 
 def asig_beca(request):
     """Muestra las solicitudes aprobadas listas para asignación."""
     # Nota: Llama al mismo estatus 'Aprobada' que solic_aprobadas, pero usa un template diferente.
-    return _get_solicitudes_by_estatus(request, 'Aprobada', 'asig_beca.html', 'solic_aprobadas')
+    return _get_solicitudes_by_estatus(request, EstatusBeca.APROBADA, 'asig_beca.html', 'solic_aprobadas')
 
 def ver_asig_beca(request):
     """Muestra las solicitudes con estatus 'Asignada'."""
-    return _get_solicitudes_by_estatus(request, 'Asignada', 'ver_asig_beca.html', 'solic_asig')
+    return _get_solicitudes_by_estatus(request, EstatusBeca.ASIGNADA, 'ver_asig_beca.html', 'solic_asig')
 
 # ----------------------------------------------------------------------
 # VISTAS DE DETALLE Y ACCIÓN
@@ -60,16 +102,17 @@ def ver_asig_beca(request):
 @login_required
 def solic_details(request, solicitud_id):
     """Muestra detalles de una solicitud para el administrador/analista."""
-    solicitud = get_object_or_404(Solicitud, id_solicitud=solicitud_id)
+    solicitud = get_object_or_404(Solicitud.objects.for_detail(), id_solicitud=solicitud_id)
     context = {
-        'solicitud': solicitud
+        'solicitud': solicitud,
+        'reserva_ajena': reservada_por_otro(solicitud, request.user),
     }
     return render(request, 'solic_details.html', context)
 
 @login_required
 def asig_beca_estado(request, solicitud_id):
     """Vista de detalle para confirmar la asignación de beca por estado."""
-    solicitud = get_object_or_404(Solicitud, id_solicitud=solicitud_id)
+    solicitud = get_object_or_404(Solicitud.objects.for_detail(), id_solicitud=solicitud_id)
     context = {
         'solicitud': solicitud
     }
@@ -81,7 +124,7 @@ def gestionar_solicitud(request, solicitud_id, accion):
     Controla las acciones de Aprobación, Rechazo o Asignación de una solicitud
     utilizando el Patrón Comando. (Invoker)
     """
-    solicitud = get_object_or_404(Solicitud, id_solicitud=solicitud_id)
+    solicitud = get_object_or_404(Solicitud.objects.for_detail(), id_solicitud=solicitud_id)
 
     # 1. Busca el comando
     command = COMMAND_MAP.get(accion)
@@ -94,6 +137,9 @@ def gestionar_solicitud(request, solicitud_id, accion):
             with transaction.atomic():
                 command.execute(request, solicitud)
             
+        except ConflictoSolicitud as conflicto:
+            # Otra persona gestionó la solicitud mientras tanto: no se cambió nada.
+            messages.warning(request, str(conflicto))
         except ValueError as ve:
             # Captura errores de validación del comando (ej. motivo de rechazo faltante)
             messages.error(request, str(ve))
@@ -102,4 +148,112 @@ def gestionar_solicitud(request, solicitud_id, accion):
             messages.error(request, f'Ocurrió un error al procesar la solicitud: {e} 🐛')
 
     # 3. Redirige al detalle de la solicitud
-    return redirect('solic_details', solicitud_id=solicitud.id_solicitud)
\ No newline at end of file
+    return redirect('solic_details', solicitud_id=solicitud.id_solicitud)
+
+@login_required
+@user_passes_test(is_admin_or_analyst, login_url='/')
+@require_POST
+def gestionar_solicitudes_lote(request, accion):
+    """
+    Aplica una acción de COMMAND_MAP (aprobar, rechazar, asignar) a varias solicitudes a la
+    vez: los ids van en 'ids' (repetido o separados por comas) y, para rechazar, el motivo en
+    'motivo_select'/'motivo_texto'. Las que no están en un estatus desde el que se permite
+    la acción no cambian. Retorna en JSON el resultado de cada id.
+    """
+    command = COMMAND_MAP.get(accion)
+    if not command:
+        return JsonResponse({'error': f'Acción "{accion}" no válida.'}, status=400)
+
+    try:
+        ids = list(dict.fromkeys(
+            int(valor) for texto in request.POST.getlist('ids') for valor in texto.split(',') if valor.strip()
+        ))
+    except ValueError:
+        return JsonResponse({'error': "Los ids deben ser números enteros."}, status=400)
+    if not ids:
+        return JsonResponse({'error': "No se indicó ninguna solicitud."}, status=400)
+    if len(ids) > MAX_SOLICITUDES_LOTE:
+        return JsonResponse({'error': f"Se pueden gestionar hasta {MAX_SOLICITUDES_LOTE} solicitudes por petición."}, status=400)
+
+    try:
+        resultados = command.execute_lote(request, ids)
+    except ValueError as ve:
+        # Errores de validación del comando (ej. motivo de rechazo faltante).
+        return JsonResponse({'error': str(ve)}, status=400)
+    except Exception as e:
+        # Errores de base de datos, estatus no definidos, etc. (la transacción se revirtió).
+        return JsonResponse({'error': f'Ocurrió un error al procesar las solicitudes: {e}'}, status=500)
+
+    return JsonResponse({
+        'accion': accion,
+        'aplicadas': sum(1 for resultado in resultados.values() if resultado['resultado'] == RESULTADO_APLICADA),
+        'resultados': {str(pk): resultado for pk, resultado in resultados.items()},
+    })
+
+# ----------------------------------------------------------------------
+# COLA DE REVISIÓN (RESERVAS DE SOLICITUDES PENDIENTES)
+# ----------------------------------------------------------------------
+
+@login_required
+@user_passes_test(is_admin_or_analyst, login_url='/')
+def cola_revision(request):
+    """
+    Solicitudes pendientes que el analista tiene reservadas (ver utils/cola_revision.py), de
+    la más antigua a la más reciente, con los formularios para tomar más y para liberarlas.
+    """
+    solicitudes = []
+    try:
+        solicitudes = list(reservadas(request.user).for_review_list().order_by('fecha_creacion', 'id_solicitud'))
+    except EstatusBeca.DoesNotExist:
+        messages.warning(request, f"El estado '{EstatusBeca.NOMBRES[EstatusBeca.EN_PROCESO]}' no está definido en la BD. Por favor, revíselo.")
+    context = {
+        'solic_reservadas': solicitudes,
+        'max_reserva': MAX_RESERVA,
+        'max_reservadas': settings.COLA_REVISION_MAX_RESERVADAS,
+        'minutos_reserva': int(RESERVA_DURACION.total_seconds() // 60),
+    }
+    return render(request, 'cola_revision.html', context)
+
+@login_required
+@user_passes_test(is_admin_or_analyst, login_url='/')
+@require_POST
+def tomar_cola_revision(request):
+    """Reserva para el analista las siguientes 'cantidad' solicitudes pendientes de la cola."""
+    try:
+        cantidad = int(request.POST.get('cantidad', 10))
+    except ValueError:
+        cantidad = 0
+    if not 1 <= cantidad <= MAX_RESERVA:
+        messages.error(request, f"Indique una cantidad entre 1 y {MAX_RESERVA}.")
+        return redirect('cola_revision')
+
+    try:
+        if not reservas_disponibles(request.user):
+            messages.warning(
+                request,
+                f"Ya tienes {settings.COLA_REVISION_MAX_RESERVADAS} solicitudes reservadas, el máximo. "
+                "Decide o libera alguna antes de tomar más."
+            )
+            return redirect('cola_revision')
+        tomadas = tomar_solicitudes(request.user, cantidad)
+    except EstatusBeca.DoesNotExist as e:
+        messages.error(request, str(e))
+        return redirect('cola_revision')
+    if tomadas:
+        messages.success(request, f"Se reservaron {len(tomadas)} solicitudes para tu revisión.")
+    else:
+        messages.info(request, "No hay solicitudes pendientes sin reservar en este momento.")
+    return redirect('cola_revision')
+
+@login_required
+@user_passes_test(is_admin_or_analyst, login_url='/')
+@require_POST
+def liberar_cola_revision(request):
+    """Devuelve a la cola las solicitudes reservadas por el analista (o solo las de 'ids')."""
+    try:
+        ids = [int(valor) for valor in request.POST.getlist('ids')] or None
+    except ValueError:
+        return HttpResponseBadRequest("Los ids deben ser números enteros.")
+    liberadas = liberar_solicitudes(request.user, ids)
+    messages.info(request, f"Se liberaron {liberadas} solicitudes.")
+    return redirect('cola_revision')
@@ -0,0 +1,86 @@
+# tasks/vistas/catalogo_views.py
+
+from django.http import HttpResponse, JsonResponse, Http404
+from django.utils.cache import patch_cache_control
+
+from ..models import Municipio, Parroquia, Plantel, PlantelTermino
+from ..utils.catalogos import PADRES, obtener_catalogo, ids_de, json_opciones_de, huella_dependientes, CATALOGOS_TTL
+from ..utils.texto import palabras
+
+# Tiempo (en segundos) que el navegador guarda una respuesta pedida con la huella vigente
+# ('?v='): si los catálogos cambian, el formulario pide otra URL.
+CATALOGOS_MAX_AGE = 60 * 60 * 24 * 30
+
+# Letras mínimas (sin contar espacios) para buscar planteles, y resultados por búsqueda.
+BUSQUEDA_MIN_LETRAS = 2
+BUSQUEDA_LIMITE = 20
+
+# ====================
+# Funciones auxiliares
+# ====================
+
+def _opciones_json(request, modelo, id_padre):
+    """
+    Respuesta JSON con las opciones del catálogo dependiente 'modelo' para 'id_padre'.
+    El JSON ya viene serializado desde el catálogo en memoria (ver utils/catalogos.py).
+    """
+    modelo_padre = PADRES[modelo][0]
+    if id_padre not in obtener_catalogo(modelo_padre).por_pk:
+        raise Http404(f"{modelo_padre._meta.verbose_name} no encontrado.")
+
+    response = HttpResponse(json_opciones_de(modelo, id_padre), content_type='application/json')
+    vigente = request.GET.get('v') == huella_dependientes()
+    patch_cache_control(response, public=True, max_age=CATALOGOS_MAX_AGE if vigente else CATALOGOS_TTL)
+    return response
+
+# ==============================================
+# Endpoints de los selects encadenados del formulario de solicitud
+# ==============================================
+
+def municipios_de_estado(request, estado_id):
+    """Municipios de un estado."""
+    return _opciones_json(request, Municipio, estado_id)
+
+def parroquias_de_municipio(request, municipio_id):
+    """Parroquias de un municipio."""
+    return _opciones_json(request, Parroquia, municipio_id)
+
+def planteles_de_municipio(request, municipio_id):
+    """Planteles (instituciones educativas) de un municipio."""
+    return _opciones_json(request, Plantel, municipio_id)
+
+def buscar_planteles(request):
+    """
+    Autocompletado de planteles por nombre o código: '?q=' (sin importar acentos ni
+    mayúsculas; cada palabra es un prefijo) y, opcionalmente, '?municipio=' para limitar
+    a los planteles de ese municipio. Usa el índice PlantelTermino.
+    """
+    texto = request.GET.get('q', '')
+    permitidos = None
+    if request.GET.get('municipio'):
+        try:
+            id_municipio = int(request.GET['municipio'])
+        except ValueError:
+            return JsonResponse({'error': "El municipio debe ser un número."}, status=400)
+        if id_municipio not in obtener_catalogo(Municipio).por_pk:
+            raise Http404("Municipio no encontrado.")
+        permitidos = ids_de(Plantel, id_municipio)
+
+    opciones = []
+    if len(''.join(palabras(texto))) >= BUSQUEDA_MIN_LETRAS:
+        ids = PlantelTermino.buscar(texto, limite=BUSQUEDA_LIMITE, permitidos=permitidos)
+        # Los datos de cada plantel salen del catálogo en memoria; solo los creados después
+        # de cargarlo se leen de la BD.
+        catalogo = obtener_catalogo(Plantel).por_pk
+        planteles = {pk: catalogo[pk] for pk in ids if pk in catalogo}
+        faltantes = [pk for pk in ids if pk not in planteles]
+        if faltantes:
+            planteles.update(Plantel.objects.in_bulk(faltantes))
+        opciones = [
+            {'id': pk, 'nombre': planteles[pk].nombre_plantel, 'codigo': planteles[pk].codigo_plantel}
+            for pk in ids if pk in planteles
+        ]
+
+    response = JsonResponse({'opciones': opciones})
+    patch_cache_control(response, public=True, max_age=CATALOGOS_TTL)
+    return response
@@ -1,24 +1,196 @@
 # tasks/views/commands.py
 
-from django.db import transaction
+from django.db import connections, transaction
+from django.db.models import F
+from django.db.models.sql import UpdateQuery
 from django.contrib import messages
-from ..models import Solicitud, EstatusBeca 
+from django.utils import timezone
+from ..models import Solicitud, EstatusBeca, EstadisticaSolicitud, VersionDatos, TransicionSolicitud
+from ..utils.cola_revision import sin_reserva_ajena, reservada_por_otro
 # Usamos '...' porque las vistas están en views/, y models está un nivel arriba.
 
+# Resultados por solicitud de un comando aplicado por lote (ver SolicitudCommand.execute_lote).
+RESULTADO_APLICADA = 'aplicada'
+RESULTADO_NO_ENCONTRADA = 'no_encontrada'
+RESULTADO_NO_PERMITIDA = 'no_permitida'
+RESULTADO_RESERVADA = 'reservada'
+
+# Campos que cada comando limpia al cambiar el estatus: la solicitud ya se decidió y deja de
+# estar reservada en la cola de revisión (ver utils/cola_revision.py).
+LIBERAR_RESERVA = {'revisor': None, 'reservada_hasta': None}
+
+
+class ConflictoSolicitud(Exception):
+    """La solicitud cambió (otra persona la gestionó) desde la versión que vio el analista."""
+
+
+def _update_devolviendo_ids(queryset, **campos):
+    """
+    queryset.update(**campos), pero retorna los ids de las filas que cambió. En PostgreSQL y
+    SQLite (3.35+) es un solo UPDATE ... RETURNING; en las demás bases de datos (sin RETURNING
+    en UPDATE) las filas se bloquean antes con SELECT ... FOR UPDATE, que ya es el bloqueo
+    de escritura, así ninguna cambia entre la lectura y el UPDATE.
+    """
+    conexion = connections[queryset.db]
+    if conexion.vendor == 'postgresql' or (conexion.vendor == 'sqlite' and conexion.Database.sqlite_version_info >= (3, 35)):
+        query = queryset.query.chain(UpdateQuery)
+        query.add_update_values(campos)
+        sql, params = query.get_compiler(queryset.db).as_sql()
+        if not sql:
+            return []
+        with conexion.cursor() as cursor:
+            cursor.execute(f"{sql} RETURNING {conexion.ops.quote_name(queryset.model._meta.pk.column)}", params)
+            return [fila[0] for fila in cursor.fetchall()]
+    ids = list(queryset.select_for_update().values_list('pk', flat=True))
+    queryset.model.objects.filter(pk__in=ids).update(**campos)
+    return ids
+
 # -----------------------------------------------------------
 # 1. Interfaz del Comando
 # -----------------------------------------------------------
 class SolicitudCommand:
     """Clase base (Interfaz) para todos los comandos de solicitud."""
+    # Estatus al que pasa la solicitud y estatus desde los que se permite el cambio
+    # (códigos de EstatusBeca). Los usa execute_lote().
+    estatus_destino = None
+    estatus_origen = ()
+
     def execute(self, request, solicitud):
         raise NotImplementedError("Subclase debe implementar el método execute()")
 
-    def get_estatus(self, nombre_estatus):
-        """Helper para obtener el objeto EstatusBeca, o lanzar un error claro."""
+    def campos_lote(self, request):
+        """Otros campos (además del estatus) que el comando cambia en cada solicitud del lote."""
+        return {}
+
+    def get_version(self, request, solicitud):
+        """
+        Versión de la solicitud que vio el analista: la enviada por la página de detalle
+        ('version' en GET o POST) o, si no vino, la que se acaba de cargar.
+        """
         try:
-            return EstatusBeca.objects.get(nombre=nombre_estatus)
+            return int(request.POST.get('version') or request.GET.get('version'))
+        except (TypeError, ValueError):
+            return solicitud.version
+
+    def guardar(self, request, solicitud, **campos):
+        """
+        Guarda los 'campos' en la solicitud con un UPDATE condicional que solo escribe esas
+        columnas (y la versión): ... WHERE id = ? AND version = ? AND estatus_beca = ? y sin
+        reserva vigente de otro analista (ver utils/cola_revision.py). Si otra persona la
+        cambió desde la versión que vio el analista, o la tiene reservada, no escribe nada y
+        lanza ConflictoSolicitud. Como update() no dispara las señales de Solicitud, aquí se
+        actualizan EstadisticaSolicitud y VersionDatos. Retorna el id del estatus anterior.
+        """
+        anterior = solicitud.estatus_beca_id
+        version = self.get_version(request, solicitud)
+        # El UPDATE va primero en la transacción: toma el bloqueo de escritura antes de leer
+        # (en SQLite, una transacción que leyó no puede esperar a otra que escribe).
+        actualizadas = Solicitud.objects.filter(
+            sin_reserva_ajena(request.user), pk=solicitud.pk, version=version, estatus_beca_id=anterior,
+        ).update(version=F('version') + 1, **LIBERAR_RESERVA, **campos)
+        if not actualizadas:
+            actual = Solicitud.objects.select_related('estatus_beca', 'revisor').filter(pk=solicitud.pk).first()
+            if actual is not None and actual.version == version and reservada_por_otro(actual, request.user):
+                raise ConflictoSolicitud(
+                    f'La solicitud #{solicitud.pk} está reservada por {actual.revisor.username} en su cola de revisión '
+                    f'hasta las {timezone.localtime(actual.reservada_hasta):%H:%M}. No se aplicó ningún cambio. ⚠️'
+                )
+            estatus = actual.estatus_beca.nombre if actual is not None and actual.estatus_beca else None
+            raise ConflictoSolicitud(
+                f'La solicitud #{solicitud.pk} fue modificada por otra persona mientras la revisabas '
+                f'(estatus actual: {estatus or "sin estatus"}). No se aplicó ningún cambio. ⚠️'
+            )
+        for campo, valor in {**LIBERAR_RESERVA, **campos}.items():
+            setattr(solicitud, campo, valor)
+        solicitud.version = version + 1
+        # Solo cambió el estatus entre las dimensiones de la estadística.
+        nuevas = EstadisticaSolicitud.dimensiones(solicitud.pk)
+        EstadisticaSolicitud.mover(dict(nuevas, id_estatus=anterior or 0), nuevas)
+        VersionDatos.incrementar('solicitud')
+        return anterior
+
+    def get_actor(self, request):
+        """Usuario que ejecuta el comando, para el historial (None si no inició sesión)."""
+        return request.user if request.user.is_authenticated else None
+
+    def registrar_transicion(self, request, solicitud, id_estatus_anterior, motivo=''):
+        """Agrega al historial (TransicionSolicitud) el cambio de estatus ya guardado de 'solicitud'."""
+        TransicionSolicitud.objects.create(
+            solicitud=solicitud,
+            estatus_anterior_id=id_estatus_anterior,
+            estatus_nuevo_id=solicitud.estatus_beca_id,
+            actor=self.get_actor(request),
+            motivo=motivo,
+        )
+
+    def execute_lote(self, request, ids):
+        """
+        Aplica el comando a las solicitudes 'ids' con un UPDATE por estatus de origen (uno
+        solo en los comandos actuales), dentro de una transacción. Solo cambian las que están
+        en un estatus de 'estatus_origen' y no tienen una reserva vigente de otro analista
+        (esas quedan como RESULTADO_RESERVADA). Como el UPDATE no dispara las señales de Solicitud,
+        aquí se actualizan EstadisticaSolicitud y VersionDatos; el historial
+        (TransicionSolicitud) se agrega con un bulk_create.
+        Retorna {id: {'resultado': RESULTADO_..., 'estatus': nombre del estatus final}}.
+        """
+        destino = self.get_estatus(self.estatus_destino)
+        campos = self.campos_lote(request)
+        nombres = {estatus.pk: estatus.nombre for estatus in EstatusBeca.todos()}
+        nombres_origen = {EstatusBeca.NOMBRES[codigo] for codigo in self.estatus_origen}
+        origen = [pk for pk, nombre in nombres.items() if nombre in nombres_origen]
+        ahora = timezone.now()
+
+        with transaction.atomic():
+            # Los UPDATE condicionales van primero (como en guardar()): toman el bloqueo de
+            # escritura antes de leer, y cada uno retorna exactamente las solicitudes que cambió,
+            # así se sabe de qué estatus venía cada una.
+            anteriores = {}
+            for id_origen in origen:
+                cambiadas = _update_devolviendo_ids(
+                    Solicitud.objects.filter(sin_reserva_ajena(request.user, ahora), id_solicitud__in=ids, estatus_beca_id=id_origen),
+                    estatus_beca=destino, version=F('version') + 1, **LIBERAR_RESERVA, **campos,
+                )
+                anteriores.update(dict.fromkeys(cambiadas, id_origen))
+            aplicadas = set(anteriores)
+            # Después de los UPDATE: las filas cambiadas ya no pueden cambiar hasta el COMMIT.
+            dimensiones = EstadisticaSolicitud.dimensiones_lote(ids)
+            if aplicadas:
+                EstadisticaSolicitud.mover_lote(
+                    (dict(dimensiones[pk], id_estatus=anteriores[pk]), dimensiones[pk]) for pk in aplicadas
+                )
+                VersionDatos.incrementar('solicitud')
+                actor = self.get_actor(request)
+                TransicionSolicitud.objects.bulk_create([
+                    TransicionSolicitud(
+                        solicitud_id=pk,
+                        estatus_anterior_id=anteriores[pk],
+                        estatus_nuevo=destino,
+                        actor=actor,
+                        fecha=ahora,
+                        motivo=campos.get('motivo_rechazo') or '',
+                    )
+                    for pk in sorted(aplicadas)
+                ])
+
+        resultados = {}
+        for pk in ids:
+            if pk in aplicadas:
+                resultados[pk] = {'resultado': RESULTADO_APLICADA, 'estatus': destino.nombre}
+            elif pk in dimensiones and dimensiones[pk]['id_estatus'] in origen:
+                # Seguía en un estatus de origen: no cambió por la reserva de otro analista.
+                resultados[pk] = {'resultado': RESULTADO_RESERVADA, 'estatus': nombres.get(dimensiones[pk]['id_estatus'], '')}
+            elif pk in dimensiones:
+                resultados[pk] = {'resultado': RESULTADO_NO_PERMITIDA, 'estatus': nombres.get(dimensiones[pk]['id_estatus'], '')}
+            else:
+                resultados[pk] = {'resultado': RESULTADO_NO_ENCONTRADA, 'estatus': None}
+        return resultados
+
+    def get_estatus(self, codigo_estatus):
+        """Helper para obtener el objeto EstatusBeca (del registro en memoria), o lanzar un error claro."""
+        try:
+            return EstatusBeca.obtener(codigo_estatus)
         except EstatusBeca.DoesNotExist:
-            raise Exception(f'Error: El EstatusBeca "{nombre_estatus}" no está definido en la BD.')
+            raise Exception(f'Error: El EstatusBeca "{EstatusBeca.NOMBRES[codigo_estatus]}" no está definido en la BD.')
 
 # -----------------------------------------------------------
 # 2. Comandos Concretos (La lógica de cada if/elif)
@@ -26,22 +198,25 @@ class SolicitudCommand:
 
 class AprobarSolicitudCommand(SolicitudCommand):
     """Implementa la lógica de la acción 'aprobar'."""
+    estatus_destino = EstatusBeca.APROBADA
+    estatus_origen = (EstatusBeca.EN_PROCESO,)
+
+    def campos_lote(self, request):
+        return {'motivo_rechazo': None}
+
     def execute(self, request, solicitud):
-        solicitud.estatus_beca = self.get_estatus('Aprobada')
-        solicitud.motivo_rechazo = None
-        solicitud.save()
+        anterior = self.guardar(request, solicitud, estatus_beca=self.get_estatus(EstatusBeca.APROBADA), motivo_rechazo=None)
+        self.registrar_transicion(request, solicitud, anterior)
         messages.success(request, f'La solicitud #{solicitud.id_solicitud} ha sido Aprobada. 👍')
 
 
 class RechazarSolicitudCommand(SolicitudCommand):
     """Implementa la lógica de la acción 'rechazar', incluyendo la validación POST."""
-    def execute(self, request, solicitud):
-        if request.method != 'POST':
-            # Solo se captura si falta el POST. Si falta el motivo, se maneja abajo.
-            messages.error(request, 'Acción de rechazo no válida (requiere datos POST).')
-            # Devolvemos None si no hay datos POST válidos para que la vista lo maneje
-            return 
+    estatus_destino = EstatusBeca.RECHAZADA
+    estatus_origen = (EstatusBeca.EN_PROCESO,)
 
+    def get_motivo(self, request):
+        """Motivo de rechazo armado con los datos POST; ValueError si no se eligió uno."""
         motivo_select = request.POST.get('motivo_select')
         motivo_texto = request.POST.get('motivo_texto', '').strip()
 
@@ -52,18 +227,33 @@ class RechazarSolicitudCommand(SolicitudCommand):
         motivo_completo = f"Motivo Principal: {motivo_select}"
         if motivo_texto:
             motivo_completo += f" | Detalles Adicionales: {motivo_texto}"
+        return motivo_completo
 
-        solicitud.estatus_beca = self.get_estatus('Rechazada')
-        solicitud.motivo_rechazo = motivo_completo
-        solicitud.save()
+    def campos_lote(self, request):
+        return {'motivo_rechazo': self.get_motivo(request)}
+
+    def execute(self, request, solicitud):
+        if request.method != 'POST':
+            # Solo se captura si falta el POST. Si falta el motivo, se maneja abajo.
+            messages.error(request, 'Acción de rechazo no válida (requiere datos POST).')
+            # Devolvemos None si no hay datos POST válidos para que la vista lo maneje
+            return 
+
+        motivo_completo = self.get_motivo(request)
+
+        anterior = self.guardar(request, solicitud, estatus_beca=self.get_estatus(EstatusBeca.RECHAZADA), motivo_rechazo=motivo_completo)
+        self.registrar_transicion(request, solicitud, anterior, motivo_completo)
         messages.info(request, f'La solicitud #{solicitud.id_solicitud} ha sido Rechazada. 🚫')
 
 
 class AsignarSolicitudCommand(SolicitudCommand):
     """Implementa la lógica de la acción 'asignar'."""
+    estatus_destino = EstatusBeca.ASIGNADA
+    estatus_origen = (EstatusBeca.APROBADA,)
+
     def execute(self, request, solicitud):
-        solicitud.estatus_beca = self.get_estatus('Asignada')
-        solicitud.save()
+        anterior = self.guardar(request, solicitud, estatus_beca=self.get_estatus(EstatusBeca.ASIGNADA))
+        self.registrar_transicion(request, solicitud, anterior)
         messages.success(request, f'La solicitud #{solicitud.id_solicitud} ha sido Asignada. 🏅')
 
 
@@ -0,0 +1,181 @@
+# tasks/vistas/documento_views.py
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, StreamingHttpResponse, FileResponse, Http404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from ..models import Solicitud
+from ..utils.almacenamiento import almacenamiento_documentos, hash_de_contenido
+from ..utils.miniaturas import RENDICIONES, ruta_rendicion
+from .monitoreo_views import is_admin_or_analyst
+
+# Tamaño (en bytes) de cada bloque enviado al cliente en las respuestas parciales (Range).
+DOCUMENTO_BLOQUE = 64 * 1024
+
+# Tiempo (en segundos) que el navegador guarda un documento pedido con '?v=<sha256>' (ver
+# url_documento en templatetags/documentos.py) cuando ese es el hash del documento actual: la
+# URL cambia si el documento cambia (otra subida, la versión limpia del worker).
+DOCUMENTO_MAX_AGE = 60 * 60 * 24 * 365
+
+# Cabecera 'Range' de un solo rango: 'bytes=inicio-fin', 'bytes=inicio-' o 'bytes=-sufijo'.
+_RANGO_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# ====================
+# Funciones auxiliares
+# ====================
+
+def _documento_visible(request, solicitud_id, campo):
+    """
+    Nombre (en el storage) del documento 'campo' de la solicitud, si quien lo pide es el dueño
+    de la solicitud o un administrador/analista. Si no, Http404 (como los detalles de una
+    solicitud ajena).
+    """
+    if campo not in Solicitud.CAMPOS_DOCUMENTOS:
+        raise Http404("Documento no encontrado.")
+    fila = Solicitud.objects.filter(id_solicitud=solicitud_id).values_list('user_id', campo).first()
+    if fila is None or not fila[1]:
+        raise Http404("Documento no encontrado.")
+    user_id, nombre = fila
+    # El dueño se revisa primero: no necesita consultar el perfil.
+    if user_id != request.user.id and not is_admin_or_analyst(request.user):
+        raise Http404("Documento no encontrado.")
+    return nombre
+
+
+def _rango(cabecera, tamano):
+    """
+    (inicio, fin) -incluidos- del rango pedido en la cabecera 'Range' para un archivo de
+    'tamano' bytes, o None si se debe enviar el archivo completo (sin cabecera, con varios
+    rangos o con una cabecera que no se entiende). ValueError si el rango queda fuera del archivo.
+    """
+    coincidencia = _RANGO_RE.match(cabecera.strip()) if cabecera else None
+    if not coincidencia or coincidencia.groups() == ('', ''):
+        return None
+    inicio, fin = coincidencia.groups()
+    if not inicio:
+        # Los últimos 'fin' bytes.
+        if not int(fin) or not tamano:
+            raise ValueError("Rango vacío.")
+        return max(tamano - int(fin), 0), tamano - 1
+    inicio = int(inicio)
+    if fin and int(fin) < inicio:
+        # Rango inválido: se ignora.
+        return None
+    if inicio >= tamano:
+        raise ValueError("Rango fuera del archivo.")
+    return inicio, min(int(fin), tamano - 1) if fin else tamano - 1
+
+
+def _cache_documento(response, inmutable):
+    """
+    Cabeceras de caché de un documento: son datos personales, así que solo el navegador de
+    quien lo ve puede guardarlos. Si la URL lleva el hash del documento actual no cambia
+    nunca (immutable); si no, el navegador lo revalida cada vez con el ETag.
+    """
+    if inmutable:
+        patch_cache_control(response, private=True, max_age=DOCUMENTO_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _bloques(archivo, inicio, longitud):
+    """Lee 'longitud' bytes de 'archivo' desde 'inicio', en bloques de DOCUMENTO_BLOQUE."""
+    with archivo:
+        archivo.seek(inicio)
+        while longitud > 0:
+            bloque = archivo.read(min(DOCUMENTO_BLOQUE, longitud))
+            if not bloque:
+                break
+            longitud -= len(bloque)
+            yield bloque
+
+
+def _respuesta_django(request, nombre, nombre_descarga, inmutable):
+    """
+    Envía el documento desde Django: ETag y Last-Modified (con respuesta 304 si el navegador
+    ya lo tiene) y cabecera 'Range' de un solo rango (respuesta 206).
+    """
+    ruta = almacenamiento_documentos.path(nombre)
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
+        raise Http404("Documento no encontrado.")
+
+    # El nombre de un documento guardado por contenido ya es su hash.
+    digest = hash_de_contenido(nombre)
+    if digest:
+        etag = quote_etag(digest)
+    else:
+        etag = quote_etag(f"{estado.st_size:x}-{estado.st_mtime_ns:x}")
+
+    def cabeceras(response):
+        response['ETag'] = etag
+        response['Accept-Ranges'] = 'bytes'
+        return _cache_documento(response, inmutable)
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(estado.st_mtime))
+    if response is not None:
+        return cabeceras(response)
+
+    rango = None
+    if request.headers.get('If-Range', etag) == etag:
+        try:
+            rango = _rango(request.headers.get('Range'), estado.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f"bytes */{estado.st_size}"
+            return cabeceras(response)
+
+    content_type = mimetypes.guess_type(nombre)[0] or 'application/octet-stream'
+    if rango is None:
+        response = FileResponse(open(ruta, 'rb'), filename=nombre_descarga, content_type=content_type)
+    else:
+        inicio, fin = rango
+        response = StreamingHttpResponse(_bloques(open(ruta, 'rb'), inicio, fin - inicio + 1), status=206, content_type=content_type)
+        response['Content-Length'] = fin - inicio + 1
+        response['Content-Range'] = f"bytes {inicio}-{fin}/{estado.st_size}"
+    return cabeceras(response)
+
+# ==============================================
+# Documentos subidos de las solicitudes
+# ==============================================
+
+@login_required
+def ver_documento(request, solicitud_id, campo, rendicion=None):
+    """
+    Documento subido de una solicitud (o una de sus versiones reducidas, ver
+    utils/miniaturas.py), solo para su dueño y para administradores/analistas. Según
+    DOCUMENTOS_ENTREGA, el archivo lo envía el servidor web (X-Accel-Redirect de nginx o
+    X-Sendfile) o, por defecto, Django. Con '?v=' igual al hash del documento actual se puede
+    guardar en caché sin revalidar (ver _cache_documento).
+    """
+    nombre = _documento_visible(request, solicitud_id, campo)
+    digest = hash_de_contenido(nombre)
+    inmutable = digest is not None and request.GET.get('v') == digest
+    if rendicion is not None:
+        if rendicion not in RENDICIONES:
+            raise Http404("Documento no encontrado.")
+        nombre = ruta_rendicion(nombre, rendicion)
+    extension = os.path.splitext(nombre)[1]
+    nombre_descarga = f"{campo}{'.' + rendicion if rendicion else ''}{extension}"
+
+    entrega = settings.DOCUMENTOS_ENTREGA
+    if entrega == 'x-accel-redirect':
+        # nginx envía el archivo desde su location 'internal' (con Range, ETag, etc.).
+        response = HttpResponse(content_type=mimetypes.guess_type(nombre)[0] or 'application/octet-stream')
+        response['X-Accel-Redirect'] = settings.DOCUMENTOS_X_ACCEL_PREFIJO + quote(nombre)
+    elif entrega == 'x-sendfile':
+        response = HttpResponse(content_type=mimetypes.guess_type(nombre)[0] or 'application/octet-stream')
+        response['X-Sendfile'] = almacenamiento_documentos.path(nombre)
+    else:
+        return _respuesta_django(request, nombre, nombre_descarga, inmutable)
+    response['Content-Disposition'] = f'inline; filename="{nombre_descarga}"'
+    return _cache_documento(response, inmutable)
@@ -44,7 +44,7 @@ def get_user_activity(request, user_id):
     Retorna los datos de actividad de un usuario específico en formato JSON (usado por AJAX).
     """
     try:
-        user_to_check = get_object_or_404(User, id=user_id)
+        user_to_check = get_object_or_404(User.objects.select_related('profile'), id=user_id)
         
         # Obtenemos los datos del perfil si existe.
         profile = getattr(user_to_check, 'profile', None)
@@ -65,7 +65,7 @@ def get_user_activity(request, user_id):
         }
         
         # Obtenemos las solicitudes del usuario
-        solicitudes = Solicitud.objects.filter(user=user_to_check).order_by('-fecha_creacion')
+        solicitudes = Solicitud.objects.for_user_dashboard().filter(user=user_to_check).order_by('-fecha_creacion')
         solicitudes_data = []
         for sol in solicitudes:
             solicitudes_data.append({
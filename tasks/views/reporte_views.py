@@ -1,34 +1,71 @@
-from django.http import HttpResponse
-from django.db.models import Count, Q, ExpressionWrapper, fields
-from django.db.models.functions import ExtractYear
-from django.shortcuts import render
-from django.utils import timezone
-from datetime import timedelta, date
+from django.http import JsonResponse, FileResponse, Http404
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.views.decorators.http import require_POST
+from django.shortcuts import render, get_object_or_404
+from django.urls import reverse
 import datetime
-import openpyxl 
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 
-from ..models import Solicitud, Profile, Becas, Plantel, EstatusBeca 
-from django.contrib.auth.models import User  
+from ..models import Profile, Becas, Plantel, EstatusBeca, TrabajoReporte, Estado, Municipio
 
 from ..utils.export_excel import get_exporter 
+from ..utils.report_jobs import encolar_reporte
+from ..utils.estadisticas import GRAFICOS, API_VERSION, obtener_estadistica, parsear_filtros
+from ..utils.export_cache import get_cached_export, set_cached_export, get_export_etag
+from .monitoreo_views import is_admin_or_analyst
 
 # ==============================================================================
 # FUNCIONES HELPER (Maneja la respuesta HTTP para todos los reportes)
 # ==============================================================================
 
-def _export_excel_response(workbook, filename_base):
-    """Crea la respuesta HTTP de Excel a partir de un workbook de openpyxl."""
+# Tamaño (en bytes) de cada bloque enviado al cliente al servir el archivo.
+EXCEL_STREAM_BLOCK_SIZE = 64 * 1024
+
+def _export_excel_response(request, exporter, filename_base):
+    """
+    Crea la respuesta HTTP de Excel a partir del Contexto de exportación.
+
+    1. Calcula la versión de los datos del reporte (contadores de VersionDatos, sin recorrer tablas)
+       y responde 304 Not Modified si el cliente ya tiene esa versión (ETag / Last-Modified).
+    2. Si el reporte de esa versión ya está guardado en la carpeta de reportes, envía ese archivo.
+    3. Si no, lo genera con una hoja de solo escritura en un archivo temporal y lo guarda en la
+       carpeta para las próximas descargas.
+    En ambos casos el archivo se envía por bloques con FileResponse, sin cargarlo en memoria.
+    """
     now = datetime.datetime.now()
     filename = f"{filename_base}_{now.strftime('%d-%m-%Y')}.xlsx"
-
-    # Configura la respuesta HTTP para descargar un archivo Excel
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-    # Guarda el workbook en el objeto de respuesta
-    workbook.save(response)
+    content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    version, last_modified = exporter.get_data_state()
+    etag = quote_etag(get_export_etag(exporter.report_type, version))
+    last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+    if not_modified is not None:
+        return not_modified
+
+    archivo = get_cached_export(exporter.report_type, version)
+    if archivo is None:
+        generado = exporter.execute_streaming_export()
+        try:
+            archivo = set_cached_export(exporter.report_type, version, generado)
+            generado.close()
+        except OSError:
+            # Si no se puede guardar (disco lleno, sin permisos), se envía el archivo
+            # temporal; se elimina al cerrarse la respuesta.
+            archivo = generado
+            archivo.seek(0)
+
+    # Configura la respuesta HTTP para descargar un archivo Excel. FileResponse cierra el
+    # archivo al terminar y calcula el Content-Length.
+    response = FileResponse(archivo, as_attachment=True, filename=filename, content_type=content_type)
+    response.block_size = EXCEL_STREAM_BLOCK_SIZE
+    response['ETag'] = etag
+    if last_modified_ts is not None:
+        response['Last-Modified'] = http_date(last_modified_ts)
+    # El navegador puede guardar el archivo, pero debe revalidarlo en cada descarga.
+    patch_cache_control(response, private=True, no_cache=True)
     return response
 
 # ==============================================================================
@@ -38,154 +75,117 @@ def _export_excel_response(workbook, filename_base):
 def export_profiles_to_excel(request):
     """Exporta los perfiles de los solicitantes usando la Estrategia Profiles."""
     # 1. Obtiene el Contexto con la Estrategia específica.
-    # 2. Ejecuta la exportación y obtiene el Workbook.
-    workbook = get_exporter('profiles').execute_export()
-    # 3. Envía el Workbook al Helper para generar la respuesta HTTP.
-    return _export_excel_response(workbook, "reporte_solicitantes")
+    # 2. Envía el Contexto al Helper, que reutiliza el reporte en cache para la versión
+    #    actual de los datos o lo genera en modo streaming, y arma la respuesta HTTP.
+    return _export_excel_response(request, get_exporter('profiles'), "reporte_solicitantes")
 
 def export_becas_to_excel(request):
     """Exporta el catálogo de becas usando la Estrategia Becas."""
-    workbook = get_exporter('becas').execute_export()
-    return _export_excel_response(workbook, "reporte_becas")
+    return _export_excel_response(request, get_exporter('becas'), "reporte_becas")
 
 def export_planteles_to_excel(request):
     """Exporta el catálogo de planteles usando la Estrategia Planteles."""
-    workbook = get_exporter('planteles').execute_export()
-    return _export_excel_response(workbook, "reporte_planteles")
+    return _export_excel_response(request, get_exporter('planteles'), "reporte_planteles")
 
 def export_solicitudes_to_excel(request):
     """Exporta el reporte completo de solicitudes usando la Estrategia Solicitudes."""
-    workbook = get_exporter('solicitudes').execute_export()
-    return _export_excel_response(workbook, "reporte_solicitudes")
+    return _export_excel_response(request, get_exporter('solicitudes'), "reporte_solicitudes")
 
 # ==============================================================================
-# VISTA DE GRÁFICOS (Se mantiene aquí, ya que renderiza HTML/JSON)
+# VISTAS DE REPORTES EN SEGUNDO PLANO (Cola TrabajoReporte + comando procesar_reportes)
 # ==============================================================================
 
-def graf_beca(request):
+def _trabajo_json(trabajo):
+    """Representación JSON del estado de un trabajo de reporte."""
+    data = {
+        'id': trabajo.id,
+        'tipo_reporte': trabajo.tipo_reporte,
+        'estatus': trabajo.estatus,
+        'estatus_display': trabajo.get_estatus_display(),
+        'progreso': trabajo.progreso,
+        'filas_procesadas': trabajo.filas_procesadas,
+        'total_filas': trabajo.total_filas,
+        'url_estado': reverse('estado_reporte', args=[trabajo.id]),
+        'url_descarga': None,
+        'error': trabajo.error or None,
+    }
+    if trabajo.estatus == TrabajoReporte.ESTATUS_COMPLETADO:
+        data['url_descarga'] = reverse('descargar_reporte', args=[trabajo.id])
+    return data
+
+@login_required
+@user_passes_test(is_admin_or_analyst, login_url='/')
+@require_POST
+def solicitar_reporte(request, tipo_reporte):
     """
-    Genera los datos para los gráficos del dashboard (Solicitudes por Estatus, Fecha, Becas, etc.).
+    Encola la generación de un reporte. Si ya hay un trabajo para el mismo reporte
+    y la misma versión de los datos, se reutiliza ese trabajo.
     """
-    # Gráfico de Solicitudes por Estatus
-    solicitudes_por_estatus = Solicitud.objects.values('estatus_beca__nombre').annotate(count=Count('id_solicitud'))
-    labels_estatus = [item['estatus_beca__nombre'] for item in solicitudes_por_estatus if item['estatus_beca__nombre'] is not None]
-    data_estatus = [item['count'] for item in solicitudes_por_estatus if item['estatus_beca__nombre'] is not None]
-
-    # Gráfico de Solicitudes por Fecha (Últimos 30 días)
-    today = timezone.localdate()
-    dates_30_days_ago = today - timedelta(days=29)
-
-    all_dates_in_range = [(dates_30_days_ago + timedelta(days=i)) for i in range(30)]
-    labels_fecha = [d.strftime('%Y-%m-%d') for d in all_dates_in_range]
-
-    solicitudes_por_fecha = Solicitud.objects.filter(
-        fecha_creacion__date__gte=dates_30_days_ago
-    ).values('fecha_creacion__date').annotate(count=Count('id_solicitud')).order_by('fecha_creacion__date')
-
-    data_fecha_dict = {str(item['fecha_creacion__date']): item['count'] for item in solicitudes_por_fecha}
-    data_fecha = [data_fecha_dict.get(date_str, 0) for date_str in labels_fecha]
-
-    # Gráfico de Usuarios Registrados por Fecha (Últimos 30 días)
-    usuarios_por_fecha = User.objects.filter(
-        date_joined__date__gte=dates_30_days_ago
-    ).values('date_joined__date').annotate(count=Count('id')).order_by('date_joined__date')
-
-    data_usuarios_fecha_dict = {str(item['date_joined__date']): item['count'] for item in usuarios_por_fecha}
-    data_usuarios_fecha = [data_usuarios_fecha_dict.get(date_str, 0) for date_str in labels_fecha]
-
-    # Gráfico de Becas Más Solicitadas
-    becas_mas_solicitadas_qs = Solicitud.objects.values('beca__nombre').annotate(
-        total_solicitudes=Count('id_solicitud')
-    ).order_by('-total_solicitudes')[:5]
-
-    labels_becas_solicitadas = [item['beca__nombre'] for item in becas_mas_solicitadas_qs if item['beca__nombre'] is not None]
-    data_becas_solicitadas = [item['total_solicitudes'] for item in becas_mas_solicitadas_qs if item['beca__nombre'] is not None]
-
-    # Gráfico de Solicitudes por Municipio
-    solicitudes_por_municipio = Solicitud.objects.values('municipio__nombre').annotate(count=Count('id_solicitud')).order_by('-count')[:10]
-    labels_municipio = [item['municipio__nombre'] for item in solicitudes_por_municipio if item['municipio__nombre'] is not None]
-    data_municipio = [item['count'] for item in solicitudes_por_municipio if item['municipio__nombre'] is not None]
-
-    # Gráfico de Solicitudes por Parroquia
-    solicitudes_por_parroquia = Solicitud.objects.values('parroquia__nombre').annotate(count=Count('id_solicitud')).order_by('-count')[:10]
-    labels_parroquia = [item['parroquia__nombre'] for item in solicitudes_por_parroquia if item['parroquia__nombre'] is not None]
-    data_parroquia = [item['count'] for item in solicitudes_por_parroquia if item['parroquia__nombre'] is not None]
-    
-    # LÓGICA: Solicitudes por GÉNERO
-    solicitudes_por_genero = Solicitud.objects.values('user__profile__genero').annotate(
-        count=Count('id_solicitud')
-    ).filter(
-        Q(user__profile__genero='M') | Q(user__profile__genero='F') 
-    )
-
-    labels_genero_raw = [item['user__profile__genero'] for item in solicitudes_por_genero]
-    data_genero = [item['count'] for item in solicitudes_por_genero]
-    
-    labels_genero = []
-    for raw_label in labels_genero_raw:
-        if raw_label == 'M':
-            labels_genero.append('Masculino')
-        elif raw_label == 'F':
-            labels_genero.append('Femenino')
-        else:
-            labels_genero.append('Otro/No especificado')
-            
-    # LÓGICA: Solicitudes por RANGO de EDAD
-    today_date = date.today()
-    
-    age_field = ExpressionWrapper(
-        (today_date.year - ExtractYear('user__profile__fecha_nacimiento')),
-        output_field=fields.IntegerField()
-    )
-    
-    rangos_edad_data = Solicitud.objects.annotate(age=age_field).aggregate(
-        r18_24=Count('id_solicitud', filter=Q(age__gte=18, age__lte=24)),
-        r25_34=Count('id_solicitud', filter=Q(age__gte=25, age__lte=34)),
-        r35_mas=Count('id_solicitud', filter=Q(age__gte=35)),
-        r_menor=Count('id_solicitud', filter=Q(age__lt=18, age__gte=0)) 
+    try:
+        trabajo = encolar_reporte(tipo_reporte, request.user)
+    except ValueError as ve:
+        return JsonResponse({'error': str(ve)}, status=400)
+    return JsonResponse(_trabajo_json(trabajo), status=202)
+
+@login_required
+@user_passes_test(is_admin_or_analyst, login_url='/')
+def estado_reporte(request, trabajo_id):
+    """Retorna el estatus y el avance de un trabajo de reporte (consultado por AJAX)."""
+    trabajo = get_object_or_404(TrabajoReporte, id=trabajo_id)
+    return JsonResponse(_trabajo_json(trabajo))
+
+@login_required
+@user_passes_test(is_admin_or_analyst, login_url='/')
+def descargar_reporte(request, trabajo_id):
+    """Descarga el archivo generado por un trabajo de reporte completado."""
+    trabajo = get_object_or_404(TrabajoReporte, id=trabajo_id, estatus=TrabajoReporte.ESTATUS_COMPLETADO)
+    if not trabajo.archivo:
+        raise Http404("El reporte no tiene un archivo generado.")
+    return FileResponse(
+        trabajo.archivo.open('rb'),
+        as_attachment=True,
+        filename=trabajo.archivo.name.rsplit('/', 1)[-1],
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
     )
 
-    labels_edad = ['18-24 años', '25-34 años', '35+ años', 'Menor de 18']
-    data_edad = [
-        rangos_edad_data['r18_24'],
-        rangos_edad_data['r25_34'],
-        rangos_edad_data['r35_mas'],
-        rangos_edad_data['r_menor']
-    ]
-
-    if data_edad[-1] == 0 and len(data_edad) > 1:
-        labels_edad.pop()
-        data_edad.pop()
-    
-    # Conteo de usuarios por tipo (Datos para tarjetas o resumen)
-    total_usuarios = User.objects.count()
-    analistas_bienestar = User.objects.filter(is_superuser=True).count()
-    analistas_exterior = User.objects.filter(profile__is_analista_exterior=True).count()
-    solicitantes = User.objects.filter(is_superuser=False).exclude(profile__is_analista_exterior=True).count()
+# ==============================================================================
+# VISTA DE GRÁFICOS Y API JSON DE ESTADÍSTICAS
+# ==============================================================================
 
+def graf_beca(request):
+    """
+    Renderiza el dashboard de gráficos sin datos: cada gráfico se carga después
+    del primer pintado desde su endpoint JSON (estadistica_api), en paralelo.
+    Los filtros del formulario (fechas, estado, beca, municipio) se envían por GET
+    y el template los reenvía a cada endpoint.
+    """
     context = {
-        'labels_estatus': labels_estatus,
-        'data_estatus': data_estatus,
-        'labels_fecha': labels_fecha,
-        'data_fecha': data_fecha,
-        'data_usuarios_fecha': data_usuarios_fecha,
-        'labels_becas_solicitadas': labels_becas_solicitadas,
-        'data_becas_solicitadas': data_becas_solicitadas,
-        'labels_municipio': labels_municipio,
-        'data_municipio': data_municipio,
-        'labels_parroquia': labels_parroquia,
-        'data_parroquia': data_parroquia,
-        
-        # DATOS DE GÉNERO Y EDAD
-        'labels_genero': labels_genero,
-        'data_genero': data_genero,
-        'labels_edad': labels_edad,
-        'data_edad': data_edad,
-        
-        # DATOS DE RESUMEN DE USUARIOS
-        'total_usuarios': total_usuarios,
-        'analistas_bienestar': analistas_bienestar,
-        'analistas_exterior': analistas_exterior,
-        'solicitantes': solicitantes,
+        'urls_estadisticas': {
+            nombre: reverse('estadistica_api', kwargs={'version': API_VERSION, 'grafico': nombre})
+            for nombre in GRAFICOS
+        },
+        'filtros': request.GET,
+        'estados': Estado.objects.order_by('nombre').values_list('id', 'nombre'),
+        'becas': Becas.objects.order_by('nombre').values_list('id_beca', 'nombre'),
+        'municipios': Municipio.objects.order_by('nombre').values_list('id', 'nombre'),
     }
-    return render(request, 'graf_becas.html', context)
\ No newline at end of file
+    return render(request, 'graf_becas.html', context)
+
+@login_required
+@user_passes_test(is_admin_or_analyst, login_url='/')
+def estadistica_api(request, version, grafico):
+    """
+    Retorna en JSON los datos de un gráfico del dashboard.
+    Los datos se guardan en el cache del servidor (ver utils/estadisticas.py) y el
+    navegador puede reutilizar la respuesta durante el TTL del gráfico.
+    """
+    if version != API_VERSION or grafico not in GRAFICOS:
+        raise Http404("Gráfico de estadísticas no encontrado.")
+    try:
+        filtros = parsear_filtros(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    response = JsonResponse(obtener_estadistica(grafico, filtros))
+    patch_cache_control(response, private=True, max_age=GRAFICOS[grafico].ttl)
+    return response
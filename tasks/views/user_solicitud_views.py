@@ -2,40 +2,72 @@
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from django.utils import timezone
+from django.db import IntegrityError, transaction
 from datetime import date
+import logging
 
 # Importaciones relativas
-from ..models import Task, Solicitud
+from ..models import Task, Solicitud, DocumentoAlmacenado
 from ..forms.solicitud_form import SolicitudForm
+from ..utils.subidas import ValidacionDocumentosHandler
+from ..utils.catalogos import invalidar_catalogo
+from ..utils.almacenamiento import es_por_contenido
+
+logger = logging.getLogger(__name__)
 
 @login_required
 def tasks(request):
     """Muestra todas las solicitudes/tareas del usuario."""
-    solic_pend = Solicitud.objects.filter(user=request.user).order_by('-fecha_creacion')
+    solic_pend = Solicitud.objects.for_user_dashboard().filter(user=request.user).order_by('-fecha_creacion')
     return render(request, 'tasks.html',{'solic_pend': solic_pend})
 
 @login_required
 def tasks_completed(request):
     """Muestra tareas completadas (si usas el modelo Task)."""
     tasks = Task.objects.filter(user=request.user, datacompleted__isnull=False).order_by('-datacompleted')
+    # tasks.html lista las solicitudes del usuario en 'solic_pend'.
+    solic_pend = Solicitud.objects.for_user_dashboard().filter(user=request.user).order_by('-fecha_creacion')
     return render(request, 'tasks.html',{
-        'tasks': tasks
+        'tasks': tasks,
+        'solic_pend': solic_pend,
     })
 
+# Los documentos se revisan mientras se suben (ver utils/subidas.py). El handler se instala
+# antes de leer request.POST, así que la verificación CSRF (que lo lee) se hace en
+# _create_tasks y no en el middleware.
+@csrf_exempt
 @login_required
 def create_tasks(request):
     """
     Permite al usuario crear una nueva solicitud/tarea, 
     calculando automáticamente la edad del becario.
     """
+    if request.method == 'POST':
+        request.upload_handlers.insert(0, ValidacionDocumentosHandler(request))
+    return _create_tasks(request)
+
+def _descartar_documentos(solicitud, campos):
+    """
+    Tras fallar el guardado de 'solicitud', borra los documentos de 'campos' que el storage ya
+    había escrito: sus referencias se deshicieron con la transacción y ninguna solicitud los
+    usa (si otra subida usa el mismo archivo, eliminar_si_no_se_usa lo deja).
+    """
+    for campo in campos:
+        nombre = getattr(solicitud, campo).name
+        if es_por_contenido(nombre):
+            DocumentoAlmacenado.eliminar_si_no_se_usa(nombre)
+
+@csrf_protect
+def _create_tasks(request):
     if request.method == 'GET':
         return render(request, 'create_tasks.html', {
             'form': SolicitudForm()
         })
     else:
         # Usa request.POST y request.FILES ya que tienes archivos adjuntos
-        form = SolicitudForm(request.POST, request.FILES)
+        form = SolicitudForm(request.POST, request.FILES, errores_subida=getattr(request, 'errores_subida', None))
         
         if form.is_valid():
             # Usa commit=False para poder modificar la instancia antes de guardarla
@@ -60,14 +92,34 @@ def create_tasks(request):
             new_tasks.user = request.user
             
             # Ahora sí, guardar la instancia completamente
+            # Documentos que se escriben en el storage al guardar (por si hay que descartarlos).
+            subidos = [
+                campo for campo in Solicitud.CAMPOS_DOCUMENTOS
+                if getattr(new_tasks, campo) and not getattr(new_tasks, campo)._committed
+            ]
             try:
-                new_tasks.save()
+                with transaction.atomic():
+                    new_tasks.save()
                 return redirect('tasks') # Redirigir a la lista de tareas/solicitudes
-            except Exception as e:
-                # Manejo genérico de errores al guardar
+            except IntegrityError:
+                # El formulario valida los catálogos contra la copia en memoria (ver
+                # utils/catalogos.py), no contra la BD: si otro proceso borró la opción elegida
+                # antes de que venciera esa copia, la clave foránea falla al confirmar. Se
+                # recarga el catálogo y se le pide al usuario que vuelva a elegir.
+                _descartar_documentos(new_tasks, subidos)
+                invalidar_catalogo()
+                form.add_error(None, "Una de las opciones seleccionadas ya no existe. Por favor, revisa los datos y vuelve a enviar la solicitud.")
+                return render(request, 'create_tasks.html', {
+                    'form': form,
+                    'error': 'No se envió correctamente la solicitud. Por favor, revisa los datos y los archivos adjuntos.'
+                })
+            except Exception:
+                # Manejo genérico de errores al guardar: el detalle queda en el log, no se muestra.
+                logger.exception("Error al guardar la solicitud del usuario %s", request.user.pk)
+                _descartar_documentos(new_tasks, subidos)
                 return render(request, 'create_tasks.html', {
                     'form': form,
-                    'error': f'Ocurrió un error al guardar la solicitud: {e}'
+                    'error': 'Ocurrió un error al guardar la solicitud. Por favor, inténtalo de nuevo más tarde.'
                 })
         else:
             # Si el formulario no es válido, renderizar con errores
@@ -114,7 +166,7 @@ def delete_task(request, task_id):
 @login_required
 def solic_details_user(request, solicitud_id):
     """Muestra detalles de una solicitud para el usuario solicitante."""
-    solicitud = get_object_or_404(Solicitud, id_solicitud=solicitud_id, user=request.user)
+    solicitud = get_object_or_404(Solicitud.objects.for_detail(), id_solicitud=solicitud_id, user=request.user)
     context = {
         'solicitud': solicitud
     }